@@ -7,18 +7,61 @@ crawler.py
 The purpose of this script is to run all other scripts, so that the process from
 finding data files to inserting them into the database is entirely automated.
 
+Each script is a step of the pipeline. The data of each classification (See
+<find_data_urls.FILE_CLASSIFICATIONS>) is downloaded, organized, and cleaned by
+its own stages, declared in STAGES along with their input, output, and the
+stages they depend on. A stage runs once all of its dependencies have finished,
+and stages which do not depend on each other run concurrently. E.g. one
+classification's files are cleaned while another's are still downloading.
+
+By default, the user is asked before each step is run. The crawler can also
+be run unattended (E.g. from cron). Every run re-checks the state's websites
+for new or updated data files, so the same command keeps the data up to date:
+
+    $ python3 crawler.py --yes
+    $ python3 crawler.py --yes --from organize_data --until normalize_data
+    $ python3 crawler.py --yes --only clean_data --force
+    $ python3 crawler.py --yes --format xlsx
+
 <FUNCTIONS>
 This section only lists a brief description of each function. For more
 comprehensive documentation, see each method directly.
 
+    * get_classification_stages(...):
+        Builds the stages which download, organize, and clean a classification.
+
     * prompt_bool(...):
         Prompts the user for a boolean input.
 
+    * needs_run(...):
+        Determines if a stage should be (re)computed.
+
+    * count_visible(...):
+        Counts the entries of a directory, other than hidden ones.
+
     * run_operation(...):
-        Sets-up for and runs a given script, if needed.
+        Runs a single stage's script.
+
+    * list_steps(...):
+        Lists the steps of the pipeline.
+
+    * select_stages(...):
+        Determines which stages were asked to run.
+
+    * run_pipeline(...):
+        Runs the selected stages, in dependency order.
+
+    * parse_args(...):
+        Parses the command line arguments.
+
+    * main(...):
+        Runs the crawler.
 '''
 
 import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from scripts import find_pdf_urls
 from scripts import find_data_urls
 from scripts import download_urls
@@ -26,12 +69,18 @@ from scripts import organize_data
 from scripts import clean_data
 from scripts import normalize_data
 from scripts import insert_data
-from scripts.utils import Logger
+from scripts import workbook_io
+from scripts.utils import Logger, LogBuffer, CrawlManifest
+from scripts.raw_store import RawStore
+from scripts.http_client import HttpClient, RetryPolicy
 from pathlib import Path
 
 PDF_FILE = "./data/TeamProject.pdf"
 PDF_URLS_FILE = "./data/pdf_urls.txt"
 DATA_URLS_FILE = "./data/data_urls.txt"
+CRAWL_MANIFEST_FILE = "./data/crawl_manifest.json"
+HTTP_STORE_DIRECTORY = "./data/http-store"
+BUILD_CACHE_DIRECTORY = "./data/build-cache"
 
 RAW_DATA_DIRECTORY = "./data/data-raw"
 ORGANIZED_DATA_DIRECTORY = "./data/data-organized"
@@ -40,9 +89,205 @@ NORMALIZED_DATA_DIRECTORY = "./data/data-norm"
 DATABASE_FILE = "../web-framework/server/database2.db"
 LOGS_FILE = "./crawler_logs.txt"
 
-logger = Logger(LOGS_FILE)
-logger.write("Running script...")
-logger.indent()
+INTERMEDIATE_FILE_FORMAT = "sqlite" # The default of --format. "xlsx" to write the clean/normalized data as Excel workbooks
+
+HTTP_CLIENT_OPTIONS = {
+    "pool_connections": 8,
+    "pool_maxsize": 8,
+    "timeout": (10, 60),
+    "host_limits": {"futurereadypa": 2, "pa.gov": 4, "paschoolperformance": 2},
+    "host_rates": {"futurereadypa": 2.0, "pa.gov": 5.0, "paschoolperformance": 2.0},
+    "retry_policy": RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=60.0),
+    "mode": "live", # "record" to snapshot every response, "replay" to crawl from the snapshot
+    "store_directory": HTTP_STORE_DIRECTORY,
+}
+
+http_client = HttpClient(**HTTP_CLIENT_OPTIONS)
+crawl_manifest = CrawlManifest(CRAWL_MANIFEST_FILE)
+raw_store = RawStore(RAW_DATA_DIRECTORY)
+
+FIND_PDF_URLS_OPTIONS = {
+    "client": http_client,
+}
+
+FIND_DATA_URLS_OPTIONS = {
+    "manifest_file": CRAWL_MANIFEST_FILE,
+    "manifest": crawl_manifest,
+    "client": http_client,
+    "max_workers": 8,
+}
+
+DOWNLOAD_OPTIONS = {
+    "max_workers": 8,
+    "chunk_size": 1024 * 1024,
+    "manifest_file": CRAWL_MANIFEST_FILE,
+    "max_resumes": 3,
+    "client": http_client,
+    "manifest": crawl_manifest,
+    "store": raw_store,
+}
+
+ORGANIZE_OPTIONS = {
+    "ignored_files": [], # E.g. "Keystones/Keystone School 2019 (2).xlsx", to choose between files organized under the same name
+}
+
+# Each classification is also given its own "cache_file" (See @get_classification_stages(...))
+CLEAN_OPTIONS = {
+    "max_workers": os.cpu_count() or 1,
+    "conversion_directory": BUILD_CACHE_DIRECTORY + "/xlsx",
+    "read_xls": False, # True to read .xls files directly, rather than converting them
+    "file_format": INTERMEDIATE_FILE_FORMAT,
+}
+
+NORMALIZE_OPTIONS = {
+    "cache_file": BUILD_CACHE_DIRECTORY + "/normalize_data.json",
+    "file_format": INTERMEDIATE_FILE_FORMAT,
+}
+
+MAX_CONCURRENT_STAGES = 4
+'''[Integer]: The default number of independent stages which may run at once.'''
+
+def get_classification_stages(classification):
+    '''
+    Builds the stages which download, organize, and clean a classification.
+
+    <ARGUMENTS>
+        * classification [String]: The data file classification (See <find_data_urls.FILE_CLASSIFICATIONS>).
+
+    <RETURN>
+        * [[Dictionary...]]: The classification's stages (See STAGES).
+    '''
+
+    return [
+        {
+            "name": "download_urls/" + classification,
+            "step": "download_urls",
+            "classification": classification,
+            "script": download_urls,
+            "input": DATA_URLS_FILE,
+            "output": RAW_DATA_DIRECTORY,
+            "description": "data downloader",
+            "check_msg": "Checking for new or updated data files",
+            "check_type": "REFRESH",
+            "options": {**DOWNLOAD_OPTIONS, "classification": classification},
+            "dependencies": ["find_data_urls"],
+        },
+        {
+            "name": "organize_data/" + classification,
+            "step": "organize_data",
+            "classification": classification,
+            "script": organize_data,
+            "input": RAW_DATA_DIRECTORY,
+            "output": ORGANIZED_DATA_DIRECTORY,
+            "description": "data organizer",
+            "check_msg": "Not all data has been organized",
+            "check_type": "SCRIPT",
+            "options": {**ORGANIZE_OPTIONS, "classification": classification},
+            "dependencies": ["download_urls/" + classification],
+        },
+        {
+            "name": "clean_data/" + classification,
+            "step": "clean_data",
+            "classification": classification,
+            "script": clean_data,
+            "input": ORGANIZED_DATA_DIRECTORY,
+            "output": CLEAN_DATA_DIRECTORY,
+            "description": "data cleaner",
+            "check_msg": "Not all data has been cleaned",
+            "check_type": "CACHED",
+            "options": {
+                **CLEAN_OPTIONS,
+                "subdirectories": organize_data.get_new_directories(classification),
+                "cache_file": BUILD_CACHE_DIRECTORY + "/clean_data/" + classification + ".json", # So that stages cleaning at once don't overwrite each other's cache
+            },
+            "dependencies": ["organize_data/" + classification],
+        },
+    ]
+
+STAGES = [
+    {
+        "name": "find_pdf_urls",
+        "step": "find_pdf_urls",
+        "classification": None,
+        "script": find_pdf_urls,
+        "input": PDF_FILE,
+        "output": PDF_URLS_FILE,
+        "description": "pdf url finder",
+        "check_msg": "Could not find pdf urls",
+        "check_type": "FILE_FILE",
+        "options": FIND_PDF_URLS_OPTIONS,
+        "dependencies": [],
+    },
+    {
+        "name": "find_data_urls",
+        "step": "find_data_urls",
+        "classification": None,
+        "script": find_data_urls,
+        "input": PDF_URLS_FILE,
+        "output": DATA_URLS_FILE,
+        "description": "data url finder",
+        "check_msg": "Checking for new or updated data urls",
+        "check_type": "REFRESH",
+        "options": FIND_DATA_URLS_OPTIONS,
+        "dependencies": ["find_pdf_urls"],
+    },
+] + [stage for classification in find_data_urls.FILE_CLASSIFICATIONS for stage in get_classification_stages(classification)] + [
+    {
+        "name": "normalize_data",
+        "step": "normalize_data",
+        "classification": None,
+        "script": normalize_data,
+        "input": CLEAN_DATA_DIRECTORY,
+        "output": NORMALIZED_DATA_DIRECTORY,
+        "description": "data normalizer",
+        "check_msg": "Not all data has been normalized",
+        "check_type": "CACHED",
+        "options": NORMALIZE_OPTIONS,
+        "dependencies": ["clean_data/" + classification for classification in find_data_urls.FILE_CLASSIFICATIONS],
+    },
+    {
+        "name": "insert_data",
+        "step": "insert_data",
+        "classification": None,
+        "script": insert_data,
+        "input": NORMALIZED_DATA_DIRECTORY,
+        "output": DATABASE_FILE,
+        "description": "data inserter",
+        "check_msg": None,
+        "check_type": "DIR_FILE",
+        "options": {},
+        "dependencies": ["normalize_data"],
+    },
+]
+'''
+[[Dictionary...]]: The pipeline's stages, in the order they are preferred when
+more than one is ready. Each stage contains:
+
+    * "name" [String]: The stage's unique name (E.g. "clean_data/Keystones").
+
+    * "step" [String]: The name of the stage's step, as used on the command line (E.g. "clean_data").
+
+    * "classification" [String | None]:
+        The classification the stage works on. None, if it works on every
+        classification.
+
+    * "script" [Python Script]: The Python script to run.
+
+    * "input" [String]: The path to the script's input file/directory.
+
+    * "output" [String]: The path to the script's output file/directory.
+
+    * "description" [String]: The script's name, as shown to the user.
+
+    * "check_msg" [String | None]:
+        The message to send the user if the recomputation check fails.
+
+    * "check_type" [String]: The type of recomputation check (See @needs_run(...)).
+
+    * "options" [Dictionary]: Additional keyword arguments to pass to the script's run(...).
+
+    * "dependencies" [[String...]]: The names of the stages which must finish first.
+'''
 
 def prompt_bool(message):
     '''
@@ -65,107 +310,352 @@ def prompt_bool(message):
         print("Invalid input. ", end = "")
 
 
-def run_operation(operation_file, script_input, script_output, script_name, check_msg, check_type="DIR_DIR"):
+def needs_run(stage):
     '''
-    Sets-up for and runs a given script, if needed.
+    Determines if a stage should be (re)computed.
 
     <EXTENDED_DESCRIPTION>
-    Should it be determined that the operation had previously succeeded, it will
-    skip it. This is to reduce expensive and unnecessary repeated computations.
+    Should it be determined that the stage had previously succeeded, it will
+    be skipped. This is to reduce expensive and unnecessary repeated
+    computations.
+
+    The stage's check type can be any one of the following:
+
+        * "FILE_FILE":
+            The script reads input from a file and outputs to another
+            file. If the output file does not exist, it will run the script.
+
+        * "FILE_DIR":
+            The script reads input from a file and outputs to a directory.
+            If the directory is empty, it will run the script.
+
+        * "DIR_DIR":
+            The script reads input from a directory and outputs to
+            another directory. If the size of the input directory is
+            greater than that of the output, it will run the script. Hidden
+            entries (E.g. "<RAW_DATA_DIRECTORY>/.store") are not counted.
+
+        * "DIR_FILE":
+            The script reads input from a directory and outputs to a
+            file. It will always run the script.
+
+        * "REFRESH":
+            The script reads input from a file, and refreshes its output
+            using the crawl manifest (See <utils.CrawlManifest>), which only
+            fetches what the server reports has changed. It will run the
+            script whenever the input file exists.
+
+        * "CACHED":
+            The script keeps a build cache of what it computed (See
+            <build_cache.BuildCache>). If the script's needs_run(...), given
+            the same options as its run(...), finds any output out of date, it
+            will run the script, which only recomputes those outputs.
+
+        * "SCRIPT":
+            The script knows best which of its inputs it uses (E.g. the data
+            organizer skips unfinished downloads). If the script's
+            needs_run(...), given the same options as its run(...), finds
+            any output missing or out of date, it will run the script.
+
+        * "REQUIRE":
+            The script will always run. Intended for debugging purposes
+            only.
+
+        * "SKIP":
+            The script will never run. Inteded for debugging purposes
+            only.
+
+    Should the script be writting to a directory (Including each "CACHED"
+    script), this function will create it, if necessary.
 
     <ARGUMENTS>
-        * operation_file [Python Script]:
-            The Python script to run.
+        * stage [Dictionary]: The stage to check (See STAGES).
 
-        * script_input [String]:
-            The path to the script's input file/directory.
+    <RETURN>
+        * [Boolean]: If the stage should be run.
+
+    <RAISE>
+        * ValueError: If the stage's check type is invalid.
+    '''
+
+    check_type = stage["check_type"]
+    script_input = stage["input"]
+    script_output = stage["output"]
 
-        * script_output [String]:
-            The path to the script's output file/directory.
+    if "_DIR" in check_type or check_type == "CACHED":
+        Path(script_output).mkdir(parents=True, exist_ok=True)
+
+    if check_type == "FILE_FILE":
+        return Path.exists(Path(script_input)) and not Path.exists(Path(script_output))
+    elif check_type == "FILE_DIR":
+        return Path.exists(Path(script_input)) and len(os.listdir(script_output)) == 0
+    elif check_type == "REFRESH":
+        return Path.exists(Path(script_input))
+    elif check_type == "DIR_DIR":
+        return count_visible(script_input) > count_visible(script_output)
+    elif check_type == "CACHED" or check_type == "SCRIPT":
+        return stage["script"].needs_run(script_input, script_output, **stage["options"])
+    elif check_type == "DIR_FILE" or check_type == "REQUIRE":
+        return True
+    elif check_type == "SKIP":
+        return False
 
-        * script_name [String]:
-            The script's name.
+    raise ValueError("Invalid check type. Must be <FILE_FILE, FILE_DIR, DIR_DIR, DIR_FILE, REFRESH, CACHED, SCRIPT, SKIP, REQUIRE>")
 
-        * check_msg [String]:
-            The message to send the user if the recomputation check fails.
+def count_visible(directory):
+    '''
+    Counts the entries of a directory, other than hidden ones.
 
-        * check_type="DIR_DIR" [String]:
-            The type of recomputation check to run before running the script.
-            It can be any one of the following:
+    <ARGUMENTS>
+        * directory [String]: The path to the directory.
 
-                * "FILE_FILE":
-                    The script reads input from a file and outputs to another
-                    file. If the output file does not exist, it will run the script.
+    <RETURN>
+        * [Integer]: The number of entries whose name does not start with ".".
+    '''
 
-                * "FILE_DIR":
-                    The script reads input from a file and outputs to a directory.
-                    If the directory is empty, it will run the script.
+    return len([name for name in os.listdir(directory) if not name.startswith(".")])
 
-                * "DIR_DIR":
-                    The script reads input from a directory and outputs to
-                    another directory. If the size of the input directory is
-                    greater than that of the output, it will run the script.
+def run_operation(stage, logger):
+    '''
+    Runs a single stage's script.
 
-                * "DIR_FILE":
-                    The script reads input from a directory and outputs to a
-                    file. It will always run the script.
+    <EXTENDED_DESCRIPTION>
+    Intended to be run by a worker thread, so that independent stages can run
+    at the same time. The logger should therefore be the stage's own
+    LogBuffer, which is written once the stage is done.
 
-                * "REQURE":
-                    The script will always run. Intended for debugging purposes
-                    only.
+    <ARGUMENTS>
+        * stage [Dictionary]: The stage to run (See STAGES).
 
-                * "SKIP":
-                    The script will never run. Inteded for debugging purposes
-                    only.
+        * logger [utils.Logger | utils.LogBuffer]: The stage's logger.
 
-            Should the script be writting to a directory, this function will
-            create it, if necessary.
+    <RETURN>
+        * [Boolean]: If the script finished without raising an error.
     '''
 
-    if "_DIR" in check_type:
-        Path(script_output).mkdir(parents=True, exist_ok=True)
+    description = stage["description"]
+    if stage["classification"] is not None:
+        description += " (" + stage["classification"] + ")"
 
-    if check_type == "FILE_FILE":
-        result = Path.exists(Path(script_input)) and not Path.exists(Path(script_output))
-    elif check_type == "FILE_DIR":
-        result = Path.exists(Path(script_input)) and len(os.listdir(script_output)) == 0
-    elif check_type == "DIR_DIR":
-        result = len(os.listdir(script_input)) > len(os.listdir(script_output))
-    elif check_type == "DIR_FILE" or check_type == "REQUIRE":
-        result = True
-    elif check_type == "SKIP":
-        result = False
+    logger.newline()
+    logger.write(f'Starting {description} script...')
+
+    try:
+        stage["script"].run(stage["input"], stage["output"], logger, **stage["options"])
+    except Exception as e:
+        logger.warn(f'The {description} script failed: {e!r}')
+        return False
+
+    logger.write(f'Finished {description} script!')
+    return True
+
+def list_steps(stages):
+    '''
+    Lists the steps of the pipeline.
+
+    <ARGUMENTS>
+        * stages [[Dictionary...]]: The pipeline's stages (See STAGES).
+
+    <RETURN>
+        * [[String...]]: The name of each step, in the order they are first declared.
+    '''
+
+    steps = []
+    for stage in stages:
+        if stage["step"] not in steps:
+            steps.append(stage["step"])
+
+    return steps
+
+def select_stages(stages, only=None, start=None, end=None):
+    '''
+    Determines which stages were asked to run.
+
+    <ARGUMENTS>
+        * stages [[Dictionary...]]: The pipeline's stages (See STAGES).
+
+        * only=None [[String...] | None]: The names of the only steps to run.
+
+        * start=None [String | None]: The name of the first step to run.
+
+        * end=None [String | None]: The name of the last step to run.
+
+    <RETURN>
+        * [Set]: The names of the selected stages. Each of a step's stages is selected.
+
+    <RAISE>
+        * ValueError: If an unknown step is named.
+    '''
+
+    steps = list_steps(stages)
+
+    for step in (only or []) + [start, end]:
+        if step is not None and step not in steps:
+            raise ValueError(f'Unknown stage "{step}". Must be one of <{", ".join(steps)}>')
+
+    if only:
+        selected = set(only)
     else:
-        print("Invalid check type. Must be <FILE_FILE, FILE_DIR, DIR_FILE, DIR_DB, SKIP, REQUIRE>")
-        return
+        first = steps.index(start) if start is not None else 0
+        last = steps.index(end) if end is not None else len(steps) - 1
+        selected = set(steps[first:last + 1])
+
+    return {stage["name"] for stage in stages if stage["step"] in selected}
+
+def run_pipeline(stages, selected, logger, assume_yes=False, force=False, max_workers=MAX_CONCURRENT_STAGES):
+    '''
+    Runs the selected stages, in dependency order.
+
+    <EXTENDED_DESCRIPTION>
+    A stage becomes ready once each of its dependencies has either finished,
+    was not needed, or was not selected. Ready stages are checked (See
+    @needs_run(...)) on the main thread, in the order they are declared. They
+    are then run on a pool of worker threads, so that independent stages run
+    concurrently. Each stage logs to its own LogBuffer, which the main thread
+    writes once the stage is done, so the log of each stage stays together.
+
+    The user is asked once per step, before its first stage which needs to
+    run. The answer applies to each of the step's stages.
+
+    Should a stage be declined or fail, the stages which depend on it are
+    skipped. Every other stage still runs.
 
+    <ARGUMENTS>
+        * stages [[Dictionary...]]: The pipeline's stages (See STAGES).
+
+        * selected [Set]: The names of the stages to run.
+
+        * logger [utils.Logger]: The current Logger instance.
+
+        * assume_yes=False [Boolean]: If True, the user is not asked before each step.
+
+        * force=False [Boolean]: If True, the selected stages run even if they are up to date.
+
+        * max_workers=MAX_CONCURRENT_STAGES [Integer]: The number of stages which may run at once.
+
+    <RETURN>
+        * [Boolean]: If no stage failed.
+
+    <RAISE>
+        * ValueError: If a stage depends on one which does not exist.
+    '''
+
+    # "DONE", "BLOCKED" (declined, failed, or depends on one that was)
+    results = {stage["name"]: "DONE" for stage in stages if stage["name"] not in selected}
+    pending = [stage for stage in stages if stage["name"] in selected]
+    running = {}
+    answers = {} # If the user agreed to run each step
+    success = True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(pending) != 0 or len(running) != 0:
+            for stage in [stage for stage in pending if all(name in results for name in stage["dependencies"])]:
+                pending.remove(stage)
+
+                if "BLOCKED" in (results[name] for name in stage["dependencies"]):
+                    logger.newline()
+                    logger.write(f'Skipping the {stage["name"]} stage, as a stage it depends on did not finish')
+                    results[stage["name"]] = "BLOCKED"
+                    continue
+
+                if not force and not needs_run(stage):
+                    results[stage["name"]] = "DONE"
+                    continue
+
+                if stage["step"] not in answers:
+                    logger.newline()
+                    if stage["check_msg"] is not None:
+                        logger.write(stage["check_msg"])
+
+                    answers[stage["step"]] = assume_yes or prompt_bool(f'  Would you like to run the {stage["description"]} script? (y/n)')
+                    if not answers[stage["step"]]:
+                        logger.write("Aborting!")
+
+                if not answers[stage["step"]]:
+                    results[stage["name"]] = "BLOCKED"
+                    continue
+
+                buffer = LogBuffer()
+                running[executor.submit(run_operation, stage, buffer)] = (stage, buffer)
+
+            if len(running) == 0:
+                if len(pending) != 0 and not any(all(name in results for name in stage["dependencies"]) for stage in pending):
+                    raise ValueError(f'Could not resolve the dependencies of <{", ".join(stage["name"] for stage in pending)}>')
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, buffer = running.pop(future)
+                logger.flush(buffer)
+
+                if future.result():
+                    results[stage["name"]] = "DONE"
+                else:
+                    results[stage["name"]] = "BLOCKED"
+                    success = False
+
+    return success
+
+def parse_args(argv=None):
+    '''
+    Parses the command line arguments.
+
+    <ARGUMENTS>
+        * argv=None [[String...] | None]: The arguments. If None, sys.argv is used.
+
+    <RETURN>
+        * [argparse.Namespace]: The parsed arguments.
+    '''
+
+    steps = list_steps(STAGES)
+
+    parser = argparse.ArgumentParser(description="Finds, downloads, and inserts the PA school data into the database.")
+    parser.add_argument("-y", "--yes", action="store_true", help="run without asking before each stage")
+    parser.add_argument("--only", nargs="+", choices=steps, metavar="STAGE", help="only run the given stages")
+    parser.add_argument("--from", dest="start", choices=steps, metavar="STAGE", help="start from the given stage")
+    parser.add_argument("--until", dest="end", choices=steps, metavar="STAGE", help="stop after the given stage")
+    parser.add_argument("--force", action="store_true", help="run the selected stages even if they are up to date")
+    parser.add_argument("--format", dest="file_format", choices=workbook_io.FILE_FORMATS, default=INTERMEDIATE_FILE_FORMAT, help="the file format of the clean and normalized data")
+    parser.add_argument("--max-workers", type=int, default=MAX_CONCURRENT_STAGES, help="the number of independent stages run at once")
+
+    args = parser.parse_args(argv)
+    if args.only and (args.start or args.end):
+        parser.error("--only cannot be combined with --from or --until")
+
+    return args
+
+def main(argv=None):
+    '''
+    Runs the crawler.
+
+    <ARGUMENTS>
+        * argv=None [[String...] | None]: The command line arguments. If None, sys.argv is used.
+
+    <RETURN>
+        * [Integer]: The exit code. 1 if any stage failed, 0 otherwise.
+    '''
 
-    if result:
-        logger.newline()
-        if not check_msg == None:
-            logger.write(check_msg)
+    args = parse_args(argv)
+    selected = select_stages(STAGES, args.only, args.start, args.end)
 
-        run = prompt_bool(f'  Would you like to run the {script_name} script? (y/n)')
+    for stage in STAGES:
+        if "file_format" in stage["options"]:
+            stage["options"]["file_format"] = args.file_format
 
-        if run:
-            logger.newline()
-            logger.write(f'Starting {script_name} script...')
+    logger = Logger(LOGS_FILE)
+    logger.write("Running script...")
+    logger.indent()
 
-            operation_file.run(script_input, script_output, logger)
+    try:
+        success = run_pipeline(STAGES, selected, logger, args.yes, args.force, args.max_workers)
+    finally:
+        http_client.close()
 
-            logger.write("Done!")
-        else:
-            logger.write("Aborting!")
-            exit()
+    logger.unindent()
+    logger.write("Done!" if success else "Done, with errors!")
+    logger.close()
 
-run_operation(find_pdf_urls, PDF_FILE, PDF_URLS_FILE, "pdf url finder", "Could not find pdf urls", check_type="FILE_FILE")
-run_operation(find_data_urls, PDF_URLS_FILE, DATA_URLS_FILE, "data url finder", "Could not find data urls", check_type="FILE_FILE")
-run_operation(download_urls, DATA_URLS_FILE, RAW_DATA_DIRECTORY, "data downloader", "Data directory is empty", check_type="FILE_DIR")
-run_operation(organize_data, RAW_DATA_DIRECTORY, ORGANIZED_DATA_DIRECTORY, "data organizer", "Not all data has been organized")
-run_operation(clean_data, ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, "data cleaner", "Not all data has been cleaned")
-run_operation(normalize_data, CLEAN_DATA_DIRECTORY, NORMALIZED_DATA_DIRECTORY, "data normalizer", "Not all data has been normalized")
-run_operation(insert_data, NORMALIZED_DATA_DIRECTORY, DATABASE_FILE, "data inserter", None, check_type="DIR_FILE")
+    return 0 if success else 1
 
-logger.unindent()
-logger.write("Done!")
-logger.close()
+if __name__ == "__main__":
+    sys.exit(main())
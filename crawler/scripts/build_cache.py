@@ -0,0 +1,258 @@
+'''
+<FILE>
+build_cache.py
+
+
+<DESCRIPTION>
+The purpose of this script is to let the data processing scripts skip work
+whose inputs have not changed since it was last done.
+
+A build cache records, for each output artifact (E.g. a classification's clean
+data directory), the content hash of every input it was built from, along with
+the version of the code that built it. An output only needs to be rebuilt if
+one of these has changed, or if any file it produced has gone missing.
+
+Hashing every input on every run would be slow, so the size and modification
+time of each input are recorded alongside its hash. Inputs whose size and
+modification time are unchanged are not hashed again.
+
+
+<CLASSES>
+This section only lists a brief description of each class. For more
+comprehensive documentation, see each class directly.
+
+    * BuildCache(...):
+        A persistent record of the inputs each output was built from.
+
+
+<FUNCTIONS>
+This section only lists a brief description of each function. For more
+comprehensive documentation, see each method directly.
+
+    * get_code_version(...): Determines the version of the code in some scripts.
+
+    * list_inputs(...): Lists the input files in a directory.
+'''
+
+import os
+import json
+import hashlib
+import threading
+from scripts.utils import hash_file
+
+class BuildCache:
+    '''
+    A persistent record of the inputs each output was built from.
+
+    <EXTENDED_DESCRIPTION>
+    The cache is a JSON file mapping each output to an entry containing:
+
+        * "version": The version of the code which built the output.
+
+        * "inputs": The SHA-256 hash, size, and modification time of each input.
+
+        * "files": The files which were written for the output.
+
+    The cache is safe to read and update from multiple threads.
+
+    <ATTRIBUTES>
+        * path [String | None]:
+            The path to the cache file. If None, nothing is persisted, and every
+            output is rebuilt.
+
+        * version [String]:
+            The version of the code building the outputs (See @get_code_version(...)).
+
+        * entries [Dictionary]:
+            The entry for each output.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a BuildCache.
+
+        * hash_inputs(...): Determines the content hash of each input file.
+
+        * is_fresh(...): Determines if an output is up to date.
+
+        * update(...): Records that an output was built.
+
+        * save(): Writes the cache to its file.
+    '''
+
+    path = None
+    '''[String | None]: The path to the cache file.'''
+
+    version = None
+    '''[String]: The version of the code building the outputs.'''
+
+    entries = None
+    '''[Dictionary]: The entry for each output.'''
+
+    def __init__(self, path, version):
+        '''
+        The constructor for a BuildCache.
+
+        <ARGUMENTS>
+            * path [String | None]:
+                The path to the cache file. If None, nothing is persisted.
+
+            * version [String]:
+                The version of the code building the outputs.
+        '''
+
+        self.path = path
+        self.version = version
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as cache_file:
+                self.entries = json.load(cache_file)
+        else:
+            self.entries = {}
+
+        # The last known hash of each input, by its size and modification time
+        self._known = {}
+        for entry in self.entries.values():
+            for input_path, record in entry["inputs"].items():
+                self._known[input_path] = record
+
+    def hash_inputs(self, paths):
+        '''
+        Determines the content hash of each input file.
+
+        <ARGUMENTS>
+            * paths [[String...]]: The paths to the input files.
+
+        <RETURN>
+            * [Dictionary]:
+                The SHA-256 hash, size, and modification time of each input,
+                by its path.
+        '''
+
+        inputs = {}
+
+        for path in paths:
+            stat = os.stat(path)
+
+            with self._lock:
+                known = self._known.get(path)
+
+            if known is not None and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                inputs[path] = known
+                continue
+
+            record = {"sha256": hash_file(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            inputs[path] = record
+
+            with self._lock:
+                self._known[path] = record
+
+        return inputs
+
+    def is_fresh(self, output, inputs):
+        '''
+        Determines if an output is up to date.
+
+        <ARGUMENTS>
+            * output [String]: The name of the output.
+
+            * inputs [Dictionary]: The current inputs (See @hash_inputs(...)).
+
+        <RETURN>
+            * [Boolean]:
+                If the output was built by this version of the code, from the
+                same inputs, and all of its files still exist.
+        '''
+
+        with self._lock:
+            entry = self.entries.get(output)
+
+        if entry is None or entry["version"] != self.version:
+            return False
+
+        previous = {path: record["sha256"] for path, record in entry["inputs"].items()}
+        current = {path: record["sha256"] for path, record in inputs.items()}
+        if previous != current:
+            return False
+
+        return all(os.path.exists(file) for file in entry["files"])
+
+    def update(self, output, inputs, files):
+        '''
+        Records that an output was built.
+
+        <ARGUMENTS>
+            * output [String]: The name of the output.
+
+            * inputs [Dictionary]: The inputs it was built from (See @hash_inputs(...)).
+
+            * files [[String...]]: The files which were written for the output.
+        '''
+
+        with self._lock:
+            self.entries[output] = {
+                "version": self.version,
+                "inputs": inputs,
+                "files": list(files),
+            }
+
+    def save(self):
+        '''
+        Writes the cache to its file.
+
+        <EXTENDED_DESCRIPTION>
+        The cache is written to a temporary file first, and then renamed, so
+        that an interrupted save cannot corrupt it.
+        '''
+
+        if self.path is None:
+            return
+
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory != "":
+                os.makedirs(directory, exist_ok=True)
+
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as cache_file:
+                json.dump(self.entries, cache_file, indent=1, sort_keys=True)
+
+            os.replace(temp_path, self.path)
+
+def get_code_version(*modules):
+    '''
+    Determines the version of the code in some scripts.
+
+    <EXTENDED_DESCRIPTION>
+    The version is the hash of the scripts' source, so any change to them
+    causes every output they built to be rebuilt.
+
+    <ARGUMENTS>
+        * modules [Python Script...]: The scripts the outputs depend on.
+
+    <RETURN>
+        * [String]: The SHA-256 hash of the scripts' source.
+    '''
+
+    sha256 = hashlib.sha256()
+
+    for module in modules:
+        with open(module.__file__, "rb") as source:
+            sha256.update(source.read())
+
+    return sha256.hexdigest()
+
+def list_inputs(directory):
+    '''
+    Lists the input files in a directory.
+
+    <EXTENDED_DESCRIPTION>
+    Lock files left by spreadsheet programs (containing "#") are not inputs.
+
+    <ARGUMENTS>
+        * directory [String]: The path to the directory.
+
+    <RETURN>
+        * [[String...]]: The paths to the input files, sorted by name.
+    '''
+
+    return [directory + "/" + filename for filename in sorted(os.listdir(directory)) if "#" not in filename]
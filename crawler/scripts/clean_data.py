@@ -12,6 +12,11 @@ important steps:
         that cannot be converted will be removed. This step ensures that we can
         use the same system to process all files.
 
+        Each conversion is kept in a conversion directory, by the content hash
+        of the .xls file, so a file is only ever converted once. Alternatively,
+        .xls files may be read directly, without being converted at all (See
+        <workbook_io.XlsWorkbook>).
+
     * Clean Files:
         Once all the files are converted to an .xslx format, this step will
         remove any unecessary file formatting, and restructure the data fields
@@ -19,6 +24,18 @@ important steps:
         statistic type's years into one file. (See @clean_files(...) for more
         details).
 
+Should a build cache be provided (See <build_cache.BuildCache>), only the
+subdirectories whose files (or this script) have changed since they were last
+cleaned are cleaned again.
+
+Parsing a workbook is CPU-bound, so the files are parsed in a pool of worker
+processes, one file per task.
+
+Each sheet's attributes are renamed by a table of rules (See rename_rules.py),
+rather than by code in this script.
+
+The clean data may be written in any of the formats in <workbook_io.py>.
+
 <FUNCTIONS>
 This script can be run by calling clean_data.run(<args>). All other functions
 in this script should remain private. This section only lists a brief description
@@ -27,27 +44,36 @@ of each function. For more comprehensive documentation, see each method directly
     * run(...):
         Converts, removes, and cleans the data files.
 
+    * needs_run(...):
+        Determines if any data files need to be cleaned.
+
+    * get_build_cache(...):
+        Opens the build cache for this script.
+
+    * list_subdirectories(...):
+        Lists the subdirectories to clean.
+
     * do_conversions(...):
         Converts each file, if possible, to an .xlsx format.
 
+    * convert_xls(...):
+        Converts an .xls file to an .xlsx format, unless already converted.
+
     * remove_extra_files(...)
         Removes any files not in an .xlsx format.
 
+    * should_process(...):
+        Determines if a subdirectory has a parser written for it.
+
     * clean_files(...):
         Processes each file to follow a consistent structure.
 
-    * trim_sheet(...)
-        Removes leading rows and columns from a sheet.
+    * parse_file(...):
+        Parses a data file into SheetDicts.
 
     * parse_standard_sheet(...)
         Parses a standard data sheet.
 
-    * rename_attribute(...)
-        Renames attributes to follow a consistent and safe naming convention.
-
-    * rename_fast_fact_attribute(...):
-        Renames School/District Fast Fact attributes.
-
     * parse_district_fast_facts(...):
         Parses District Fast Fact worksheets.
 
@@ -76,15 +102,27 @@ of each function. For more comprehensive documentation, see each method directly
         Writes the SheetDicts to file.
 '''
 
-import openpyxl
 import shutil
 import os
-import re
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from xls2xlsx import XLS2XLSX
 from pathlib import Path
-from scripts.utils import Logger, detect_year, SheetDict, detect_type
+from scripts import utils, workbook_io, rename_rules, pivot_table
+from scripts.utils import Logger, detect_year, SheetDict, detect_type, hash_file
+from scripts.build_cache import BuildCache, get_code_version, list_inputs
+from scripts.workbook_io import open_workbook, read_rows, is_xls, write_workbook, DEFAULT_FILE_FORMAT
+from scripts.pivot_table import PivotTable
+
+PROCESSED_SUBDIRECTORIES = ["Fast", "AFR", "Aid", "Cohort", "Keystone", "APD"]
+'''[[String...]]: The subdirectories with parsers written for them, by part of their name.'''
 
-def run(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger):
+MAX_WORKERS = os.cpu_count() or 1
+'''[Integer]: The default number of files which may be parsed at once.'''
+
+def run(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger, cache_file=None, max_workers=MAX_WORKERS, conversion_directory=None, read_xls=False, file_format=DEFAULT_FILE_FORMAT, subdirectories=None):
     '''
     Converts, removes, and cleans the data files.
 
@@ -94,33 +132,167 @@ def run(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger):
         * CLEAN_DATA_DIRECTORY [String]: The path to the output directory.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * cache_file=None [String | None]:
+            The path to the build cache. If None, every subdirectory is cleaned.
+
+        * max_workers=MAX_WORKERS [Integer]:
+            The number of files which may be parsed at once.
+
+        * conversion_directory=None [String | None]:
+            The path to the directory to keep converted .xls files in. If None,
+            every .xls file is converted again.
+
+        * read_xls=False [Boolean]:
+            If .xls files should be read directly, rather than converted.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]:
+            The format to write the clean data in (See <workbook_io.FILE_FORMATS>).
+
+        * subdirectories=None [[String...] | None]:
+            The only subdirectories to clean. If None, every subdirectory is
+            cleaned. Each set of subdirectories should have its own build
+            cache, should they be cleaned at the same time.
     '''
 
     logger.indent()
 
-    do_conversions(ORGANIZED_DATA_DIRECTORY, logger)
-    remove_extra_files(ORGANIZED_DATA_DIRECTORY, logger)
-    clean_files(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger)
+    cache = get_build_cache(cache_file, file_format)
+
+    do_conversions(ORGANIZED_DATA_DIRECTORY, logger, conversion_directory, read_xls, subdirectories)
+    remove_extra_files(ORGANIZED_DATA_DIRECTORY, logger, read_xls, subdirectories)
+    clean_files(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger, cache, max_workers, file_format, subdirectories)
+
+    cache.save()
 
     logger.unindent()
 
-def do_conversions(ORGANIZED_DATA_DIRECTORY, logger):
+def needs_run(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, cache_file=None, file_format=DEFAULT_FILE_FORMAT, subdirectories=None, **options):
     '''
-    Removes any files not in an .xlsx format.
+    Determines if any data files need to be cleaned.
+
+    <ARGUMENTS>
+        * ORGANIZED_DATA_DIRECTORY [String]: The path to the input directory.
+
+        * CLEAN_DATA_DIRECTORY [String]: The path to the output directory.
+
+        * cache_file=None [String | None]: The path to the build cache.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]: The format the clean data is written in.
+
+        * subdirectories=None [[String...] | None]: The only subdirectories to check.
+
+        * **options: The other options of @run(...), which do not change what needs to be cleaned.
+
+    <RETURN>
+        * [Boolean]:
+            If any file still needs to be removed, or any subdirectory's clean
+            data is out of date. An .xls file which has not been converted yet
+            is a change to its subdirectory's inputs.
+    '''
+
+    cache = get_build_cache(cache_file, file_format)
+
+    for subdirectory in list_subdirectories(ORGANIZED_DATA_DIRECTORY, subdirectories):
+        inputs = list_inputs(ORGANIZED_DATA_DIRECTORY + "/" + subdirectory)
+
+        if any(".xls" not in file for file in inputs):
+            return True
+
+        if not should_process(subdirectory):
+            continue
+
+        if not cache.is_fresh(CLEAN_DATA_DIRECTORY + "/" + subdirectory, cache.hash_inputs(inputs)):
+            return True
+
+    return False
+
+def get_build_cache(cache_file, file_format=DEFAULT_FILE_FORMAT):
+    '''
+    Opens the build cache for this script.
+
+    <ARGUMENTS>
+        * cache_file [String | None]: The path to the build cache.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]: The format the clean data is written in.
+
+    <RETURN>
+        * [build_cache.BuildCache]:
+            The build cache, versioned by this script's code, and the format
+            it writes. Changing the format rebuilds every output.
+    '''
+
+    version = get_code_version(sys.modules[__name__], utils, workbook_io, rename_rules, pivot_table)
+    return BuildCache(cache_file, version + "." + file_format)
+
+def should_process(subdirectory):
+    '''
+    Determines if a subdirectory has a parser written for it.
+
+    <ARGUMENTS>
+        * subdirectory [String]: The subdirectory's name.
+
+    <RETURN>
+        * [Boolean]: If the subdirectory's files can be cleaned.
+    '''
+
+    for process_check in PROCESSED_SUBDIRECTORIES:
+        if process_check in subdirectory:
+            return True
+
+    return False
+
+def list_subdirectories(ORGANIZED_DATA_DIRECTORY, subdirectories=None):
+    '''
+    Lists the subdirectories to clean.
+
+    <ARGUMENTS>
+        * ORGANIZED_DATA_DIRECTORY [String]: The path to the input directory.
+
+        * subdirectories=None [[String...] | None]:
+            The only subdirectories to clean. If None, every subdirectory is
+            cleaned.
+
+    <RETURN>
+        * [[String...]]: The names of the subdirectories which exist, in order.
+    '''
+
+    if not os.path.exists(ORGANIZED_DATA_DIRECTORY):
+        return []
+
+    return [subdirectory for subdirectory in sorted(os.listdir(ORGANIZED_DATA_DIRECTORY)) if subdirectories is None or subdirectory in subdirectories]
+
+def do_conversions(ORGANIZED_DATA_DIRECTORY, logger, conversion_directory=None, read_xls=False, subdirectories=None):
+    '''
+    Converts each file, if possible, to an .xlsx format.
 
     <EXTENDED_DESCRIPTION>
     All modification will be done in-place.
 
+    Should .xls files be read directly, they are left in place instead. Only
+    those which xlrd cannot read (See @workbook_io.is_xls(...)) are converted.
+
     <ARGUMENTS>
         * ORGANIZED_DATA_DIRECTORY [String]: The path to the input directory.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * conversion_directory=None [String | None]:
+            The path to the directory to keep converted .xls files in. If None,
+            every .xls file is converted again.
+
+        * read_xls=False [Boolean]:
+            If .xls files should be read directly, rather than converted.
+
+        * subdirectories=None [[String...] | None]:
+            The only subdirectories to convert. If None, every subdirectory is
+            converted.
     '''
 
     logger.write("Converting files...")
     logger.indent()
 
-    for subdirectory in os.listdir(ORGANIZED_DATA_DIRECTORY):
+    for subdirectory in list_subdirectories(ORGANIZED_DATA_DIRECTORY, subdirectories):
         for filename in os.listdir(ORGANIZED_DATA_DIRECTORY + "/" + subdirectory):
             file = ORGANIZED_DATA_DIRECTORY + "/" + subdirectory + "/" + filename
             logger.write(f'Processing {file}')
@@ -135,7 +307,18 @@ def do_conversions(ORGANIZED_DATA_DIRECTORY, logger):
                 logger.write(f'xls detected!')
 
                 xlsx_file = ".".join(file.split(".")[0:-1]) + ".xlsx"
-                XLS2XLSX(file).to_xlsx(xlsx_file)
+
+                if read_xls and is_xls(file):
+                    logger.write("Reading directly")
+
+                    # An earlier conversion would otherwise be read as well
+                    if os.path.exists(xlsx_file):
+                        os.remove(xlsx_file)
+
+                    logger.unindent()
+                    continue
+
+                convert_xls(file, xlsx_file, conversion_directory, logger)
 
                 os.remove(file)
 
@@ -144,9 +327,49 @@ def do_conversions(ORGANIZED_DATA_DIRECTORY, logger):
     logger.unindent()
     logger.write("Done!")
 
-def remove_extra_files(ORGANIZED_DATA_DIRECTORY, logger):
+def convert_xls(file, xlsx_file, conversion_directory, logger):
     '''
-    Converts each file, if possible, to an .xlsx format.
+    Converts an .xls file to an .xlsx format, unless already converted.
+
+    <EXTENDED_DESCRIPTION>
+    Conversions are kept in the conversion directory, named by the content
+    hash of the .xls file, and copied from there on later runs. They are
+    written to a temporary file first, and then renamed, so that an
+    interrupted conversion is not mistaken for a finished one.
+
+    <ARGUMENTS>
+        * file [String]: The path to the .xls file.
+
+        * xlsx_file [String]: The path to write the .xlsx file to.
+
+        * conversion_directory [String | None]:
+            The path to the directory to keep converted .xls files in. If None,
+            the file is converted directly.
+
+        * logger [utils.Logger]: The current Logger instance.
+    '''
+
+    if conversion_directory is None:
+        XLS2XLSX(file).to_xlsx(xlsx_file)
+        return
+
+    converted_file = conversion_directory + "/" + hash_file(file) + ".xlsx"
+
+    if os.path.exists(converted_file):
+        logger.write("Already converted")
+    else:
+        Path(conversion_directory).mkdir(parents=True, exist_ok=True)
+
+        # Named uniquely, as the same file may be converted by two stages at once
+        temp_file = converted_file + "." + str(threading.get_ident()) + ".part"
+        XLS2XLSX(file).to_xlsx(temp_file)
+        os.replace(temp_file, converted_file)
+
+    shutil.copy2(converted_file, xlsx_file)
+
+def remove_extra_files(ORGANIZED_DATA_DIRECTORY, logger, read_xls=False, subdirectories=None):
+    '''
+    Removes any files not in an .xlsx format.
 
     <EXTENDED_DESCRIPTION>
     All modification will be done in-place.
@@ -155,18 +378,25 @@ def remove_extra_files(ORGANIZED_DATA_DIRECTORY, logger):
         * ORGANIZED_DATA_DIRECTORY [String]: The path to the input directory.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * read_xls=False [Boolean]:
+            If .xls files are read directly, in which case they are kept.
+
+        * subdirectories=None [[String...] | None]:
+            The only subdirectories to remove files from. If None, every
+            subdirectory is checked.
     '''
 
     logger.write("Removing Extra Files...")
     logger.indent()
 
-    for subdirectory in os.listdir(ORGANIZED_DATA_DIRECTORY):
+    for subdirectory in list_subdirectories(ORGANIZED_DATA_DIRECTORY, subdirectories):
         for filename in os.listdir(ORGANIZED_DATA_DIRECTORY + "/" + subdirectory):
             file = ORGANIZED_DATA_DIRECTORY + "/" + subdirectory + "/" + filename
             logger.write(f'Processing {file}')
             logger.indent()
 
-            if ".xlsx" not in file:
+            if ".xlsx" not in file and not (read_xls and file.endswith(".xls")):
                 os.remove(file)
                 logger.write("Removing file")
 
@@ -176,7 +406,7 @@ def remove_extra_files(ORGANIZED_DATA_DIRECTORY, logger):
     logger.unindent()
     logger.write("Done!")
 
-def clean_files(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger):
+def clean_files(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger, cache=None, max_workers=MAX_WORKERS, file_format=DEFAULT_FILE_FORMAT, subdirectories=None):
     '''
     Processes each file to follow a consistent structure.
 
@@ -204,133 +434,180 @@ def clean_files(ORGANIZED_DATA_DIRECTORY, CLEAN_DATA_DIRECTORY, logger):
             if the output file, "Stat1.xlsx', has the attribute "mvpi" in
             column D in year 2019, all other years for in "Stat1.xlsx' will
             have "mvpi" as the Dth column.
+
+    Subdirectories which are up to date in the build cache are skipped. The
+    files are parsed in parallel, by a pool of worker processes. Only a few
+    files (twice the number of workers) are parsed ahead of the one being
+    merged, and each subdirectory's results are released once written, so
+    at most one subdirectory's parsed data is held at once.
+
+    <ARGUMENTS>
+        * ORGANIZED_DATA_DIRECTORY [String]: The path to the input directory.
+
+        * CLEAN_DATA_DIRECTORY [String]: The path to the output directory.
+
+        * logger [utils.Logger]: The current Logger instance.
+
+        * cache=None [build_cache.BuildCache | None]:
+            The build cache. If None, every subdirectory is cleaned.
+
+        * max_workers=MAX_WORKERS [Integer]:
+            The number of files which may be parsed at once.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]:
+            The format to write the clean data in (See <workbook_io.FILE_FORMATS>).
+
+        * subdirectories=None [[String...] | None]:
+            The only subdirectories to clean. If None, every subdirectory is
+            cleaned.
     '''
 
     logger.write("Cleaning Data...")
     logger.indent()
 
-    for subdirectory in os.listdir(ORGANIZED_DATA_DIRECTORY):
-        sheet_dicts = {}
+    if cache is None:
+        cache = get_build_cache(None, file_format)
 
+    # Decide which subdirectories need cleaning before starting any work
+    plans = []
+    for subdirectory in list_subdirectories(ORGANIZED_DATA_DIRECTORY, subdirectories):
         # Don't process files without parsers written yet
-        should_process = False
-        for process_check in ["Fast", "AFR", "Aid", "Cohort", "Keystone"]:
-            if process_check in subdirectory:
-                should_process = True
-
-        if not should_process:
+        if not should_process(subdirectory):
             continue
 
-        #if "Fast" not in subdirectory and "AFR" not in subdirectory and "Aid" not in subdirectory and "APD" not in subdirectory and "Cohort" not in subdirectory:
-        #if "Keystones" not in subdirectory:
-        #    continue
+        output = CLEAN_DATA_DIRECTORY + "/" + subdirectory
+        inputs = cache.hash_inputs(list_inputs(ORGANIZED_DATA_DIRECTORY + "/" + subdirectory))
 
-        for filename in os.listdir(ORGANIZED_DATA_DIRECTORY + "/" + subdirectory):
-            if "#" in filename:
-                continue
+        plans.append([subdirectory, output, inputs, cache.is_fresh(output, inputs)])
 
-            logger.write(filename)
-            file = ORGANIZED_DATA_DIRECTORY + "/" + subdirectory + "/" + filename
-            new_file = CLEAN_DATA_DIRECTORY + "/" + filename
-
-            year = detect_year(file)
-            wb = openpyxl.open(file)
-
-            # 2023 follows a different format than the rest of the years
-            if "Fast_Facts_District" in file and year != 2023:
-                if "Fast_Facts_District" not in sheet_dicts:
-                    sheet_dicts["Fast_Facts_District"] = {}
-                sheet_dicts["Fast_Facts_District"][year] = parse_district_fast_facts(wb)
-
-            elif "Fast_Facts_School" in file and year != 2023:
-                if "Fast_Facts_School" not in sheet_dicts:
-                    sheet_dicts["Fast_Facts_School"] = {}
-                sheet_dicts["Fast_Facts_School"][year] = parse_school_fast_facts(wb)
-
-            elif "AFR_Expenditure" in file:
-                if "AFR_Expenditure" not in sheet_dicts:
-                    sheet_dicts["AFR_Expenditure"] = {}
-                    #sheet_dicts["AFR_Expenditure_Per_ADM"] = {}
-
-                afr_expenditures = parse_afr_expenditure(wb, year)
-                sheet_dicts["AFR_Expenditure"][year] = afr_expenditures[0]
-                #sheet_dicts["AFR_Expenditure_Per_ADM"][year] = afr_expenditures[1] Doesn't provide new data
-
-            elif "AFR_Revenue" in file:
-                if "AFR_Revenue" not in sheet_dicts:
-                    sheet_dicts["AFR_Revenue"] = {}
-                    sheet_dicts["AFR_Revenue_Per_ADM"] = {}
-                    sheet_dicts["AFR_Revenue_TCEM"] = {}
-
-
-                afr_revenues = parse_afr_revenue(wb, year)
-                sheet_dicts["AFR_Revenue"][year] = afr_revenues[0]
-                sheet_dicts["AFR_Revenue_Per_ADM"][year] = afr_revenues[1] #Doesn't provide new data
-                sheet_dicts["AFR_Revenue_TCEM"][year] = afr_revenues[2]
-
-            elif "Aid_Ratios" in file:
-                if "Aid_Ratios_LEA" not in sheet_dicts:
-                    sheet_dicts["Aid_Ratios_LEA"] = {}
-                    sheet_dicts["Aid_Ratios_IU"] = {}
-
-                aid_ratios = parse_aid_ratio(wb, year)
-                sheet_dicts["Aid_Ratios_LEA"][year] = aid_ratios[0]
-                sheet_dicts["Aid_Ratios_IU"][year] = aid_ratios[1]
-
-            #elif "APD" in file:
-            #    if "APD" not in sheet_dicts:
-            #        sheet_dicts["APD"] = {}
-            #   sheet_dicts["APD"][year] = parse_apd(wb)
-
-            elif "Cohort" in file:
-                if "Cohort_LEA" not in sheet_dicts:
-                    sheet_dicts["Cohort_LEA"] = {}
-                    sheet_dicts["Cohort_School"] = {}
-
-                fix = "Four" in subdirectory and year == 2012
-
-                cohorts = parse_cohort(wb, year, fix)
-                sheet_dicts["Cohort_LEA"][year] = cohorts[0]
-                sheet_dicts["Cohort_School"][year] = cohorts[1]
-            elif "Keystone_Exams_School" in file:
-                if "Keystone_Exams" not in sheet_dicts:
-                    sheet_dicts["Keystone_Exams"] = {}
-
-                sheet_dicts["Keystone_Exams"][year] = parse_keystone(wb, year)
-            else:
-                logger.write(f'No parser for: {file}')
-                wb.close()
+    # The files to parse, in the order their results are merged
+    queue = iter([(file, subdirectory) for subdirectory, output, inputs, fresh in plans if not fresh for file in inputs])
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Files are parsed ahead of the one being merged, even across
+        # subdirectories, so one large subdirectory does not hold up the
+        # others. Only a window of them is, so memory stays bounded.
+        in_flight = deque()
+
+        def submit_next():
+            for file, subdirectory in queue:
+                in_flight.append(executor.submit(parse_file, file, subdirectory))
+                return
+
+        for _ in range(2 * max_workers):
+            submit_next()
+
+        # The results are merged in order, so the log and output are the same
+        # as if the files were parsed one after another
+        for subdirectory, output, inputs, fresh in plans:
+            if fresh:
+                logger.write(f'{subdirectory} is up to date')
                 continue
-            wb.close()
-        write_dicts(sheet_dicts, subdirectory, CLEAN_DATA_DIRECTORY)
+
+            sheet_dicts = {}
+
+            for file in inputs:
+                logger.write(os.path.basename(file))
+
+                parsed = in_flight.popleft().result()
+                submit_next()
+
+                if parsed is None:
+                    logger.write(f'No parser for: {file}')
+                    continue
+
+                year, classified_sheet_dicts = parsed
+                for classification, sheet_dict in classified_sheet_dicts.items():
+                    if classification not in sheet_dicts:
+                        sheet_dicts[classification] = {}
+                    sheet_dicts[classification][year] = sheet_dict
+
+            files = write_dicts(sheet_dicts, subdirectory, CLEAN_DATA_DIRECTORY, file_format)
+            cache.update(output, inputs, files)
 
     logger.unindent()
     logger.write("Done!")
 
-def trim_sheet(sheet, rows, cols=0):
+def parse_file(file, subdirectory):
     '''
-    Removes leading rows and columns from a sheet.
+    Parses a data file into SheetDicts.
 
-    <ARGUMENTS>
-        * sheet [openpyxl Sheet]: The sheet to be trimmed.
+    <EXTENDED_DESCRIPTION>
+    See <utils.py> for a description of SheetDicts.
 
-        * rows [Integer]: The number of rows to remove.
+    This runs in a worker process (See @clean_files(...)), so it only reads the
+    file, and returns everything it parsed.
 
-        * cols=0 [Integer]: The number of columns to remove.
+    <ARGUMENTS>
+        * file [String]: The path to the data file.
+
+        * subdirectory [String]: The subdirectory containing the data file.
 
     <RETURN>
-        * [openpyxl Sheet]: The trimmed sheet
+        * [[Integer, Dictionary] | None]:
+            The year the file describes, and a dictionary of SheetDicts, where
+            the key is the type of statistic. None if there is no parser for
+            the file.
     '''
 
-    if rows != 0:
-        sheet.delete_rows(1, rows)
+    year = detect_year(file)
+    wb = open_workbook(file)
+
+    # 2023 follows a different format than the rest of the years
+    if "Fast_Facts_District" in file and year != 2023:
+        sheet_dicts = {"Fast_Facts_District": parse_district_fast_facts(wb)}
+
+    elif "Fast_Facts_School" in file and year != 2023:
+        sheet_dicts = {"Fast_Facts_School": parse_school_fast_facts(wb)}
+
+    elif "AFR_Expenditure" in file:
+        afr_expenditures = parse_afr_expenditure(wb, year)
+        sheet_dicts = {
+            "AFR_Expenditure": afr_expenditures[0],
+            #"AFR_Expenditure_Per_ADM": afr_expenditures[1], Doesn't provide new data
+        }
+
+    elif "AFR_Revenue" in file:
+        afr_revenues = parse_afr_revenue(wb, year)
+        sheet_dicts = {
+            "AFR_Revenue": afr_revenues[0],
+            "AFR_Revenue_Per_ADM": afr_revenues[1], #Doesn't provide new data
+            "AFR_Revenue_TCEM": afr_revenues[2],
+        }
+
+    elif "Aid_Ratios" in file:
+        aid_ratios = parse_aid_ratio(wb, year)
+        sheet_dicts = {
+            "Aid_Ratios_LEA": aid_ratios[0],
+            "Aid_Ratios_IU": aid_ratios[1],
+        }
+
+    elif "APD" in file:
+        sheet_dicts = {"APD": parse_apd(wb)}
+
+    elif "Cohort" in file:
+        fix = "Four" in subdirectory and year == 2012
+
+        cohorts = parse_cohort(wb, year, fix)
+        sheet_dicts = {
+            "Cohort_LEA": cohorts[0],
+            "Cohort_School": cohorts[1],
+        }
+
+    elif "Keystone_Exams_School" in file:
+        sheet_dicts = {"Keystone_Exams": parse_keystone(wb, year)}
+
+    else:
+        sheet_dicts = None
 
-    if cols != 0:
-        sheet.delete_cols(1, cols)
+    wb.close()
+
+    if sheet_dicts is None:
+        return None
 
-    return sheet
+    return [year, sheet_dicts]
 
-def parse_standard_sheet(sheet, year, rename_attr_cb, get_id_cb):
+def parse_standard_sheet(sheet, year, rename_attr_cb, get_id_cb, header_row=1, first_col=1):
     '''
     Parses a standard data sheet.
 
@@ -341,7 +618,11 @@ def parse_standard_sheet(sheet, year, rename_attr_cb, get_id_cb):
 
     A "standard" sheet is one where each Key value is only provided in the sheet
     once, and the sheet doesn't require modifications other than formatting,
-    trimming, and renaming attributes.
+    trimming, and renaming attributes. As such, the attributes are renamed
+    once, from the header, before any rows are parsed.
+
+    Any rows above the header, and columns before the first column, are
+    skipped while the sheet is read. The sheet itself is never modified.
 
     <ARGUMENTS>
         * sheet [openpyxl Sheet]:
@@ -369,160 +650,48 @@ def parse_standard_sheet(sheet, year, rename_attr_cb, get_id_cb):
             identifier.
 
             <ARGUMENTS>:
-                * [ [openpyxl Cell...] ]: The array of data values for each row.
+                * [Tuple]: The row's data values.
                 * [Integer]: The year which the Sheet describes.
 
             <RETURN>:
                 * [Any]: The row's id.
 
+        * header_row=1 [Integer]:
+            The row containing the attribute names. Rows above it are skipped.
+
+        * first_col=1 [Integer]:
+            The first column containing data. Columns before it are skipped.
+
     <RETURN>
         * [Dictionary]: A dictionary containing the entire sheet's data.
     '''
 
     parsed_sheet = {}
 
-    first = True
-    for row_idx, row in enumerate(sheet.rows):
+    rows = read_rows(sheet, header_row - 1, first_col - 1)
+    header = next(rows, ())
 
-        if first:
-            first = False
-            continue
+    # The attribute in each column is only renamed once, rather than once per
+    # row. Columns without an attribute worth keeping are left out entirely.
+    column_plan = []
+    for col_idx, name in enumerate(header):
+        attribute = rename_attr_cb(name)
+        if attribute is not None:
+            column_plan.append((col_idx, attribute))
 
+    for row in rows:
         id = detect_type(get_id_cb(row, year))
         if id is None:
             continue
 
-        parsed_sheet[id] = {}
-        for col_idx, cell in enumerate(row):
+        record = {}
+        for col_idx, attribute in column_plan:
+            record[attribute] = detect_type(row[col_idx])
 
-            attribute = rename_attr_cb(sheet.cell(row=1, column=col_idx+1).value)
-            value = detect_type(sheet.cell(row=row_idx+1, column=col_idx+1).value)
-
-            if attribute is not None:
-                parsed_sheet[id][attribute] = (value)
+        parsed_sheet[id] = record
 
     return parsed_sheet
 
-def rename_attribute(attribute):
-    '''
-    Renames attributes to follow a consistent and safe naming convention.
-
-    <ENTENDED_DESCRIPTION>
-    This function is indented to provide a common renaming functionality,
-    applicable to all parsed sheets. Each parser function should extend this
-    renaming function, to tailer each to the sheet.
-
-    The processing provided here includes removing punctuation, replacing
-    spaces with underlines, and converting all text to lowercase.
-
-    <ARGUMENTS>
-        * attribute [String | None]: The name of the attribute to be renamed.
-
-    <RETURN>
-        * [String | None]:
-            The renamed attribute, should it be one worth keeping.
-            None, otherwise.
-    '''
-
-    if attribute == None:
-        return None
-
-    new_name = attribute.lower()
-    new_name = "_".join(new_name.split())
-    new_name = new_name.replace(",", "")
-    new_name = new_name.replace("§", "")
-    new_name = new_name.replace("&", "and")
-    new_name = new_name.replace("district_name", "lea_name")
-
-    if new_name == "school_district" or new_name == "district" :
-        return "lea_name"
-    if new_name == "schl" or new_name == "school_number":
-        return "school_id"
-    if new_name == "school":
-        return "school_name"
-
-    return new_name
-
-def rename_fast_fact_attribute(attribute):
-    '''
-    Renames School/District Fast Fact attributes.
-
-    <EXTENDED_DESCRIPTION>
-    Because both School Fast Fact and District Fast Fact sheets follow a very
-    similar naming system, this function is able to rename both. Hence, instead
-    of having one copy for each parser, this was put into the outer scope.
-
-    <ARGUMENTS>
-        * attribute [String | None]: The name of the attribute to be renamed.
-
-    <RETURN>
-        * [String | None]:
-            The renamed attribute, should it be one worth keeping.
-            None, otherwise.
-    '''
-
-    new_name = rename_attribute(attribute)
-
-    new_name = new_name.replace("_-_percent_enrollment_by_student_groups", "").replace("district_", "lea_")
-    new_name = new_name.replace("_-_percent_enrollment_by_race/ethnicity", "").replace("district_", "lea")
-    new_name = new_name.replace("(", "").replace(")", "")
-
-    if "2_or_more_races" in new_name:
-        return new_name.replace("2_or_more_races", "multiracial")
-
-    if "gifted" in new_name:
-        return "gifted"
-
-    if "american_indian/alaskan_native" in new_name:
-        return "ai_an"
-
-    if "black/african_american" in new_name:
-        return "african_american"
-
-    if "english_learner" in new_name:
-        return "english_learner"
-
-    if "career_and_technical_center" in new_name:
-        return new_name.replace("career_and_technical_center", "ctc")
-
-    if "native_hawaiian_or_other_pacific_islander" in new_name:
-        return "nh_pi"
-
-    if "enrollment_in" in new_name:
-        return "ctc_enrollment"
-
-    if "charter_school" in new_name:
-        return "cs_enrollment"
-
-    if "intermediate_unit" in new_name:
-        return new_name.replace("intermediate_unit", "iu")
-
-    if "geographic_size" in new_name:
-        return "district_size"
-
-    if "female_(school)" in new_name:
-        return "female"
-
-    if "male_(school)" in new_name:
-        return "male"
-
-    if "(street)" in new_name:
-        return new_name.replace("(street)", "street")
-
-    if "(city)" in new_name:
-        return new_name.replace("(city)", "city")
-
-    if  "(state)" in new_name:
-        return new_name.replace("(state)", "state")
-
-    if "zip" in new_name:
-        return new_name.replace("zip_code", "address_zip")
-
-    if "telephone_number" in new_name:
-        return new_name.replace("telephone_number", "telephone")
-
-    return new_name
-
 def parse_district_fast_facts(wb):
     '''
     Parses District Fast Fact worksheets.
@@ -530,40 +699,28 @@ def parse_district_fast_facts(wb):
     <ENTENDED_DESCRIPTION>
     Because the District Fast Fact worksheets follow an unusual file structure
     (with what should be columns instead being rows), this function cannot rely
-    on @parse_standard_sheet(...). Instead, it implements a custom parsing
-    algorithm tailored to this unique structure.
+    on @parse_standard_sheet(...). Instead, its rows are pivoted into a
+    pivot_table.PivotTable.
 
     <ARGUMENTS>
         * wb [openpyxl Workbook]: The worksheet to be parsed.
 
     <RETURN>
-        * [utils.SheetDict]: A SheetDict containing the parsed data.
+        * [pivot_table.PivotTable]: A SheetDict containing the parsed data.
     '''
 
-    def rename_district_fast_facts_attribute(attr):
-        new_name = rename_fast_fact_attribute(attr)
-        if new_name is None:
-            return None
-        if new_name == "website":
-            return "lea_website"
-        if new_name == "telephone":
-            return "lea_telephone"
-
-        return new_name
-
-    districts = {}
-    sheet = wb.active
+    districts = PivotTable("aun", ["lea_name"])
 
     first = True
-    for row in sheet.rows:
+    for row in read_rows(wb.active, width=4):
         if first:
             first = False
             continue
 
-        district_name = row[0].value
-        aun = detect_type(row[1].value)
-        attr = rename_district_fast_facts_attribute(row[2].value)
-        value = detect_type(row[3].value)
+        district_name = row[0]
+        aun = detect_type(row[1])
+        attr = rename_rules.DISTRICT_FAST_FACT.rename(row[2])
+        value = detect_type(row[3])
 
         if attr is None:
             continue
@@ -571,11 +728,11 @@ def parse_district_fast_facts(wb):
             continue
 
         if aun not in districts:
-            districts[aun] = {"lea_name": district_name}
+            districts.add_record(aun, {"lea_name": district_name})
 
-        districts[aun][attr] = value
+        districts.set_value(aun, attr, value)
 
-    return SheetDict(districts, "aun")
+    return districts
 
 def parse_school_fast_facts(wb):
     '''
@@ -584,45 +741,30 @@ def parse_school_fast_facts(wb):
     <ENTENDED_DESCRIPTION>
     Because the School Fast Fact worksheets follow an unusual file structure
     (with what should be columns instead being rows), this function cannot rely
-    on @parse_standard_sheet(...). Instead, it implements a custom parsing
-    algorithm tailored to this unique structure.
+    on @parse_standard_sheet(...). Instead, its rows are pivoted into a
+    pivot_table.PivotTable.
 
     <ARGUMENTS>
         * wb [openpyxl Workbook]: The worksheet to be parsed.
 
     <RETURN>
-        * [utils.SheetDict]: A SheetDict containing the parsed data.
+        * [pivot_table.PivotTable]: A SheetDict containing the parsed data.
     '''
 
-    def rename_school_fast_facts_attribute(attr):
-        new_name = rename_fast_fact_attribute(attr)
-        if new_name is None:
-            return None
-        if new_name == "website":
-            return "school_website"
-        if new_name == "telephone":
-            return "school_telephone"
-        if new_name == "iu_website":
-            return None
-        if new_name == "iu_name":
-            return None
-        return new_name
-
-    schools = {}
-    sheet = wb.active
+    schools = PivotTable("school_id", ["school_name", "lea_name", "aun"])
 
     first = True
-    for row in sheet.rows:
+    for row in read_rows(wb.active, width=6):
         if first:
             first = False
             continue
 
-        lea_name = row[0].value
-        school_name = row[1].value
-        aun = detect_type(row[2].value)
-        school_id = detect_type(row[3].value)
-        attr = rename_school_fast_facts_attribute(row[4].value)
-        value = detect_type(row[5].value)
+        lea_name = row[0]
+        school_name = row[1]
+        aun = detect_type(row[2])
+        school_id = detect_type(row[3])
+        attr = rename_rules.SCHOOL_FAST_FACT.rename(row[4])
+        value = detect_type(row[5])
 
 
         if attr is None:
@@ -631,11 +773,11 @@ def parse_school_fast_facts(wb):
             continue
 
         if school_id not in schools:
-            schools[school_id] = {"school_name": school_name, "lea_name": lea_name, "aun": aun}
+            schools.add_record(school_id, {"school_name": school_name, "lea_name": lea_name, "aun": aun})
 
-        schools[school_id][attr] = value
+        schools.set_value(school_id, attr, value)
 
-    return SheetDict(schools, "school_id")
+    return schools
 
 def parse_afr_expenditure(wb, year):
     '''
@@ -654,118 +796,17 @@ def parse_afr_expenditure(wb, year):
     '''
 
     def get_exp_aun(row, year):
-        return row[1].value
+        return row[1]
 
     def get_exp_adm_aun(row, year):
         if year == 2018 or year == 2022:
-            return row[1].value
-        return row[0].value
-
-    def rename_afr_exp_attr(attribute):
-        new_name = rename_attribute(attribute)
-        if new_name is None:
-            return None
-        if "actual_instruction_expense" in new_name:
-            return None
-
-        search = re.search(r'\d{4}$', new_name)
-
-        if search is None:
-
-            if new_name == "aun":
-                return None
-            if "cuurent" in new_name:
-                return None
-            if "current" in new_name:
-                return None
-            if new_name == "ctgy":
-                return None
-            if new_name == "cat":
-                return None
-            if "actual_instruction" in new_name:
-                return None
-
-            return new_name
-
-        id = int(search.group(0))
-        match id:
-            case 1000:
-                return "instruction"
-            case 1100:
-                return "regular_programs"
-            case 1200:
-                return "gifted_programs"
-            case 1300:
-                return "vocational_programs"
-            case 1400:
-                return "other_instructional"
-            case 1500:
-                return "nonpublic_programs"
-            case 1600:
-                return "adult_programs"
-            case 1700:
-                return "secondary_programs"
-            case 1800:
-                return "pre_k"
-            case 2000:
-                return "support_services"
-            case 2100:
-                return "personnel"
-            case 2200:
-                return "staff"
-            case 2300:
-                return "administration"
-            case 2400:
-                return "health"
-            case 2500:
-                return "business"
-            case 2600:
-                return "plant_ops"
-            case 2700:
-                return "transportation"
-            case 2800:
-                return "central"
-            case 2900:
-                return "other_support"
-            case 3000:
-                return "noninstructional_services"
-            case 4000:
-                return "facai"
-            case 5000:
-                return "oefu"
-            case _:
-                print("Invalid ID!")
-                print(id)
-                print(new_name)
-                exit()
-
-    def rename_afr_exp_adm_attr(attribute):
-        new_name = rename_attribute(attribute)
-        if new_name is None:
-            return None
-        if new_name == "aun":
-            return None
-        if new_name == "ctgy":
-                return None
-        if new_name == "cat":
-            return None
-
-        if bool(re.match(r'^\d{4}\-\d{2}\_', new_name)):
-            new_name = new_name[8:]
-
-        new_name = new_name.replace("memebership", "membership")
-        new_name = new_name.replace("average_daily_membership", "adm")
+            return row[1]
+        return row[0]
 
-        if not (new_name == "adm" or new_name == "weighted_adm"):
-            return None
-
-        return new_name
-
-
-    expenditures = parse_standard_sheet(wb.worksheets[0], year, rename_afr_exp_attr, get_exp_aun)
+    expenditures = parse_standard_sheet(wb.worksheets[0], year, rename_rules.AFR_EXPENDITURE.rename, get_exp_aun)
     expenditures_dict =  SheetDict(expenditures, "aun")
 
-    expenditures_adm = parse_standard_sheet(wb.worksheets[1], year, rename_afr_exp_adm_attr, get_exp_adm_aun)
+    expenditures_adm = parse_standard_sheet(wb.worksheets[1], year, rename_rules.AFR_EXPENDITURE_ADM.rename, get_exp_adm_aun)
     expenditures_adm_dict =  SheetDict(expenditures_adm, "aun")
 
     return [expenditures_dict, expenditures_adm_dict]
@@ -790,98 +831,15 @@ def parse_afr_revenue(wb, year):
     '''
 
     def get_rbs_aun(row, year):
-        return row[1].value
+        return row[1]
 
     def get_rpa_aun(row, year):
         if year == 2019:
-            return row[1].value
-        return row[0].value
+            return row[1]
+        return row[0]
 
     def get_tcem_aun(row, year):
-        return row[0].value
-
-    def rename_rbs_attr(attr):
-        new_name = rename_attribute(attr)
-
-        if new_name is None:
-            return None
-        if "total_local" in new_name:
-            return None
-        #if "total_revenue" in new_name:
-        #    return None
-        if "%" in new_name:
-            return None
-
-        search = re.search(r'\d{4}', new_name)
-
-        if search is None:
-
-            if new_name == "aun":
-                return None
-            if "cuurent" in new_name:
-                return None
-            if "current" in new_name:
-                return None
-            if new_name == "ctgy":
-                return None
-            if new_name == "cat":
-                return None
-
-            return new_name
-
-        id = int(search.group(0))
-        match id:
-            case 6111:
-                return "local_taxes"
-            case 6500:
-                return "local_other"
-            case 7000:
-                return "state_revenue"
-            case 8000:
-                return "federal_revenue"
-            case 9000:
-                return "other_revenue"
-            case _:
-                print("Invalid ID!")
-                print(id)
-                print(new_name)
-                exit()
-
-    def rename_rpa_attr(attr):
-        new_name = rename_attribute(attr)
-
-        if new_name is None:
-            return None
-        if new_name == "aun":
-            return None
-        if new_name == "cat":
-            return None
-        if "rank" in new_name:
-            return None
-        if  "total" in new_name:
-            return None
-        if "average_daily" in new_name:
-            return "adm"
-        return new_name
-
-    def rename_tcem_attr(attr):
-        new_name = rename_attribute(attr)
-
-        if new_name is None:
-            return None
-        if new_name == "aun":
-            return None
-        if "total" in new_name:
-            return None
-        if "rank" in new_name:
-            return None
-        if "steb" in new_name:
-            return new_name[5:]
-        if "equalized" in new_name:
-            return new_name[8:]
-        if "679" in new_name:
-            return new_name[4:]
-        return new_name
+        return row[0]
 
     if year in [2013, 2017, 2018, 2022]:
         rpa_sheet = wb.worksheets[1]
@@ -890,9 +848,9 @@ def parse_afr_revenue(wb, year):
         rpa_sheet = wb.worksheets[2]
         tcem_sheet = wb.worksheets[1]
 
-    rbs = parse_standard_sheet(wb.worksheets[0], year, rename_rbs_attr, get_rbs_aun)
-    rpa = parse_standard_sheet(rpa_sheet, year, rename_rpa_attr, get_rpa_aun)
-    tcem = parse_standard_sheet(tcem_sheet, year, rename_tcem_attr, get_tcem_aun)
+    rbs = parse_standard_sheet(wb.worksheets[0], year, rename_rules.AFR_REVENUE.rename, get_rbs_aun)
+    rpa = parse_standard_sheet(rpa_sheet, year, rename_rules.AFR_REVENUE_PER_ADM.rename, get_rpa_aun)
+    tcem = parse_standard_sheet(tcem_sheet, year, rename_rules.AFR_REVENUE_TCEM.rename, get_tcem_aun)
 
     rbs_dict = SheetDict(rbs, "aun")
     rpa_dict = SheetDict(rpa, "aun")
@@ -915,87 +873,16 @@ def parse_aid_ratio(wb, year):
             A SheetDict containing the parsed Aid Ratio IU data (Sheet 2/2).
     '''
 
-    def rename_aid_ratio_attr(attr):
-
-        new_name = rename_attribute(attr)
-
-        if new_name is None:
-            return None
-
-        new_name = new_name.replace("market_value", "mv")
-        new_name = new_name.replace("personal_income", "pi")
-
-        if new_name == "h":
-            return None
-        if new_name == "aun":
-            return None
-        if new_name == "fiscal_year":
-            return None
-        if new_name == "career_and_technology_center_(and_participating_sd)":
-            return "lea_name"
-        if  "filter" in new_name:
-             return None
-        if "sort" in new_name:
-            return None
-        if "ctc_aun" in new_name:
-            return None
-        if "iu_aun" in new_name:
-            return None
-        if "cyber" in new_name:
-            return None
-        if "cs_aun" in new_name:
-            return None
-        if "july_2020" in new_name: # This case and the next only apply to 2020-2021
-            return None
-        if "percent" in new_name:
-            return None
-        if "mv_/_pi" in new_name:
-            return "mv_pi_aid_ratio"
-        if "charter_school" in new_name:
-            return "lea_name"
-
-        new_name = new_name.replace("wadm", "weighted_adm")
-
-        if "weighted_adm" in new_name:
-            if "mv" in new_name or "pi" in new_name:
-                return None
-            return "weighted_adm"
-
-        if "ratio" in new_name:
-            if "mv" in new_name:
-                return "mv_aid_ratio"
-            if "pi" in new_name:
-                return "pi_aid_ratio"
-            print("Invalid Match:")
-            print(attr)
-            exit()
-
-        if "mv" in new_name:
-            return "mv"
-        if "pi" in new_name:
-            return "pi"
-
-        return new_name
-
-    def rename_aid_ratio_iu_attr(attr):
-        new_name = rename_aid_ratio_attr(attr)
-
-        if new_name == "intermediate_unit_(and_participating_sd)":
-            return "iu_name"
-        if new_name == "lea_name":
-            return "iu_name"
-        return new_name
-
     def get_sd_id(row, year):
         if year <= 2016:
-            return row[0].value
-        return row[1].value
+            return row[0]
+        return row[1]
 
     def get_iu_id(row, year):
         if year <= 2016:
-            aun = row[0].value
+            aun = row[0]
         else:
-            aun = row[1].value
+            aun = row[1]
 
         if str(aun).endswith("000000"):
             return aun
@@ -1003,9 +890,9 @@ def parse_aid_ratio(wb, year):
 
     def get_ctc_id(row, year):
         if year <= 2016:
-            aun = row[0].value
+            aun = row[0]
         else:
-            aun = row[1].value
+            aun = row[1]
 
         if str(aun).endswith("07") or str(aun).endswith("57"):
             return aun
@@ -1014,15 +901,15 @@ def parse_aid_ratio(wb, year):
 
     def get_cs_id(row, year):
         if year < 2015:
-            return row[1].value
+            return row[1]
         if year <= 2016:
-            return row[0].value
-        return row[1].value
+            return row[0]
+        return row[1]
 
-    lea = parse_standard_sheet(wb.worksheets[0], year, rename_aid_ratio_attr, get_sd_id)
-    iu = parse_standard_sheet(wb.worksheets[1], year, rename_aid_ratio_iu_attr, get_iu_id)
-    ctc = parse_standard_sheet(wb.worksheets[2], year, rename_aid_ratio_attr, get_ctc_id)
-    cs = parse_standard_sheet(wb.worksheets[3], year, rename_aid_ratio_attr, get_cs_id)
+    lea = parse_standard_sheet(wb.worksheets[0], year, rename_rules.AID_RATIO.rename, get_sd_id)
+    iu = parse_standard_sheet(wb.worksheets[1], year, rename_rules.AID_RATIO_IU.rename, get_iu_id)
+    ctc = parse_standard_sheet(wb.worksheets[2], year, rename_rules.AID_RATIO.rename, get_ctc_id)
+    cs = parse_standard_sheet(wb.worksheets[3], year, rename_rules.AID_RATIO.rename, get_cs_id)
 
     lea_dict = SheetDict(lea | ctc | cs, "aun")
     iu_dict = SheetDict(iu, "aun")
@@ -1039,6 +926,10 @@ def parse_keystone(wb, year):
     on @parse_standard_sheet(...). Instead, it implements a custom parsing
     algorithm tailored to this unique structure.
 
+    Each record is keyed by a (school_id, group, subject) tuple, which is
+    joined with "_" when written (See @write_dicts(...)). Only grade 11 rows
+    are kept, so every other row is skipped before anything else is read.
+
     <ARGUMENTS>
         * wb [openpyxl Workbook]: The worksheet to be parsed.
 
@@ -1048,101 +939,69 @@ def parse_keystone(wb, year):
 
     def get_keystone_school_id(row, year):
         if year == 2015:
-            return row[0].value
+            return row[0]
         if year in [2017, 2018]:
-            return row[1].value
+            return row[1]
         if year in [2016, 2019, 2021, 2022]:
-            return row[2].value
-        return row[2].value
-
-    def rename_keystone_attr(attr):
-        new_name = rename_attribute(attr)
-        if new_name is None:
-            return None
-        if new_name == "year":
-            return None
-        if new_name == "growth":
-            return None
-        if "2019" in new_name:
-            return None
-        if "below" in new_name:
-            return "below_basic"
-        if "basic" in new_name:
-            return "basic"
-        if "proficient" in new_name:
-            return "proficient"
-        if "advanced" in new_name:
-            return "advanced"
-        if new_name == "all_students":
-            return "all"
-        if new_name == "economically_disadvantaged":
-            return "ed"
-        if new_name == "historically_underperforming":
-            return "hu"
-        if new_name == "student_group_name":
-            return "group"
-        if new_name == "n_scored" or new_name == "number_scored":
-            return "scored"
-        if new_name == "m" or new_name == "algebra_i" or new_name == "algebra_1":
-            return "algebra"
-        if new_name == "e":
-            return "literature"
-        if new_name == "s":
-            return "biology"
-
-        return new_name
+            return row[2]
+        return row[2]
 
     if year == 2015:
-        keystone_sheet = trim_sheet(wb.worksheets[0], 7, 0)
+        header_row = 8
     elif year == 2021:
-        keystone_sheet = trim_sheet(wb.worksheets[0], 5, 0)
+        header_row = 6
     else:
-        keystone_sheet = trim_sheet(wb.worksheets[0], 4, 0)
+        header_row = 5
+
+    # Skips the title rows above the header
+    rows = read_rows(wb.worksheets[0], header_row - 1)
+    header = next(rows)
 
     attr_idxs = {}
-    for col_idx, cell in enumerate(next(keystone_sheet.rows)):
-        attr = rename_keystone_attr(cell.value)
+    for col_idx, cell in enumerate(header):
+        attr = rename_rules.KEYSTONE.rename(cell)
         if attr is not None:
             attr_idxs[attr] = col_idx
 
     school_id_idx = attr_idxs["school_id"]
     subject_idx = attr_idxs["subject"]
     group_idx = attr_idxs["group"]
-    rating_idxs = [attr_idxs["advanced"], attr_idxs["proficient"], attr_idxs["basic"], attr_idxs["below_basic"]]
+    grade_idx = attr_idxs["grade"]
+
+    # The columns copied into each record. The key's columns and the grade
+    # are left out, as are columns without an attribute worth keeping.
+    column_plan = []
+    for col_idx, name in enumerate(header):
+        attr = rename_rules.KEYSTONE.rename(name)
+        if attr is None or attr == "grade":
+            continue
+        if col_idx in [school_id_idx, subject_idx, group_idx]:
+            continue
 
-    schools = {}
-    for row_idx, row in enumerate(keystone_sheet.rows):
-        school_id = detect_type(row[school_id_idx].value)
-        group = rename_keystone_attr(row[group_idx].value)
-        subject = rename_keystone_attr(row[subject_idx].value)
+        column_plan.append((col_idx, attr))
 
-        if row_idx == 0:
+    schools = {}
+    for row in rows:
+        if detect_type(row[grade_idx]) != 11:
             continue
+
+        school_id = detect_type(row[school_id_idx])
+        group = rename_rules.KEYSTONE.rename(row[group_idx])
+        subject = rename_rules.KEYSTONE.rename(row[subject_idx])
+
         if school_id is None or group is None or subject is None:
             print(f'Invalid enrtry. ID: {school_id}, Group: {group}, Subject: {subject}')
             continue
-        if detect_type(row[attr_idxs["grade"]].value) != 11:
-            continue
 
-        composite_key = str(school_id) + "_" + group + "_" + subject
+        key = (school_id, group, subject)
 
-        if composite_key not in schools:
-            schools[composite_key] = {}
+        if key not in schools:
+            schools[key] = {}
 
-        for col_idx, cell in enumerate(row):
-            attr = rename_keystone_attr(keystone_sheet.cell(row=1, column=col_idx+1).value)
-            value = detect_type(cell.value)
+        record = schools[key]
+        for col_idx, attr in column_plan:
+            record[attr] = detect_type(row[col_idx])
 
-            if attr is None:
-                continue
-            if attr == "grade":
-                continue
-            if col_idx in [school_id_idx, subject_idx, group_idx]:
-                continue
-
-            schools[composite_key][attr] = value
-
-    #print(schools)
     return SheetDict(schools, "school_id")
 
 def parse_apd(wb):
@@ -1152,47 +1011,42 @@ def parse_apd(wb):
     <ENTENDED_DESCRIPTION>
     Because the APD worksheets follow an unusual file structure (with what
     should be columns instead being rows), this function cannot rely on
-    @parse_standard_sheet(...). Instead, it implements a custom parsing
-    algorithm tailored to this unique structure.
+    @parse_standard_sheet(...). Instead, its rows are pivoted into a
+    pivot_table.PivotTable. The APD worksheets are by far the largest "long"
+    worksheets, which is why they were previously skipped. The whole pivoted
+    worksheet is still held in memory, only more compactly.
 
     <ARGUMENTS>
         * wb [openpyxl Workbook]: The worksheet to be parsed.
 
     <RETURN>
-        * [utils.SheetDict]: A SheetDict containing the parsed data.
+        * [pivot_table.PivotTable]: A SheetDict containing the parsed data.
     '''
 
-    def rename_apd_attr(attr):
-        new_name = rename_attribute(attr)
-        new_name = new_name.replace("_-_", "_").replace("/", "_").replace(":", "_").replace("-", "_").replace("(", "").replace(")", "")
-
-        return new_name
-
-    schools = {}
-    sheet = wb.active
+    schools = PivotTable("school_id", ["school_name", "lea_name", "aun"])
 
     first = True
-    for row in sheet.rows:
+    for row in read_rows(wb.active, width=6):
         if first:
             first = False
             continue
 
-        lea_name = row[0].value
-        school_name = row[1].value
-        aun = detect_type(row[2].value)
-        school_id = detect_type(row[3].value)
-        attr = rename_apd_attr(row[4].value)
-        value = detect_type(row[5].value)
+        lea_name = row[0]
+        school_name = row[1]
+        aun = detect_type(row[2])
+        school_id = detect_type(row[3])
+        attr = rename_rules.APD.rename(row[4])
+        value = detect_type(row[5])
 
         if attr is None:
             continue
 
         if school_id not in schools:
-            schools[school_id] = {"school_name": school_name, "lea_name": lea_name, "aun": aun}
+            schools.add_record(school_id, {"school_name": school_name, "lea_name": lea_name, "aun": aun})
 
-        schools[school_id][attr] = value
+        schools.set_value(school_id, attr, value)
 
-    return SheetDict(schools, "school_id")
+    return schools
 
 def parse_cohort(wb, year, fix = False):
     '''
@@ -1210,7 +1064,7 @@ def parse_cohort(wb, year, fix = False):
     '''
 
     def get_cohort_lea_aun(row, year):
-        aun = row[1].value
+        aun = row[1]
         if aun == "STATE":
             return None
         if aun == "'-  1  -" or aun == "-  1  -": # This only occurance I found of this was Cohort_Five_Year_2014-2015
@@ -1219,96 +1073,30 @@ def parse_cohort(wb, year, fix = False):
         return aun
 
     def get_cohort_school_id(row, year):
-        school_id = row[3].value
+        school_id = row[3]
         if school_id == "STATE":
             return None
 
         return school_id
 
     def get_cohort_lea_aun_fix(row, year):
-        aun = row[0].value
+        aun = row[0]
         if aun == "State":
             return None
 
-    def rename_cohort_attr(attr):
-        new_name = rename_attribute(attr)
-
-        if new_name == None:
-            return None
-
-        if "black" in new_name:
-            return new_name.replace("black", "african_american")
-        if "american_indian/alaskan_native" in new_name:
-            return new_name.replace("american_indian/alaskan_native", "ai_an")
-        if "american_indian/_alaskan_native" in new_name:
-            return new_name.replace("american_indian/_alaskan_native", "ai_an")
-        if "aian" in new_name:
-            return new_name.replace("aian", "ai_an")
-        if "native_hawaiian_or_pacific_islander" in new_name:
-            return new_name.replace("native_hawaiian_or_pacific_islander", "nh_pi")
-        if "multi-racial" in new_name:
-            return new_name.replace("multi-racial", "multiracial")
-        if "sp_ed_" in new_name:
-            return new_name.replace("sp_ed_", "special_ed_")
-        if "ell_" in new_name or "el_" in new_name:
-            return new_name.replace("ell_", "english_learner_").replace("el_", "english_learner_")
-        if "econ_disadv_" in new_name:
-            return new_name.replace("econ_disadv_", "economically_disadvantaged_")
-        if new_name == "grades" or new_name == "grads":
-            return "total_grads"
-        if new_name == "cohort_grad_rate" or new_name == "grad_rate" or new_name == "total_grad_rate": # unecessary because it can be calculated
-            return None
-        if new_name == "lea":
-            return "lea_name"
-        if new_name == "cohort":
-            return "total_cohort"
-        if new_name == "school_number":
-            return "school_id"
-        if new_name == "school":
-            return "school_name"
-
-        return new_name
-
-    def rename_cohort_lea_attr(attr):
-        new_name = rename_cohort_attr(attr)
-
-        if new_name == "aun":
-            return None
-
-        return new_name
-
-    def rename_cohort_lea_attr_fix(attr):
-        new_name = rename_cohort_lea_attr(attr)
-        if new_name == "lea_type":
-            return "aun"
-        if new_name == "aun":
-            return "lea_name"
-        if new_name == "lea":
-            return lea_type
-
-        return new_name
-
-    def rename_cohort_school_attr(attr):
-        new_name = rename_cohort_attr(attr)
-
-        if new_name == "school_id":
-            return None
-
-        return new_name
-
     if fix: # This is needed because Cohort_Four_Year_2012-2013 misslabled the attributes. This swaps the names/positions so that they match up again
-        cohort_lea_sheet = parse_standard_sheet(trim_sheet(wb.worksheets[2], 2, 1), year, rename_cohort_lea_attr_fix, get_cohort_lea_aun_fix)
+        cohort_lea_sheet = parse_standard_sheet(wb.worksheets[2], year, rename_rules.COHORT_LEA_FIX.rename, get_cohort_lea_aun_fix, header_row=3, first_col=2)
     else:
-        cohort_lea_sheet = parse_standard_sheet(trim_sheet(wb.worksheets[2], 2, 1), year, rename_cohort_lea_attr, get_cohort_lea_aun)
+        cohort_lea_sheet = parse_standard_sheet(wb.worksheets[2], year, rename_rules.COHORT_LEA.rename, get_cohort_lea_aun, header_row=3, first_col=2)
 
-    cohort_sch_sheet = parse_standard_sheet(trim_sheet(wb.worksheets[3], 2, 1), year, rename_cohort_school_attr, get_cohort_school_id)
+    cohort_sch_sheet = parse_standard_sheet(wb.worksheets[3], year, rename_rules.COHORT_SCHOOL.rename, get_cohort_school_id, header_row=3, first_col=2)
 
     cohort_lea_dict = SheetDict(cohort_lea_sheet, "aun")
     cohort_sch_dict = SheetDict(cohort_sch_sheet, "school_id")
 
     return [cohort_lea_dict, cohort_sch_dict]
 
-def write_dicts(classified_sheet_dicts, subdirectory, CLEAN_DATA_DIRECTORY):
+def write_dicts(classified_sheet_dicts, subdirectory, CLEAN_DATA_DIRECTORY, file_format=DEFAULT_FILE_FORMAT):
     '''
     Writes the SheetDicts to file.
 
@@ -1321,40 +1109,58 @@ def write_dicts(classified_sheet_dicts, subdirectory, CLEAN_DATA_DIRECTORY):
 
         * CLEAN_DATA_DIRECTORY [String]:
             The path to the output directory.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]:
+            The format to write the files in (See <workbook_io.FILE_FORMATS>).
+
+    <EXTENDED_DESCRIPTION>
+    The columns of every year are laid out before anything is written, so
+    that each sheet's rows can be streamed to file one at a time.
+
+    <RETURN>
+        * [[String...]]: The paths to the files written.
     '''
 
-    Path(CLEAN_DATA_DIRECTORY + "/" + subdirectory).mkdir(parents=True, exist_ok=True)
-    for classification, sheet_dicts in classified_sheet_dicts.items():
-        wb = openpyxl.Workbook()
-        wb.remove(wb.active)
+    def get_rows(sheet_dict, key_indices):
+        # Only the attributes present in this year are named in its header
+        header = [sheet_dict.identifier] + [None] * len(key_indices)
+        for record in sheet_dict.dict.values():
+            for record_key in record:
+                header[key_indices[record_key]] = record_key
 
-        next_key_index = 2
-        key_indices = {}
+        yield header
 
-        for year, sheet_dict in dict(sorted(sheet_dicts.items())).items():
-            #if not bool(sheet_dict.dict): # Doesn't write an empty dict
-            #    continue
+        for key, record in sheet_dict.dict.items():
+            # Composite keys (E.g. the Keystone Exams') are joined into one
+            if isinstance(key, tuple):
+                key = "_".join(str(part) for part in key)
 
-            sheet_name = str(year)
-            sheet = wb.create_sheet(title=sheet_name)
+            row = [key] + [None] * len(key_indices)
 
-            rowIdx = 2
+            for record_key, attribute in record.items():
+                row[key_indices[record_key]] = attribute
 
-            sheet.cell(row=1, column=1).value = sheet_dict.identifier
+            yield row
 
-            for key, record in sheet_dict.dict.items():
-                sheet.cell(row=rowIdx, column=1).value = key
+    files = []
 
-                for record_key, attribute in record.items():
+    Path(CLEAN_DATA_DIRECTORY + "/" + subdirectory).mkdir(parents=True, exist_ok=True)
+    for classification, sheet_dicts in classified_sheet_dicts.items():
+        sheet_dicts = dict(sorted(sheet_dicts.items()))
+
+        # The column of each attribute, in the order they are first found
+        key_indices = {}
+        for sheet_dict in sheet_dicts.values():
+            for record in sheet_dict.dict.values():
+                for record_key in record:
                     if record_key not in key_indices:
-                        key_indices[record_key] = next_key_index
-                        next_key_index = next_key_index + 1
+                        key_indices[record_key] = len(key_indices) + 1
 
+        sheets = [(str(year), get_rows(sheet_dict, key_indices)) for year, sheet_dict in sheet_dicts.items()]
 
-                    sheet.cell(row=1, column = key_indices[record_key]).value = record_key
+        file = CLEAN_DATA_DIRECTORY + "/" + subdirectory + "/" + classification + "." + file_format
+        write_workbook(file, sheets)
 
-                    sheet.cell(row=rowIdx, column=key_indices[record_key]).value = attribute
-                rowIdx = rowIdx + 1
+        files.append(file)
 
-        wb.save(CLEAN_DATA_DIRECTORY + "/" + subdirectory + "/" + classification + ".xlsx")
-        wb.close()
\ No newline at end of file
+    return files
\ No newline at end of file
@@ -7,6 +7,26 @@ download_urls.py
 The purpose of this script is to download the data files listed in the data
 URLs text file.
 
+The files are downloaded concurrently by a pool of worker threads, sharing
+one pooled HTTP client (See <http_client.HttpClient>). To avoid overwhelming
+the state's servers, the number of requests in flight to each host is limited
+separately by the client.
+
+Each file is streamed to disk in chunks, so the memory used does not grow with
+the size of the file. The chunks are written into a ".part" file in the
+classification directory, which is only moved into the raw data store once
+the download has completed. Interrupted downloads are resumed with range
+requests, both during the run and on the next one.
+
+The raw data store (See <raw_store.RawStore>) keeps each distinct file once,
+by its content hash, and links it into its classification directory. Files
+which share a name but not their content are kept side by side, rather than
+stopping the crawl.
+
+Should a crawl manifest be provided (See <utils.CrawlManifest>), files that
+were previously downloaded are requested conditionally, and are skipped if the
+server reports that they have not been modified.
+
 
 <FUNCTIONS>
 This script can be run by calling download_urls.run(<args>). All other functions
@@ -15,6 +35,16 @@ of each function. For more comprehensive documentation, see each method directly
 
     * run(...): Downloads the URLs listed in the data file URLs file
 
+    * download_url(...): Downloads a single data file into its classification directory
+
+    * get_part_path(...): Determines where the partial download of a URL is kept
+
+    * get_range_headers(...): Builds the headers needed to resume a partial download
+
+    * remove_part(...): Removes a partial download, should it exist
+
+    * stream_to_part(...): Streams a request's content into a ".part" file
+
     * request_url(...): Will try to request a file from a
 
     * get_filename(...): Detects a file name in a web request
@@ -25,12 +55,25 @@ of each function. For more comprehensive documentation, see each method directly
 import requests
 import re
 import os
-import random
-import time
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from scripts.utils import LogBuffer, CrawlManifest
+from scripts.http_client import HttpClient
+from scripts.raw_store import RawStore
+
+MAX_WORKERS = 8
+'''[Integer]: The default number of files downloaded at once.'''
+
+CHUNK_SIZE = 1024 * 1024
+'''[Integer]: The default number of bytes read from a download at once.'''
+
+MAX_RESUMES = 3
+'''[Integer]: The default number of times an interrupted download is resumed.'''
 
 # https://www.codementor.io/@aviaryan/downloading-files-from-urls-in-python-77q3bs0un
-def run(DATA_URLS_FILE, RAW_DATA_DIRECTORY, logger):
+def run(DATA_URLS_FILE, RAW_DATA_DIRECTORY, logger, max_workers=MAX_WORKERS, chunk_size=CHUNK_SIZE, manifest_file=None, max_resumes=MAX_RESUMES, client=None, classification=None, manifest=None, store=None):
     '''
     Downloads the URLs listed in the data file URLs file
 
@@ -39,95 +82,365 @@ def run(DATA_URLS_FILE, RAW_DATA_DIRECTORY, logger):
     It will also sort each file into a directory based on its classification.
     (See <find_pdf_urls.get_file_classification(...)>)
 
+    The downloads run concurrently, but their log output is written in the
+    same order as the data URLs text file.
+
     <ARGUMENTS>
         * DATA_URLS_FILE [String]: The path to the input data URLs text file.
 
         * RAW_DATA_DIRECTORY [String]: The path to the output directory.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * max_workers=MAX_WORKERS [Integer]:
+            The number of files downloaded at once. A value of 1 downloads the
+            files one at a time.
+
+        * chunk_size=CHUNK_SIZE [Integer]:
+            The number of bytes read from a download at once.
+
+        * manifest_file=None [String | None]:
+            The path to the crawl manifest. If None, every file is downloaded
+            unconditionally.
+
+        * max_resumes=MAX_RESUMES [Integer]:
+            The number of times an interrupted download is resumed during this
+            run.
+
+        * client=None [http_client.HttpClient | None]:
+            The shared HTTP client. If None, one is created for this run.
+
+        * classification=None [String | None]:
+            The only classification whose URLs are downloaded. If None, every
+            URL is downloaded.
+
+        * manifest=None [utils.CrawlManifest | None]:
+            The shared crawl manifest. If None, one is opened from the
+            manifest file for this run.
+
+        * store=None [raw_store.RawStore | None]:
+            The shared raw data store. If None, one is opened for this run.
     '''
 
     logger.indent()
     data_urls_file = open(DATA_URLS_FILE, "r")
 
+    entries = []
     for line in data_urls_file:
 
         split_line = line.strip().split("; ")
         file_class = split_line[0]
         url = split_line[1]
 
-        logger.write(f'Checking: {url}')
-        logger.indent()
+        if classification is None or file_class == classification:
+            entries.append((file_class, url))
 
-        request = request_url(url, logger)
+    data_urls_file.close()
 
-        if request is None:
-            continue
+    owns_client = client is None
+    if owns_client:
+        client = HttpClient()
 
-        if is_downloadable(request, logger):
-            filename = get_filename(request, logger)
-            directory = RAW_DATA_DIRECTORY + "/" + file_class + "/"
-            filepath = directory + filename
+    if manifest is None:
+        manifest = CrawlManifest(manifest_file)
 
-            Path(directory).mkdir(parents=True, exist_ok=True)
+    if store is None:
+        store = RawStore(RAW_DATA_DIRECTORY)
 
-            if os.path.exists(filepath):
-                logger.write("File already exists!")
-                exit()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(download_url, file_class, url, RAW_DATA_DIRECTORY, client, store, chunk_size, manifest, max_resumes) for file_class, url in entries]
 
-            file = open(filepath, 'wb')
-            file.write(request.content)
-            file.close()
+            for future in futures:
+                logger.flush(future.result())
+    finally:
+        manifest.save()
+        store.save()
+        client.save()
 
-        logger.unindent()
+        if owns_client:
+            client.close()
 
-    data_urls_file.close()
     logger.unindent()
 
-def request_url(url, logger):
+def download_url(file_class, url, RAW_DATA_DIRECTORY, client, store, chunk_size, manifest, max_resumes):
     '''
-    Will try to request a file from a given URL.
+    Downloads a single data file into its classification directory.
 
     <EXTENDED_DESCRIPTION>
-    Will try to reach the webpage a maximum of 5 tries. After 5 errors, it will
-    fail.
+    Intended to be run by a worker thread. Any statements are written into a
+    LogBuffer, which the caller is responsible for flushing.
+
+    Should the download be interrupted, it will be resumed from where it left
+    off, up to a maximum number of times. Any progress left afterwards is kept
+    for the next run (See @stream_to_part(...)). A partial download the server
+    refuses to resume (416) is started over, which counts as a resume. Should
+    the server refuse the whole file as well, the download is given up.
 
     <ARGUMENTS>
+        * file_class [String]: The data file's classification.
+
         * url [String]: The URL of the data file.
 
-        * logger [utils.Logger]: The current Logger instance.
+        * RAW_DATA_DIRECTORY [String]: The path to the output directory.
+
+        * client [http_client.HttpClient]: The shared HTTP client.
+
+        * store [raw_store.RawStore]: The raw data store.
+
+        * chunk_size [Integer]: The number of bytes read from the download at once.
+
+        * manifest [utils.CrawlManifest]: The record of previous downloads.
+
+        * max_resumes [Integer]: The number of times an interrupted download is resumed.
 
     <RETURN>
-        * [Request | None]:
-            The web request, if successful.
-            None, otherwise.
+        * [utils.LogBuffer]: The statements written while downloading.
     '''
 
-    attempts = 0
-    max_attempts = 5
+    log = LogBuffer()
+    log.write(f'Checking: {url}')
+    log.indent()
+
+    directory = RAW_DATA_DIRECTORY + "/" + file_class + "/"
+    partpath = get_part_path(directory, url)
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+
+    # Only ask for the file conditionally if we still have the previous copy
+    entry = manifest.get(url)
+    previous_path = None if entry is None else entry.get("path")
+    if previous_path is not None and os.path.exists(previous_path):
+        headers = manifest.conditional_headers(url)
+    else:
+        headers = {}
+
+    # Byte ranges must refer to the file itself, not a compressed encoding of it
+    headers["Accept-Encoding"] = "identity"
 
-    while True: # Will repeatedly try to reach the URL
-        try:
-            request = requests.get(url)
-        except:
-            request = None
+    resumes = 0
 
-        if request is None or not request.ok:
-            logger.write(f'Failed Request: {url}')
-            if request is not None:
-                logger.write(f'Status Code: {request.status_code}')
+    with client.slot(url):
+        while True: # Will repeatedly try to finish the download
+            range_headers = get_range_headers(partpath)
+            request = request_url(url, client, log, headers | range_headers)
 
-            if attempts < max_attempts:
-                attempts = attempts + 1
-                logger.write(f'Request Failed [{attempts}/{max_attempts}]. Attempting again in 5 seconds...')
-                time.sleep(5) # Waits incase of rate-limiting
+            if request is None:
+                return log
+
+            if request.status_code == 304:
+                log.write("Not modified")
+                request.close()
+                remove_part(partpath)
+                break
+
+            if request.status_code == 416:
+                request.close()
+                remove_part(partpath)
+
+                # Without a range, the server would answer the same again
+                if len(range_headers) == 0 or resumes >= max_resumes:
+                    log.warn(f'Could not download {url}! The server refused the request (416).')
+                    break
+
+                resumes = resumes + 1
+                log.write(f'Partial download is invalid [{resumes}/{max_resumes}]. Restarting...')
                 continue
-            else:
-                logger.warn('Max attempt count reached.')
-                logger.warn(f'Could not reach {url}!')
-                return None
+
+            if not is_downloadable(request, log):
+                request.close()
+                break
+
+            filename = get_filename(request, log)
+
+            result = stream_to_part(request, partpath, chunk_size, log)
+            request.close()
+
+            if result is None:
+                if resumes < max_resumes:
+                    resumes = resumes + 1
+                    log.write(f'Download interrupted [{resumes}/{max_resumes}]. Resuming...')
+                    continue
+
+                log.warn(f'Could not finish downloading {url}! Progress is kept for the next run.')
+                break
+
+            [content_length, sha256] = result
+
+            filepath = store.add(partpath, sha256, file_class, url, filename, log)
+            remove_part(partpath)
+
+            manifest.update(url, request, content_length=content_length, sha256=sha256, path=filepath, classification=file_class)
+            break
+
+    log.unindent()
+    return log
+
+def get_part_path(directory, url):
+    '''
+    Determines where the partial download of a URL is kept.
+
+    <EXTENDED_DESCRIPTION>
+    The name is derived from the URL, rather than the file name, so that it is
+    known before the file is requested.
+
+    <ARGUMENTS>
+        * directory [String]: The file's classification directory.
+
+        * url [String]: The URL of the data file.
+
+    <RETURN>
+        * [String]: The path to the ".part" file.
+    '''
+
+    return directory + hashlib.sha256(url.encode()).hexdigest()[0:16] + ".part"
+
+def get_range_headers(partpath):
+    '''
+    Builds the headers needed to resume a partial download.
+
+    <EXTENDED_DESCRIPTION>
+    A download is only resumed if the server provided a validator (ETag or
+    Last-Modified) for it. The validator is sent as "If-Range", so that the
+    server will send the whole file instead if it has changed since.
+
+    <ARGUMENTS>
+        * partpath [String]: The path to the ".part" file.
+
+    <RETURN>
+        * [Dictionary]:
+            The Range / If-Range headers, if the download can be resumed.
+            Empty, otherwise.
+    '''
+
+    if not os.path.exists(partpath) or not os.path.exists(partpath + ".json"):
+        return {}
+
+    offset = os.path.getsize(partpath)
+    with open(partpath + ".json", "r") as meta_file:
+        meta = json.load(meta_file)
+
+    etag = meta.get("etag")
+    if etag is not None and not etag.startswith("W/"): # Weak ETags cannot be used with If-Range
+        validator = etag
+    else:
+        validator = meta.get("last_modified")
+
+    if offset == 0 or validator is None:
+        return {}
+
+    return {"Range": f'bytes={offset}-', "If-Range": validator}
+
+def remove_part(partpath):
+    '''
+    Removes a partial download, should it exist.
+
+    <ARGUMENTS>
+        * partpath [String]: The path to the ".part" file.
+    '''
+
+    for path in [partpath, partpath + ".json"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+def stream_to_part(request, partpath, chunk_size, logger):
+    '''
+    Streams a request's content into a ".part" file.
+
+    <EXTENDED_DESCRIPTION>
+    If the server answered a range request (206), the content is appended to
+    the existing ".part" file. Otherwise, the ".part" file is started over.
+
+    The response's validators are recorded next to the ".part" file, in
+    "<partpath>.json", so that the download can be resumed should it be
+    interrupted. In that case, the ".part" file is kept.
+
+    <ARGUMENTS>
+        * request [Request]: The web request for the file, opened with stream=True.
+
+        * partpath [String]: The path to the ".part" file.
+
+        * chunk_size [Integer]: The number of bytes read at once.
+
+        * logger [utils.Logger | utils.LogBuffer]: The current Logger instance.
+
+    <RETURN>
+        * [[Integer, String] | None]:
+            The whole file's length and SHA-256 hash, if it was received.
+            None, otherwise.
+    '''
+
+    sha256 = hashlib.sha256()
+    content_length = 0
+    mode = "wb"
+
+    if request.status_code == 206 and os.path.exists(partpath):
+        content_range = re.findall(r'bytes (\d+)-', request.headers.get("content-range", ""))
+        offset = int(content_range[0]) if len(content_range) != 0 else -1
+
+        if 0 <= offset <= os.path.getsize(partpath):
+            logger.write(f'Resuming from byte {offset}')
+            mode = "r+b"
+
+            with open(partpath, "rb") as file:
+                while content_length < offset:
+                    chunk = file.read(min(chunk_size, offset - content_length))
+                    sha256.update(chunk)
+                    content_length = content_length + len(chunk)
         else:
-            return request
+            logger.write("Invalid content range. Restarting...")
+            remove_part(partpath)
+            return None
+    elif os.path.exists(partpath):
+        logger.write("Server ignored the range request. Restarting...")
+
+    with open(partpath + ".json", "w") as meta_file:
+        json.dump({"url": request.url, "etag": request.headers.get("etag"), "last_modified": request.headers.get("last-modified")}, meta_file)
+
+    try:
+        with open(partpath, mode) as file:
+            file.seek(content_length)
+            file.truncate()
+
+            for chunk in request.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+                content_length = content_length + len(chunk)
+                sha256.update(chunk)
+    except (requests.RequestException, OSError) as e:
+        logger.warn(f'Download failed: {e}')
+        return None
+
+    return [content_length, sha256.hexdigest()]
+
+def request_url(url, client, logger, headers={}):
+    '''
+    Will try to request a file from a given URL.
+
+    <EXTENDED_DESCRIPTION>
+    Failed requests are retried according to the client's retry policy (See
+    <http_client.RetryPolicy>).
+
+    The request is streamed, so only its headers have been read once this
+    returns. The caller is responsible for closing the request.
+
+    <ARGUMENTS>
+        * url [String]: The URL of the data file.
+
+        * client [http_client.HttpClient]: The shared HTTP client.
+
+        * logger [utils.Logger | utils.LogBuffer]: The current Logger instance.
+
+        * headers={} [Dictionary]: Any additional request headers.
+
+    <RETURN>
+        * [Request | None]:
+            The web request, if successful or if the requested range could
+            not be satisfied.
+            None, otherwise.
+    '''
+
+    # Range Not Satisfiable is handled by the caller
+    return client.fetch(url, logger, headers, stream=True, accept_statuses=(416,))
 
 def get_filename(request, logger):
     '''
@@ -140,7 +453,7 @@ def get_filename(request, logger):
     <ARGUMENTS>
         * request [Request]: The web request for the file
 
-        * logger [utils.Logger]: The current Logger instance.
+        * logger [utils.Logger | utils.LogBuffer]: The current Logger instance.
 
     <RETURN>
         * [String]: The request's file name
@@ -171,7 +484,7 @@ def is_downloadable(request, logger):
     <ARGUMENTS>
         * request [Request]: The web request for the file
 
-        * logger [utils.Logger]: The current Logger instance.
+        * logger [utils.Logger | utils.LogBuffer]: The current Logger instance.
 
     <RETURN>
         * [Boolean]: If the request is downloadable
@@ -7,6 +7,13 @@ find_data_urls.py
 The purpose of this script is to detect the URLs to the data files in each of
 the relevant URLs present in the project description.
 
+Should a crawl manifest be provided (See <utils.CrawlManifest>), each webpage
+is requested conditionally. If the webpage has not been modified, the links
+found on it during the previous crawl are reused.
+
+The webpages are requested and parsed by a pool of worker threads, sharing one
+pooled HTTP client (See <http_client.HttpClient>).
+
 <FUNCTIONS>
 This script can be run by calling find_data_urls.run(<args>). All other functions
 in this script should remain private. This section only lists a brief description
@@ -15,6 +22,9 @@ of each function. For more comprehensive documentation, see each method directly
     * run(...):
         Finds the URLs to each relevant data file.
 
+    * scan_page(...):
+        Requests a webpage and extracts the URLs it links to.
+
     * find_file_urls(...):
         Finds all data file URLs from a given webpage.
 
@@ -24,14 +34,24 @@ of each function. For more comprehensive documentation, see each method directly
 '''
 
 from lxml import html
-import tldextract
-import requests
-import time
-from scripts.utils import detect_year
-
-urls_checked = set()
-
-def run(PDF_URLS_FILE_PATH, DATA_URLS_FILE_PATH, logger):
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from scripts.utils import detect_year, CrawlManifest, LogBuffer, TldResolver
+from scripts.http_client import HttpClient
+
+MAX_WORKERS = 8
+'''[Integer]: The default number of webpages requested at once.'''
+
+FILE_CLASSIFICATIONS = [
+    "FRPA", "Low_Income_Private", "Low_Income_Public", "Keystones", "PSSAs",
+    "Graduates", "Dropouts", "Cohorts", "Enrollment_Private", "Enrollment_Public",
+    "Personnel", "AFR_Expenditure", "AFR_Revenue", "Aid_Ratios", "Daily_Membership",
+    "Personal_Income", "Tax_Rates", "GFB", "Funding_Basic", "Funding_Special",
+    "Secondary_CTE_Subsidy", "APD",
+]
+'''[[String...]]: Every data file classification (See @get_file_classification(...)), in the order they are checked.'''
+
+def run(PDF_URLS_FILE_PATH, DATA_URLS_FILE_PATH, logger, manifest_file=None, client=None, max_workers=MAX_WORKERS, suffix_list_file=None, manifest=None):
     '''
     Finds the URLs to each relevant data file.
 
@@ -39,98 +59,178 @@ def run(PDF_URLS_FILE_PATH, DATA_URLS_FILE_PATH, logger):
     Checks the webpages listed in the PDF URLs file. Should the page contain
     a URL to a relevant data file, it will write it to the Data URLs file.
 
+    The webpages are requested and parsed concurrently. Their links are then
+    checked in the order the webpages are listed, so the Data URLs file is the
+    same regardless of which webpage responds first.
+
     <ARGUMENTS>
         * PDF_URLS_FILE_PATH [String]: The path to the input URLs text file.
 
         * PDF_URLS_FILE [String]: The path to the output URLs text file.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * manifest_file=None [String | None]:
+            The path to the crawl manifest. If None, every webpage is requested
+            unconditionally.
+
+        * client=None [http_client.HttpClient | None]:
+            The shared HTTP client. If None, one is created for this run.
+
+        * max_workers=MAX_WORKERS [Integer]:
+            The number of webpages requested at once.
+
+        * suffix_list_file=None [String | None]:
+            The path to a local copy of the Public Suffix List. If None, the
+            snapshot bundled with tldextract is used.
+
+        * manifest=None [utils.CrawlManifest | None]:
+            The shared crawl manifest. If None, one is opened from the
+            manifest file for this run.
     '''
 
     logger.indent()
 
+    owns_client = client is None
+    if owns_client:
+        client = HttpClient()
+
+    if manifest is None:
+        manifest = CrawlManifest(manifest_file)
+
+    resolver = TldResolver(suffix_list_file)
     pdf_urls_file = open(PDF_URLS_FILE_PATH, "r")
     data_urls_file = open(DATA_URLS_FILE_PATH, "w+")
+    page_urls = [url.strip() for url in pdf_urls_file]
     file_urls = []
 
-    for url in pdf_urls_file:
-        url_clean = url.strip()
+    # Only read and written by this thread, as the links are checked in order
+    urls_checked = set()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(scan_page, page_url, client, resolver, manifest) for page_url in page_urls]
 
-        logger.write(f'Checking {url_clean}')
+        for page_url, future in zip(page_urls, futures):
+            [buffer, tld, possible_file_urls] = future.result()
 
-        logger.indent()
-        file_urls.extend(find_file_urls(url_clean, logger))
-        logger.unindent()
+            logger.write(f'Checking {page_url}')
+
+            logger.indent()
+            logger.flush(buffer)
+            file_urls.extend(find_file_urls(page_url, tld, possible_file_urls, urls_checked, logger))
+            logger.unindent()
 
     for file_url in file_urls:
         data_urls_file.write(file_url + "\n")
 
     pdf_urls_file.close()
     data_urls_file.close()
+    manifest.save()
+    client.save()
+
+    if owns_client:
+        client.close()
     logger.unindent()
 
-def find_file_urls(page_url, logger):
+def scan_page(page_url, client, resolver, manifest=None):
     '''
-    Finds all data file URLs from a given webpage.
+    Requests a webpage and extracts the URLs it links to.
 
     <EXTENDED_DESCRIPTION>
-    Will try to reach the webpage a maximum of 5 tries. After 5 errors, it will
-    fail.
+    Failed requests are retried according to the client's retry policy (See
+    <http_client.RetryPolicy>).
+
+    This is run by the worker threads, so all statements are written to a
+    LogBuffer rather than the Logger.
 
     <ARGUMENTS>
         * page_url [String]: The URL of the page to be searched through.
 
-        * logger [utils.Logger]: The current Logger instance.
+        * client [http_client.HttpClient]: The shared HTTP client.
+
+        * resolver [utils.TldResolver]: Resolves the webpage's domain name.
+
+        * manifest=None [utils.CrawlManifest | None]: The record of previous crawls.
 
     <RETURN>
-        * [[String...]]: A list of all relevant data file URLs on the webpage.
+        * [[utils.LogBuffer, String, [String...]]]:
+            The buffered log statements, the Top Level Domain of the webpage,
+            and the URLs linked to by the webpage.
     '''
 
-    attempts = 0
-    max_attempts = 5
+    log = LogBuffer()
+
+    if manifest is None:
+        manifest = CrawlManifest(None)
+
+    tld = resolver.get_fqdn(page_url)
 
-    while True: # Will repeatedly try to reach the URL
-        request = requests.get(page_url)
+    # The previous links are needed should the page not have been modified
+    entry = manifest.get(page_url)
+    if entry is not None and "links" in entry:
+        headers = manifest.conditional_headers(page_url)
+    else:
+        headers = {}
 
-        if not request.ok:
-            logger.write(f'Failed Request: {page_url}')
-            logger.write(f'Status Code: {request.status_code}')
+    with client.slot(page_url):
+        request = client.fetch(page_url, log, headers)
 
-            if attempts < max_attempts:
-                attempts = attempts + 1
-                logger.write(f'Request Failed [{attempts}/{max_attempts}]. Attempting again in 5 seconds...')
-                time.sleep(5) # Waits incase of rate-limiting
-                continue
-            else:
-                logger.warn('Max attempt count reached.')
-                logger.warn(f'Could not reach {page_url}!')
-                break
+    if request is None:
+        return [log, tld, []]
 
+    if request.status_code == 304:
+        log.write("Not modified. Using previous links")
+        possible_file_urls = entry["links"]
+    else:
         content = html.fromstring(request.content)
-        possible_file_urls = content.xpath("//a/@href")
+        possible_file_urls = [str(href) for href in content.xpath("//a/@href")]
 
-        file_urls = []
-        for possible_file_url in possible_file_urls:
-            if possible_file_url in urls_checked:
-                logger.write(f'Already checked {possible_file_url}')
-                continue
-            else:
-                logger.write(f'Checking {possible_file_url}')
-                urls_checked.add(possible_file_url)
+        sha256 = hashlib.sha256(request.content).hexdigest()
+        manifest.update(page_url, request, content_length=len(request.content), sha256=sha256, links=possible_file_urls)
+
+    return [log, tld, possible_file_urls]
+
+def find_file_urls(page_url, tld, possible_file_urls, urls_checked, logger):
+    '''
+    Finds all data file URLs from a given webpage.
+
+    <ARGUMENTS>
+        * page_url [String]: The URL of the page that was searched through.
+
+        * tld [String]: The Top Level Domain of the webpage.
 
-            tld = tldextract.extract(page_url).fqdn
+        * possible_file_urls [[String...]]: The URLs linked to by the webpage.
+
+        * urls_checked [Set]:
+            The URLs already checked during this run. Any newly checked URLs
+            are added to it.
+
+        * logger [utils.Logger]: The current Logger instance.
+
+    <RETURN>
+        * [[String...]]: A list of all relevant data file URLs on the webpage.
+    '''
+
+    protocol = "https://" if page_url.startswith("https") else "http://"
+
+    file_urls = []
+    for possible_file_url in possible_file_urls:
+        if possible_file_url in urls_checked:
+            logger.write(f'Already checked {possible_file_url}')
+            continue
+        else:
+            logger.write(f'Checking {possible_file_url}')
+            urls_checked.add(possible_file_url)
 
-            file_class = get_file_classification(possible_file_url, tld, logger)
-            if file_class is None:
-                continue
+        file_class = get_file_classification(possible_file_url, tld, logger)
+        if file_class is None:
+            continue
 
-            protocol = "https://" if page_url.startswith("https") else "http://"
-            slash = "" if possible_file_url.startswith("/") else "/"
+        slash = "" if possible_file_url.startswith("/") else "/"
 
-            file_urls.append(file_class + "; " + protocol + tld + slash + possible_file_url)
+        file_urls.append(file_class + "; " + protocol + tld + slash + possible_file_url)
 
-        return file_urls
-    return []
+    return file_urls
 
 
 def get_file_classification(possible_file_url, tld, logger):
@@ -21,9 +21,9 @@ of each function. For more comprehensive documentation, see each method directly
 '''
 
 import os
-import requests
+from scripts.http_client import HttpClient
 
-def run(PDF_FILE, PDF_URLS_FILE, logger):
+def run(PDF_FILE, PDF_URLS_FILE, logger, client=None):
     '''
     Detects URLs in the provided PDF file.
 
@@ -38,9 +38,17 @@ def run(PDF_FILE, PDF_URLS_FILE, logger):
         * PDF_URLS_FILE_PATH [String]: The path to the output text file.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * client=None [http_client.HttpClient | None]:
+            The shared HTTP client. If None, one is created for this run.
     '''
 
     logger.indent()
+
+    owns_client = client is None
+    if owns_client:
+        client = HttpClient()
+
     pdf_file = open(PDF_FILE, "rb")
 
     valid_urls = []
@@ -68,14 +76,19 @@ def run(PDF_FILE, PDF_URLS_FILE, logger):
 
     valid_urls.sort()
     for valid_url in valid_urls:
-        valid_url = update_url(valid_url, logger)
+        valid_url = update_url(valid_url, client, logger)
         pdf_urls_file.write(valid_url + "\n")
         logger.write(f'Found valid url: {valid_url}')
 
     pdf_urls_file.close()
+    client.save()
+
+    if owns_client:
+        client.close()
+
     logger.unindent()
 
-def update_url(url, logger):
+def update_url(url, client, logger):
     '''
     Updates URL to point to the updated webpage.
 
@@ -85,41 +98,29 @@ def update_url(url, logger):
     old links redirect to the new website. This function finds where the URLs
     redirect to.
 
+    Failed requests are retried according to the client's retry policy (See
+    <http_client.RetryPolicy>). Should the URL never be reached, it is kept as
+    is.
+
     <ARGUMENTS>
         * url [String]: The URL to update.
 
+        * client [http_client.HttpClient]: The shared HTTP client.
+
         * logger [utils.Logger]: The current Logger instance.
 
     <RETURN>
         * [String]: The updated URL.
     '''
 
-    attempts = 0
-    max_attempts = 5
-
-    while True: # Will repeatedly try to reach the URL
-        try:
-            request = requests.get(url)
-        except:
-            request = None
-
-        if request is None or not request.ok:
-            logger.write(f'Failed Request: {url}')
-            if request is not None:
-                logger.write(f'Status Code: {request.status_code}')
-
-            if attempts < max_attempts:
-                attempts = attempts + 1
-                logger.write(f'Request Failed [{attempts}/{max_attempts}]. Attempting again in 5 seconds...')
-                time.sleep(5) # Waits incase of rate-limiting
-                continue
-            else:
-                logger.warn('Max attempt count reached.')
-                logger.warn(f'Could not reach {url}!')
-                return url
-        else:
-            logger.write(f'Replacing "{url}" with "{request.url}"')
-            return request.url
+    with client.slot(url):
+        request = client.fetch(url, logger)
+
+    if request is None:
+        return url
+
+    logger.write(f'Replacing "{url}" with "{request.url}"')
+    return request.url
 
 
 def is_valid_url(line):
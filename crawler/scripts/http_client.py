@@ -0,0 +1,807 @@
+'''
+<FILE>
+http_client.py
+
+
+<DESCRIPTION>
+The purpose of this script is to provide a single HTTP client to be shared by
+every script that accesses the web (<find_pdf_urls.py>, <find_data_urls.py>,
+and <download_urls.py>).
+
+Nearly every request goes to one of a handful of hosts. Reusing one pooled
+session keeps the connections to these hosts alive between requests, rather
+than setting up a new TCP/TLS connection each time.
+
+The client also owns the crawler's retry policy. Failed requests are retried
+with an exponential, jittered backoff (or after the server's Retry-After, if
+given), and requests to each host are paced by a token bucket, so that the
+crawler can run as fast as each host allows without being throttled.
+
+The client can also record every successful response into a local store, and
+later replay them without any network access (See <ResponseStore>). This
+allows the whole pipeline to be rebuilt from a pinned snapshot of the state's
+websites.
+
+
+<CLASSES>
+This section only lists a brief description of each class. For more
+comprehensive documentation, see each class directly.
+
+    * RetryPolicy(...):
+        Decides whether, and how long after, a failed request is retried.
+
+    * TokenBucket(...):
+        Paces the requests sent to a single host.
+
+    * ResponseStore(...):
+        A local, content-addressed store of recorded responses, used to replay
+        a crawl without the network.
+
+    * HttpClient(...):
+        A pooled, keep-alive HTTP client shared between the crawler's scripts.
+'''
+
+import requests
+import random
+import threading
+import time
+import os
+import io
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from scripts.utils import HostLimiter
+
+POOL_CONNECTIONS = 8
+'''[Integer]: The default number of hosts to keep connection pools for.'''
+
+POOL_MAXSIZE = 8
+'''[Integer]: The default number of connections kept alive per host.'''
+
+TIMEOUT = (10, 60)
+'''[(Float, Float)]: The default connect and read timeouts, in seconds.'''
+
+HOST_LIMITS = {"futurereadypa": 2, "pa.gov": 4, "paschoolperformance": 2}
+'''[Dictionary]: The default number of concurrent requests allowed per host.'''
+
+HOST_RATES = {"futurereadypa": 2.0, "pa.gov": 5.0, "paschoolperformance": 2.0}
+'''[Dictionary]: The default number of requests per second allowed per host.'''
+
+DEFAULT_RATE = 1.0
+'''[Float]: The default number of requests per second allowed to any other host.'''
+
+CHUNK_SIZE = 1024 * 1024
+'''[Integer]: The number of bytes read at once when recording a response.'''
+
+MODES = ("live", "record", "replay")
+'''[(String...)]: The modes an HttpClient can be run in.'''
+
+CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since", "if-range", "range"}
+'''[Set]: Request headers which could prevent the full content from being recorded.'''
+
+class RetryPolicy:
+    '''
+    Decides whether, and how long after, a failed request is retried.
+
+    <EXTENDED_DESCRIPTION>
+    Connection errors and responses with a retryable status (e.g. 429, 503)
+    are retried. Any other unsuccessful status (e.g. 404) will not change by
+    asking again, so it fails immediately.
+
+    The delay before each retry grows exponentially with the attempt number,
+    and a random "full jitter" is applied so that workers which failed at the
+    same time do not retry at the same time. Should the server provide a
+    Retry-After header, it is honoured instead.
+
+    <ATTRIBUTES>
+        * max_attempts [Integer]: The number of retries before giving up.
+
+        * base_delay [Float]: The delay, in seconds, before the first retry.
+
+        * max_delay [Float]: The longest delay, in seconds, between retries.
+
+        * retry_statuses [Set]: The HTTP statuses which are retried.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a RetryPolicy.
+
+        * should_retry(...): Determines if a failed request should be retried.
+
+        * get_delay(...): Determines how long to wait before the next attempt.
+
+        * get_retry_after(...): Reads a response's Retry-After header.
+    '''
+
+    max_attempts = 5
+    '''[Integer]: The number of retries before giving up.'''
+
+    base_delay = 1.0
+    '''[Float]: The delay, in seconds, before the first retry.'''
+
+    max_delay = 60.0
+    '''[Float]: The longest delay, in seconds, between retries.'''
+
+    retry_statuses = {408, 425, 429, 500, 502, 503, 504}
+    '''[Set]: The HTTP statuses which are retried.'''
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        '''
+        The constructor for a RetryPolicy.
+
+        <ARGUMENTS>
+            * max_attempts=5 [Integer]: The number of retries before giving up.
+
+            * base_delay=1.0 [Float]: The delay, in seconds, before the first retry.
+
+            * max_delay=60.0 [Float]: The longest delay, in seconds, between retries.
+        '''
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, request, attempts):
+        '''
+        Determines if a failed request should be retried.
+
+        <ARGUMENTS>
+            * request [Request | None]: The failed response, or None on a connection error.
+
+            * attempts [Integer]: The number of retries made so far.
+
+        <RETURN>
+            * [Boolean]: If the request should be retried.
+        '''
+
+        if attempts >= self.max_attempts:
+            return False
+
+        return request is None or request.status_code in self.retry_statuses
+
+    def get_delay(self, request, attempts):
+        '''
+        Determines how long to wait before the next attempt.
+
+        <ARGUMENTS>
+            * request [Request | None]: The failed response, or None on a connection error.
+
+            * attempts [Integer]: The number of retries made so far.
+
+        <RETURN>
+            * [Float]: The delay, in seconds.
+        '''
+
+        retry_after = self.get_retry_after(request)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempts)))
+
+    def get_retry_after(self, request):
+        '''
+        Reads a response's Retry-After header.
+
+        <ARGUMENTS>
+            * request [Request | None]: The failed response.
+
+        <RETURN>
+            * [Float | None]:
+                The number of seconds the server asked us to wait, if any.
+                None, otherwise.
+        '''
+
+        if request is None:
+            return None
+
+        retry_after = request.headers.get("retry-after")
+        if retry_after is None:
+            return None
+
+        if retry_after.strip().isdigit():
+            return float(retry_after)
+
+        try: # Otherwise, it is an HTTP date
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+class TokenBucket:
+    '''
+    Paces the requests sent to a single host.
+
+    <EXTENDED_DESCRIPTION>
+    The bucket is refilled at a steady rate, up to its capacity. Each request
+    takes one token, waiting for one to become available if needed. The
+    capacity allows short bursts above the rate.
+
+    The bucket can also be paused, e.g. when the host responds with a
+    Retry-After, so that every worker backs off from that host, not only the
+    one that was told to.
+
+    <ATTRIBUTES>
+        * rate [Float]: The number of tokens added per second.
+
+        * capacity [Float]: The largest number of tokens held at once.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a TokenBucket.
+
+        * acquire(): Takes a token, waiting until one is available.
+
+        * pause(...): Stops handing out tokens for a number of seconds.
+    '''
+
+    rate = 1.0
+    '''[Float]: The number of tokens added per second.'''
+
+    capacity = 1.0
+    '''[Float]: The largest number of tokens held at once.'''
+
+    def __init__(self, rate, capacity=None):
+        '''
+        The constructor for a TokenBucket.
+
+        <ARGUMENTS>
+            * rate [Float]: The number of tokens added per second.
+
+            * capacity=None [Float | None]:
+                The largest number of tokens held at once. Defaults to one
+                second's worth of tokens (at least one).
+        '''
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        '''
+        Takes a token, waiting until one is available.
+        '''
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+
+                    if self._tokens >= 1:
+                        self._tokens = self._tokens - 1
+                        return
+
+                    wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        '''
+        Stops handing out tokens for a number of seconds.
+
+        <ARGUMENTS>
+            * seconds [Float]: How long to pause for.
+        '''
+
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class ResponseStore:
+    '''
+    A local, content-addressed store of recorded responses, used to replay a
+    crawl without the network.
+
+    <EXTENDED_DESCRIPTION>
+    Each response's content is written once to "<directory>/blobs/<ab>/<sha256>",
+    where <ab> are the first two characters of the hash, so identical content
+    fetched from different URLs is only stored once. The index
+    ("<directory>/index.json") maps each requested URL to its final URL,
+    status, headers and content hash. It is only kept in memory as responses
+    are recorded, and written by @save(), so recording stays cheap however
+    many responses there are.
+
+    Responses are replayed as regular requests Responses, so the scripts use
+    the same code paths as when crawling live. Conditional requests are
+    answered as the server would: if the request's validators match the
+    recorded ones, a 304 is returned.
+
+    <ATTRIBUTES>
+        * directory [String]: The path to the store.
+
+        * entries [Dictionary]: The index entry for each requested URL.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a ResponseStore.
+
+        * record(...): Stores a response's content and headers.
+
+        * replay(...): Builds a response from the store.
+
+        * save(): Writes the index to its file, if it has changed.
+    '''
+
+    directory = None
+    '''[String]: The path to the store.'''
+
+    entries = None
+    '''[Dictionary]: The index entry for each requested URL.'''
+
+    skipped_headers = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+    '''[Set]: Headers which describe the transfer rather than the content, and so are not recorded.'''
+
+    def __init__(self, directory):
+        '''
+        The constructor for a ResponseStore.
+
+        <ARGUMENTS>
+            * directory [String]: The path to the store. Created if needed.
+        '''
+
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._changed = False
+
+        Path(directory, "blobs").mkdir(parents=True, exist_ok=True)
+
+        index_path = os.path.join(directory, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, "r") as index_file:
+                self.entries = json.load(index_file)
+        else:
+            self.entries = {}
+
+    def record(self, url, request, chunk_size=CHUNK_SIZE):
+        '''
+        Stores a response's content and headers.
+
+        <EXTENDED_DESCRIPTION>
+        The content is streamed into a temporary file while it is hashed, and
+        then renamed to its blob path. The response is closed afterwards. The
+        index is only updated in memory (See @save()).
+
+        <ARGUMENTS>
+            * url [String]: The requested URL.
+
+            * request [Request]: The successful web request.
+
+            * chunk_size=CHUNK_SIZE [Integer]: The number of bytes read at once.
+
+        <RAISE>
+            * requests.RequestException: If the content could not be received.
+        '''
+
+        sha256 = hashlib.sha256()
+        temp_file = tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False)
+
+        try:
+            with temp_file:
+                for chunk in request.iter_content(chunk_size=chunk_size):
+                    temp_file.write(chunk)
+                    sha256.update(chunk)
+
+            blob_path = self.get_blob_path(sha256.hexdigest())
+            Path(blob_path).parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_file.name, blob_path)
+        finally:
+            request.close()
+            if os.path.exists(temp_file.name):
+                os.remove(temp_file.name)
+
+        headers = {key.lower(): value for key, value in request.headers.items() if key.lower() not in self.skipped_headers}
+
+        with self._lock:
+            self.entries[url] = {
+                "url": request.url,
+                "status": request.status_code,
+                "headers": headers,
+                "sha256": sha256.hexdigest(),
+            }
+            self._changed = True
+
+    def replay(self, url, headers={}, stream=False):
+        '''
+        Builds a response from the store.
+
+        <ARGUMENTS>
+            * url [String]: The requested URL.
+
+            * headers={} [Dictionary]: The request headers.
+
+            * stream=False [Boolean]:
+                If True, the content is read from the blob as it is consumed.
+                The caller is then responsible for closing the response.
+
+        <RETURN>
+            * [Request | None]:
+                The recorded response, if the URL was recorded. None, otherwise.
+        '''
+
+        with self._lock:
+            entry = self.entries.get(url)
+
+        if entry is None:
+            return None
+
+        request = requests.Response()
+        request.url = entry["url"]
+        request.headers = CaseInsensitiveDict(entry["headers"])
+        request.encoding = requests.utils.get_encoding_from_headers(request.headers)
+
+        etag = entry["headers"].get("etag")
+        last_modified = entry["headers"].get("last-modified")
+        headers = CaseInsensitiveDict(headers)
+
+        if (etag is not None and headers.get("if-none-match") == etag) or \
+           ("if-none-match" not in headers and last_modified is not None and headers.get("if-modified-since") == last_modified):
+            request.status_code = 304
+            request.reason = "Not Modified"
+            request.raw = io.BytesIO(b"")
+            return request
+
+        blob_path = self.get_blob_path(entry["sha256"])
+        request.status_code = entry["status"]
+        request.reason = "OK"
+        request.headers["content-length"] = str(os.path.getsize(blob_path))
+
+        if stream:
+            request.raw = open(blob_path, "rb")
+        else:
+            with open(blob_path, "rb") as blob:
+                request.raw = io.BytesIO(blob.read())
+
+        return request
+
+    def get_blob_path(self, sha256):
+        '''
+        Determines where content with a given hash is stored.
+
+        <ARGUMENTS>
+            * sha256 [String]: The SHA-256 hash of the content.
+
+        <RETURN>
+            * [String]: The path to the blob.
+        '''
+
+        return os.path.join(self.directory, "blobs", sha256[:2], sha256)
+
+    def save(self):
+        '''
+        Writes the index to its file, if it has changed.
+
+        <EXTENDED_DESCRIPTION>
+        The index is written to a temporary file first, and then renamed, so
+        that an interrupted save cannot corrupt it.
+        '''
+
+        with self._lock:
+            if not self._changed:
+                return
+
+            index_path = os.path.join(self.directory, "index.json")
+            temp_path = index_path + ".tmp"
+            with open(temp_path, "w") as index_file:
+                json.dump(self.entries, index_file, indent=1, sort_keys=True)
+
+            os.replace(temp_path, index_path)
+            self._changed = False
+
+class HttpClient:
+    '''
+    A pooled, keep-alive HTTP client shared between the crawler's scripts.
+
+    <EXTENDED_DESCRIPTION>
+    Wraps a requests Session, so that connections to each host are pooled and
+    kept alive. The pool is safe to share between worker threads. Responses
+    are requested compressed (gzip), unless a request says otherwise.
+
+    The client also limits the number of requests in flight to each host (See
+    <utils.HostLimiter>). Callers should hold a slot while requesting, e.g.
+    "with client.slot(url):".
+
+    Requests sent through @fetch(...) are retried according to the client's
+    RetryPolicy, and paced by one TokenBucket per host.
+
+    The client is run in one of the following modes:
+
+        * "live": Every request is sent to its server.
+
+        * "record": Every request is sent to its server, unconditionally. Each
+          successful response is stored in the ResponseStore, and served from
+          there.
+
+        * "replay": No request is sent. Each response is served from the
+          ResponseStore. URLs which were not recorded fail.
+
+    <ATTRIBUTES>
+        * session [requests.Session]:
+            The underlying session.
+
+        * timeout [(Float, Float)]:
+            The connect and read timeouts, in seconds.
+
+        * limiter [utils.HostLimiter]:
+            Limits the concurrent requests per host.
+
+        * retry_policy [RetryPolicy]:
+            Decides whether, and how long after, a failed request is retried.
+
+        * host_rates [Dictionary]:
+            The number of requests per second allowed per host.
+
+        * mode [String]:
+            The mode the client is run in ("live", "record", or "replay").
+
+        * store [ResponseStore | None]:
+            The store of recorded responses. None in "live" mode.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for an HttpClient.
+
+        * get(...): Sends a single GET request.
+
+        * fetch(...): Sends a GET request, retrying it should it fail.
+
+        * get_bucket(...): Returns the TokenBucket for a URL's host.
+
+        * slot(...): Reserves a request slot for a URL's host.
+
+        * save(): Writes the store's index, if responses were recorded.
+
+        * close(): Saves the store, and closes all pooled connections.
+    '''
+
+    session = None
+    '''[requests.Session]: The underlying session.'''
+
+    timeout = None
+    '''[(Float, Float)]: The connect and read timeouts, in seconds.'''
+
+    limiter = None
+    '''[utils.HostLimiter]: Limits the concurrent requests per host.'''
+
+    retry_policy = None
+    '''[RetryPolicy]: Decides whether, and how long after, a failed request is retried.'''
+
+    host_rates = None
+    '''[Dictionary]: The number of requests per second allowed per host.'''
+
+    mode = "live"
+    '''[String]: The mode the client is run in ("live", "record", or "replay").'''
+
+    store = None
+    '''[ResponseStore | None]: The store of recorded responses.'''
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, timeout=TIMEOUT, host_limits=HOST_LIMITS, host_rates=HOST_RATES, retry_policy=None, mode="live", store_directory=None):
+        '''
+        The constructor for an HttpClient.
+
+        <ARGUMENTS>
+            * pool_connections=POOL_CONNECTIONS [Integer]:
+                The number of hosts to keep connection pools for.
+
+            * pool_maxsize=POOL_MAXSIZE [Integer]:
+                The number of connections kept alive per host. This should be
+                at least the largest of the host limits.
+
+            * timeout=TIMEOUT [(Float, Float)]:
+                The connect and read timeouts, in seconds.
+
+            * host_limits=HOST_LIMITS [Dictionary]:
+                The number of concurrent requests allowed per host. Hosts not
+                listed are limited to one request at a time.
+
+            * host_rates=HOST_RATES [Dictionary]:
+                The number of requests per second allowed per host. Hosts not
+                listed are limited to DEFAULT_RATE.
+
+            * retry_policy=None [RetryPolicy | None]:
+                The retry policy. If None, the default RetryPolicy is used.
+
+            * mode="live" [String]:
+                The mode the client is run in ("live", "record", or "replay").
+
+            * store_directory=None [String | None]:
+                The path to the store of recorded responses. Required in
+                "record" and "replay" mode.
+
+        <RAISE>
+            * ValueError: If the mode is unknown, or no store is given when needed.
+        '''
+
+        if mode not in MODES:
+            raise ValueError(f'Unknown HTTP client mode "{mode}"')
+
+        if mode != "live" and store_directory is None:
+            raise ValueError(f'A store directory is required in "{mode}" mode')
+
+        self.mode = mode
+        self.store = None if mode == "live" else ResponseStore(store_directory)
+
+        self.timeout = timeout
+        self.limiter = HostLimiter(host_limits)
+        self.host_rates = host_rates
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+
+    def get(self, url, headers={}, stream=False):
+        '''
+        Sends a single GET request.
+
+        <EXTENDED_DESCRIPTION>
+        The request is neither paced nor retried. See @fetch(...).
+
+        <ARGUMENTS>
+            * url [String]: The URL to request.
+
+            * headers={} [Dictionary]: Any additional request headers.
+
+            * stream=False [Boolean]:
+                If True, only the response's headers are read. The caller is
+                then responsible for closing the response.
+
+        <RETURN>
+            * [Request]: The web request.
+
+        <RAISE>
+            * requests.RequestException: If the request could not be completed.
+        '''
+
+        return self.session.get(url, headers=headers, stream=stream, timeout=self.timeout)
+
+    def fetch(self, url, logger, headers={}, stream=False, accept_statuses=()):
+        '''
+        Sends a GET request, retrying it should it fail.
+
+        <EXTENDED_DESCRIPTION>
+        Each attempt first waits for a token from the host's TokenBucket.
+        Failed attempts are retried according to the RetryPolicy. Should the
+        server ask us to wait (Retry-After), the whole host is paused.
+
+        In "record" mode, the conditional and range headers are dropped, so
+        the full content is always recorded. In "replay" mode, the response is
+        served from the store, without pacing or retries.
+
+        <ARGUMENTS>
+            * url [String]: The URL to request.
+
+            * logger [utils.Logger | utils.LogBuffer]: The current Logger instance.
+
+            * headers={} [Dictionary]: Any additional request headers.
+
+            * stream=False [Boolean]:
+                If True, only the response's headers are read. The caller is
+                then responsible for closing the response.
+
+            * accept_statuses=() [(Integer...)]:
+                Unsuccessful statuses which should be returned to the caller
+                rather than treated as failures (e.g. 416).
+
+        <RETURN>
+            * [Request | None]:
+                The web request, if successful (or if its status is accepted).
+                None, otherwise.
+        '''
+
+        if self.mode == "replay":
+            request = self.store.replay(url, headers, stream)
+            if request is None:
+                logger.warn(f'{url} was not recorded!')
+            return request
+
+        if self.mode == "record":
+            recorded_headers = headers
+            headers = {key: value for key, value in headers.items() if key.lower() not in CONDITIONAL_HEADERS}
+
+        attempts = 0
+        bucket = self.get_bucket(url)
+
+        while True: # Will repeatedly try to reach the URL
+            bucket.acquire()
+
+            try:
+                request = self.get(url, headers, stream)
+            except requests.RequestException:
+                request = None
+
+            if request is not None and request.ok and self.mode == "record":
+                try:
+                    self.store.record(url, request)
+                    return self.store.replay(url, recorded_headers, stream)
+                except requests.RequestException:
+                    request = None
+
+            if request is not None and (request.ok or request.status_code in accept_statuses):
+                return request
+
+            logger.write(f'Failed Request: {url}')
+            if request is not None:
+                logger.write(f'Status Code: {request.status_code}')
+                request.close()
+
+            if not self.retry_policy.should_retry(request, attempts):
+                logger.warn('Max attempt count reached.' if attempts >= self.retry_policy.max_attempts else 'Request cannot be retried.')
+                logger.warn(f'Could not reach {url}!')
+                return None
+
+            delay = self.retry_policy.get_delay(request, attempts)
+            if self.retry_policy.get_retry_after(request) is not None:
+                bucket.pause(delay)
+
+            attempts = attempts + 1
+            logger.write(f'Request Failed [{attempts}/{self.retry_policy.max_attempts}]. Attempting again in {delay:.1f} seconds...')
+            time.sleep(delay)
+
+    def get_bucket(self, url):
+        '''
+        Returns the TokenBucket for a URL's host.
+
+        <EXTENDED_DESCRIPTION>
+        Hosts are grouped the same way as for the concurrency limits (See
+        @utils.HostLimiter.get_host_key(...)).
+
+        <ARGUMENTS>
+            * url [String]: The URL being requested.
+
+        <RETURN>
+            * [TokenBucket]: The host's bucket.
+        '''
+
+        key = self.limiter.get_host_key(url)
+
+        with self._buckets_lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.host_rates.get(key, DEFAULT_RATE))
+
+            return self._buckets[key]
+
+    def slot(self, url):
+        '''
+        Reserves a request slot for a URL's host.
+
+        <EXTENDED_DESCRIPTION>
+        See @utils.HostLimiter.slot(...).
+
+        <ARGUMENTS>
+            * url [String]: The URL being requested.
+
+        <RETURN>
+            * [threading.Semaphore]: The host's semaphore.
+        '''
+
+        return self.limiter.slot(url)
+
+    def save(self):
+        '''
+        Writes the store's index, if responses were recorded.
+
+        <EXTENDED_DESCRIPTION>
+        Each script which uses the client saves it when it finishes, so that
+        a crawl interrupted in a later script keeps what was recorded.
+        '''
+
+        if self.store is not None:
+            self.store.save()
+
+    def close(self):
+        '''
+        Saves the store, and closes all pooled connections.
+        '''
+
+        self.save()
+        self.session.close()
@@ -7,6 +7,9 @@ insert_data.py
 The purpose of this script is to insert the normalized data into an automatically
 generated SQLite3 database file.
 
+The normalized data may be in any of the formats in <workbook_io.py>. Each
+file's table is named by the file's name, without its extension.
+
 <CLASSES>
 This section only lists a brief description of each class. For more
 comprehensive documentation, see each class directly.
@@ -28,7 +31,7 @@ of each function. For more comprehensive documentation, see each method directly
 
 import sqlite3
 import os
-import openpyxl
+from scripts.workbook_io import open_workbook, read_sheet
 
 class Attribute:
     '''
@@ -140,17 +143,18 @@ def insert_file(dir, filename, con, logger):
         * logger [utils.Logger]: The current Logger instance.
     '''
 
-    table_name = filename.replace("_", "").replace(".xlsx", "")
+    table_name = os.path.splitext(filename)[0].replace("_", "")
     cur = con.cursor()
 
-    wb = openpyxl.open(dir + "/" + filename)
-    sheet = wb.active
+    wb = open_workbook(dir + "/" + filename)
+    rows = read_sheet(wb.active)
+    wb.close()
 
-    if len(list(sheet.rows)) < 2:
+    if len(rows) < 2:
         return
 
     # Splits columns up into name / data type
-    raw_attrs = tuple(cell.value.split(" ") for cell in list(sheet.rows)[0])
+    raw_attrs = tuple(cell.split(" ") for cell in rows[0])
     attrs = []
     pks = []
 
@@ -201,11 +205,11 @@ def insert_file(dir, filename, con, logger):
 
     # Automatically builds the query to add data to the table
     data = []
-    for rowIdx, row in enumerate(sheet.rows):
+    for rowIdx, row in enumerate(rows):
         if(rowIdx == 0):
             continue
 
-        data_tuple = tuple(cell.value for cell in row)
+        data_tuple = row
 
         if "Keystone" in filename:
             key = data_tuple[0]
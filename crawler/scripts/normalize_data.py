@@ -29,6 +29,19 @@ of each function. For more comprehensive documentation, see each method directly
     * run(...):
         Normalizes the output from <clean_data.py>.
 
+    * needs_run(...):
+        Determines if any clean data needs to be normalized.
+
+    * get_build_cache(...):
+        Opens the build cache for this script.
+
+    * should_normalize(...):
+        Determines if a subdirectory has normalized tables.
+
+    * get_found_dicts_path(...):
+        Determines where the schools, LEAs, and IUs found in a
+        subdirectory are kept.
+
     * can_safely_replace(...):
         Detects if a value can safely be clobbered by another.
 
@@ -38,9 +51,18 @@ of each function. For more comprehensive documentation, see each method directly
     * add_to_composite_dict(...):
         Adds a key/value pair to a composite dictionary.
 
+    * add_column_to_sheet_dict(...):
+        Adds a column of values to a SheetDict.
+
+    * add_column_to_composite_dict(...):
+        Adds a column of values to a composite dictionary.
+
     * merge_composite_dicts(...):
         Combines two composite dictionaries into one.
 
+    * merge_sheet_dicts(...):
+        Combines two SheetDicts into one.
+
     * parse_standard_wb(...):
         Parses standard workbook to write the data into
         corresponding SheetDict/composite dictionaries.
@@ -60,19 +82,27 @@ of each function. For more comprehensive documentation, see each method directly
         Writes a SheetDict into file.
 '''
 
-import openpyxl
 import shutil
 import os
 import re
+import sys
+import pickle
+from pathlib import Path
 from xls2xlsx import XLS2XLSX
-from scripts.utils import Logger, detect_year, detect_type, detect_db_type, SheetDict
+from scripts import utils, workbook_io
+from scripts.utils import Logger, detect_year, detect_type, detect_types, detect_db_type, SheetDict
+from scripts.build_cache import BuildCache, get_code_version, list_inputs
+from scripts.workbook_io import open_workbook, read_sheet, write_workbook, DEFAULT_FILE_FORMAT
 
 
+SKIPPED_SUBDIRECTORIES = ["APD"]
+'''[[String...]]: The clean subdirectories which have no normalized tables yet, by part of their name.'''
+
 schools = SheetDict({}, "school_id")
 leas = SheetDict({}, "aun")
 ius = SheetDict({}, "aun")
 
-def run(CLEAN_DATA_DIRECTORY, NORMALIZED_DATA_DIRECTORY, logger):
+def run(CLEAN_DATA_DIRECTORY, NORMALIZED_DATA_DIRECTORY, logger, cache_file=None, file_format=DEFAULT_FILE_FORMAT):
     '''
      Normalizes the output from <clean_data.py>.
 
@@ -81,22 +111,59 @@ def run(CLEAN_DATA_DIRECTORY, NORMALIZED_DATA_DIRECTORY, logger):
     script will read in the files from the clean data directory, and write
     the results of this script to the normalized data directory.
 
+    Should a build cache be provided (See <build_cache.BuildCache>), only the
+    subdirectories whose files (or this script) have changed since they were
+    last normalized are normalized again. The schools, LEAs, and IUs found in
+    each subdirectory are kept next to the cache, so that those of unchanged
+    subdirectories can still be written.
+
     <ARGUMENTS>
         * CLEAN_DATA_DIRECTORY [String]: The path to the input directory.
 
         * NORMALIZED_DATA_DIRECTORY [String]: The path to the output directory.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * cache_file=None [String | None]:
+            The path to the build cache. If None, every subdirectory is
+            normalized.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]:
+            The format to write the normalized data in (See
+            <workbook_io.FILE_FORMATS>). The clean data may be in any format.
     '''
 
+    global schools, leas, ius
+
     logger.indent()
 
-    for subdirectory in os.listdir(CLEAN_DATA_DIRECTORY):
+    cache = get_build_cache(cache_file, file_format)
+    found_dicts = []
+
+    for subdirectory in sorted(os.listdir(CLEAN_DATA_DIRECTORY)):
+        if not should_normalize(subdirectory):
+            logger.write(f'Skipping {subdirectory}, which has no normalized tables')
+            continue
+
+        new_file = NORMALIZED_DATA_DIRECTORY + "/" + subdirectory + "." + file_format
+        found_file = get_found_dicts_path(cache_file, subdirectory)
+        inputs = cache.hash_inputs(list_inputs(CLEAN_DATA_DIRECTORY + "/" + subdirectory))
+
+        if cache.is_fresh(new_file, inputs):
+            logger.write(f'{subdirectory} is up to date')
+            with open(found_file, "rb") as file:
+                found_dicts.append(pickle.load(file))
+            continue
+
+        # Collects the schools, LEAs, and IUs found in this subdirectory only
+        schools = SheetDict({}, "school_id")
+        leas = SheetDict({}, "aun")
+        ius = SheetDict({}, "aun")
+
         data_dict = SheetDict({}, "")
         col_types_dict = {}
 
-        new_file = NORMALIZED_DATA_DIRECTORY + "/" + subdirectory + ".xlsx"
-        for filename in os.listdir(CLEAN_DATA_DIRECTORY + "/" + subdirectory):
+        for filename in sorted(os.listdir(CLEAN_DATA_DIRECTORY + "/" + subdirectory)):
             if "#" in filename:
                 continue
 
@@ -105,14 +172,12 @@ def run(CLEAN_DATA_DIRECTORY, NORMALIZED_DATA_DIRECTORY, logger):
             #    continue
             #if "Keystone" not in filename:
             #    continue
-            if "APD" in filename:
-                continue
 
             file = CLEAN_DATA_DIRECTORY + "/" + subdirectory + "/" + filename
 
             #print(f'File: {file}')
 
-            wb = openpyxl.open(file)
+            wb = open_workbook(file)
 
             if "Fast_Facts_School" in filename:
                 [dict, col_types] = parse_ffs_wb(wb, logger)
@@ -133,13 +198,123 @@ def run(CLEAN_DATA_DIRECTORY, NORMALIZED_DATA_DIRECTORY, logger):
         #print(f'Data dict at end: {data_dict}')
         write_composite_dict(data_dict, col_types_dict, new_file)
 
+        files = [new_file]
+        if found_file is not None:
+            Path(found_file).parent.mkdir(parents=True, exist_ok=True)
+            with open(found_file, "wb") as file:
+                pickle.dump((schools, leas, ius), file)
+            files.append(found_file)
 
-    write_sheet_dict(schools, NORMALIZED_DATA_DIRECTORY + "/Schools.xlsx")
-    write_sheet_dict(leas, NORMALIZED_DATA_DIRECTORY + "/LEAs.xlsx")
-    write_sheet_dict(ius, NORMALIZED_DATA_DIRECTORY + "/IUs.xlsx")
+        cache.update(new_file, inputs, files)
+        found_dicts.append((schools, leas, ius))
+
+    # Combines each subdirectory's findings, in the same order they were found
+    schools = SheetDict({}, "school_id")
+    leas = SheetDict({}, "aun")
+    ius = SheetDict({}, "aun")
+
+    for found_schools, found_leas, found_ius in found_dicts:
+        merge_sheet_dicts(logger, schools, found_schools)
+        merge_sheet_dicts(logger, leas, found_leas)
+        merge_sheet_dicts(logger, ius, found_ius)
+
+    write_sheet_dict(schools, NORMALIZED_DATA_DIRECTORY + "/Schools." + file_format)
+    write_sheet_dict(leas, NORMALIZED_DATA_DIRECTORY + "/LEAs." + file_format)
+    write_sheet_dict(ius, NORMALIZED_DATA_DIRECTORY + "/IUs." + file_format)
+
+    cache.save()
 
     logger.unindent()
 
+def needs_run(CLEAN_DATA_DIRECTORY, NORMALIZED_DATA_DIRECTORY, cache_file=None, file_format=DEFAULT_FILE_FORMAT):
+    '''
+    Determines if any clean data needs to be normalized.
+
+    <ARGUMENTS>
+        * CLEAN_DATA_DIRECTORY [String]: The path to the input directory.
+
+        * NORMALIZED_DATA_DIRECTORY [String]: The path to the output directory.
+
+        * cache_file=None [String | None]: The path to the build cache.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]: The format the normalized data is written in.
+
+    <RETURN>
+        * [Boolean]: If any subdirectory's normalized data is out of date.
+    '''
+
+    cache = get_build_cache(cache_file, file_format)
+
+    for name in ["Schools", "LEAs", "IUs"]:
+        if not os.path.exists(NORMALIZED_DATA_DIRECTORY + "/" + name + "." + file_format):
+            return True
+
+    for subdirectory in os.listdir(CLEAN_DATA_DIRECTORY):
+        if not should_normalize(subdirectory):
+            continue
+
+        inputs = cache.hash_inputs(list_inputs(CLEAN_DATA_DIRECTORY + "/" + subdirectory))
+
+        if not cache.is_fresh(NORMALIZED_DATA_DIRECTORY + "/" + subdirectory + "." + file_format, inputs):
+            return True
+
+    return False
+
+def get_build_cache(cache_file, file_format=DEFAULT_FILE_FORMAT):
+    '''
+    Opens the build cache for this script.
+
+    <ARGUMENTS>
+        * cache_file [String | None]: The path to the build cache.
+
+        * file_format=DEFAULT_FILE_FORMAT [String]: The format the normalized data is written in.
+
+    <RETURN>
+        * [build_cache.BuildCache]:
+            The build cache, versioned by this script's code, and the format
+            it writes. Changing the format rebuilds every output.
+    '''
+
+    version = get_code_version(sys.modules[__name__], utils, workbook_io)
+    return BuildCache(cache_file, version + "." + file_format)
+
+def should_normalize(subdirectory):
+    '''
+    Determines if a subdirectory has normalized tables.
+
+    <ARGUMENTS>
+        * subdirectory [String]: The subdirectory's name.
+
+    <RETURN>
+        * [Boolean]: If the subdirectory's files can be normalized.
+    '''
+
+    for skip_check in SKIPPED_SUBDIRECTORIES:
+        if skip_check in subdirectory:
+            return False
+
+    return True
+
+def get_found_dicts_path(cache_file, subdirectory):
+    '''
+    Determines where the schools, LEAs, and IUs found in a subdirectory are kept.
+
+    <ARGUMENTS>
+        * cache_file [String | None]: The path to the build cache.
+
+        * subdirectory [String]: The subdirectory's name.
+
+    <RETURN>
+        * [String | None]:
+            The path to the file, next to the build cache. None, if there is
+            no build cache.
+    '''
+
+    if cache_file is None:
+        return None
+
+    return os.path.splitext(cache_file)[0] + "/" + subdirectory + ".pickle"
+
 #logger = Logger("crawler-logs.txt")
 #logger.write("Staring Script...")
 #run("./data-organized", "./data-clean", logger)
@@ -280,6 +455,94 @@ def add_to_composite_dict(logger, composite_dict, id, year, attribute, value):
 
     composite_dict[year][id][attribute] = value
 
+def add_column_to_sheet_dict(logger, sheet_dict, ids, attribute, values):
+    '''
+    Adds a column of values to a SheetDict.
+
+    <EXTENDED_DESCRIPTION>
+    Equivalent to calling @add_to_sheet_dict(...) for each id and value, in
+    order, but without the overhead of doing so.
+
+    <ARGUMENTS>
+        * logger [utils.Logger]:
+            The current Logger instance.
+
+        * sheet_dict [utils.SheetDict]:
+            The SheetDict in which the values should be written to.
+
+        * ids [[Integer...]]:
+            The record each value should be written to. Values whose id is
+            None are skipped.
+
+        * attribute [String]:
+            The name of the attribute being written to in each record.
+
+        * values [[Any...]]:
+            The values being written into the records.
+    '''
+
+    dict = sheet_dict.dict
+    for id, value in zip(ids, values):
+        if id is None or value is None:
+            continue
+
+        record = dict.get(id)
+        if record is None:
+            record = dict[id] = {}
+        elif attribute in record:
+            old_val = record[attribute]
+            if not can_safely_replace(old_val, value):
+                logger.write(f'Clobbering {attribute} in dict[{id}]. Replacing {old_val} with {value}');
+
+        record[attribute] = value
+
+def add_column_to_composite_dict(logger, composite_dict, ids, year, attribute, values):
+    '''
+    Adds a column of values to a composite dictionary.
+
+    <EXTENDED_DESCRIPTION>
+    Equivalent to calling @add_to_composite_dict(...) for each id and value,
+    in order, but without the overhead of doing so.
+
+    <ARGUMENTS>
+        * logger [utils.Logger]:
+            The current Logger instance.
+
+        * composite_dict [Dictionary]:
+            The composite dictionary in which the values should be written to.
+
+        * ids [[Integer...]]:
+            The record each value should be written to. Values whose id is
+            None are skipped.
+
+        * year [Integer]:
+            The year in which the data was recorded.
+
+        * attribute [String]:
+            The name of the attribute being written to in each record.
+
+        * values [[Any...]]:
+            The values being written into the records.
+    '''
+
+    year_dict = composite_dict.get(year)
+    for id, value in zip(ids, values):
+        if id is None or value is None:
+            continue
+
+        if year_dict is None:
+            year_dict = composite_dict[year] = {}
+
+        record = year_dict.get(id)
+        if record is None:
+            record = year_dict[id] = {}
+        elif attribute in record:
+            old_val = record[attribute]
+            if not can_safely_replace(old_val, value):
+                logger.write(f'Clobbering {attribute} in composite_dict[{year}][{id}]. Replacing {old_val} with {value}');
+
+        record[attribute] = value
+
 def merge_composite_dicts(logger, dest, source):
     '''
     Merges two composite dictionaries.
@@ -324,6 +587,31 @@ def merge_composite_dicts(logger, dest, source):
 
     dest.identifier = source.identifier
 
+def merge_sheet_dicts(logger, dest, source):
+    '''
+    Merges two SheetDicts.
+
+    <EXTENDED_DESCRIPTION>
+    See <utils.py> for a description of SheetDicts.
+
+    Each value in the source is added to the destination, as if by
+    @add_to_sheet_dict(...), so later values replace earlier ones.
+
+    <ARGUMENTS>
+        * logger [utils.Logger]:
+            The current Logger instance.
+
+        * dest [utils.SheetDict]:
+            The SheetDict which is being written to.
+
+        * source [utils.SheetDict]:
+            The SheetDict which is being read from.
+    '''
+
+    for id, record in source.dict.items():
+        for attribute, value in record.items():
+            add_to_sheet_dict(logger, dest, id, attribute, value)
+
 def parse_standard_wb(wb, logger):
     '''
     Parses standard workbook to write the data into corresponding SheetDict/
@@ -336,8 +624,13 @@ def parse_standard_wb(wb, logger):
     Parses a standard workbook. A "standard" workbook assumes that the
     data describes a LEA, and the AUN is present in the first column.
 
+    Each row's AUN is read once, and each attribute is assigned to the LEAs,
+    IUs or composite dictionary once, so that its column can be added in one
+    go. The columns are still added in order, so that the records (and any
+    clobbering) are in the same order as if each cell were added one by one.
+
     <ARGUMENTS>
-        * wb [openpyxl.Workbook]: The workbook to be parsed.
+        * wb [openpyxl.Workbook]: The read-only workbook to be parsed (See <workbook_io.py>).
 
         * logger [util.Logger]: The current Logger instance.
 
@@ -355,11 +648,30 @@ def parse_standard_wb(wb, logger):
 
     logger.indent()
 
+    lea_attrs = ["lea_type", "lea_name", "county", "lea_address_street", "lea_address_city", "lea_address_state", "lea_address_zip", "lea_website", "lea_telephone"]
+    iu_attrs = ["iu_name"]
+    #school_attrs = ["school_name", "school_address_street", "school_address_state", "school_address_zip", "school_website", "school_telephone"]
+
     for sheet in wb.worksheets:
         year = detect_type(sheet.title)
+        rows = read_sheet(sheet)
+        if len(rows) == 0:
+            continue
+
+        # The AUN of each row, lined up with the columns. The header has none.
+        auns = [None] + [row[0] for row in rows[1:]]
+
+        if any(attr is not None for attr in rows[0][1:]):
+            for aun in auns[1:]:
+                if not isinstance(aun, int):
+                    print(year)
+                    exit()
 
-        for col_idx, col in enumerate(sheet.iter_cols()):
-            attr = col[0].value
+        # Only the IUs' own rows describe them
+        iu_auns = [aun if "000000" in str(aun) else None for aun in auns]
+
+        for col_idx, col in enumerate(zip(*rows)):
+            attr = col[0]
             if attr is None:
                 continue
 
@@ -368,32 +680,12 @@ def parse_standard_wb(wb, logger):
             if col_idx == 0:
                 continue
 
-            is_lea_attr = attr in ["lea_type", "lea_name", "county", "lea_address_street", "lea_address_city", "lea_address_state", "lea_address_zip", "lea_website", "lea_telephone"]
-            is_iu_attr = attr in ["iu_name"]
-            #is_school_attr = attr in ["school_name", "school_address_street", "school_address_state", "school_address_zip", "school_website", "school_telephone"]
-
-            for row_idx, cell in enumerate(col):
-                if row_idx == 0:
-                    continue
-
-                aun = sheet.cell(row=row_idx+1, column=1).value
-                value = cell.value
-
-                #if attr == "lea_type":
-                #    print("SDLFJKJSLKDFJLSKDJF")
-                #    exit()
-                if not isinstance(aun, int):
-                    print(year)
-                    exit()
-
-                if is_lea_attr:
-                    add_to_sheet_dict(logger, leas, aun, attr, value)
-                elif is_iu_attr:
-                    if "000000" in str(aun):
-                        add_to_sheet_dict(logger, ius, aun, attr, value)
-                    #logger.warn(f'Cannot add to iu dict. Attr: {attr}, Val: {value}' )
-                else:
-                    add_to_composite_dict(logger, data_dict, aun, year, attr, value)
+            if attr in lea_attrs:
+                add_column_to_sheet_dict(logger, leas, auns, attr, col)
+            elif attr in iu_attrs:
+                add_column_to_sheet_dict(logger, ius, iu_auns, attr, col)
+            else:
+                add_column_to_composite_dict(logger, data_dict, auns, year, attr, col)
 
 
     logger.unindent()
@@ -411,7 +703,7 @@ def parse_ffs_wb(wb, logger):
     Parses a Fast Facts School workbook.
 
     <ARGUMENTS>
-        * wb [openpyxl.Workbook]: The workbook to be parsed.
+        * wb [openpyxl.Workbook]: The read-only workbook to be parsed (See <workbook_io.py>).
 
         * logger [util.Logger]: The current Logger instance.
 
@@ -427,56 +719,82 @@ def parse_ffs_wb(wb, logger):
     data_dict = {}
     col_types = {}
 
+    lea_attrs = ["lea_name", "county", "lea_name", "lea_address_street", "lea_address_city", "lea_address_state", "lea_address_zip", "lea_website", "lea_telephone"]
+    iu_attrs = ["iu_name"]
+    school_attrs = ["school_name", "aun", "school_address_street", "school_address_city", "school_address_state", "school_address_zip", "school_website", "school_telephone"]
+
     logger.indent()
 
     for sheet in wb.worksheets:
         year = detect_type(sheet.title)
+        rows = read_sheet(sheet)
 
-        for col_idx, col in enumerate(sheet.iter_cols()):
-            attr = col[0].value
+        # Each column is cast, and its type determined, in a single pass
+        typed_cols = []
+        for col_idx, col in enumerate(zip(*rows)):
+            values, db_type = detect_types(col)
+            typed_cols.append(values)
+
+            attr = col[0]
             if attr is None:
                 continue
 
-            col_types[attr] = detect_db_type(col)
+            col_types[attr] = db_type
 
         #print(col_types)
 
-        for row_idx, row in enumerate(sheet.iter_rows()):
-            if row_idx == 0:
+        typed_rows = list(zip(*typed_cols))
+        if len(typed_rows) == 0:
+            continue
+
+        # Where each column's values are added, decided once from the header
+        column_plan = []
+        for col_idx, attr in enumerate(typed_rows[0]):
+            if attr is None:
+                continue
+            if attr == "school_id":
                 continue
 
-            for col_idx, cell in enumerate(row):
-                attr = detect_type(sheet.cell(row=1, column=col_idx+1).value)
-                school_id = detect_type(sheet.cell(row=row_idx+1, column=1).value)
-                aun = detect_type(sheet.cell(row=row_idx+1, column=4).value)
-                value = detect_type(cell.value)
+            if attr in lea_attrs:
+                # Not kept, the LEAs are described by their own workbooks
+                continue
+            elif attr in iu_attrs:
+                target = "iu"
+            elif attr in school_attrs:
+                target = "school"
+            else:
+                target = "composite"
 
-                if attr is None:
-                    continue
-                if attr == "school_id":
-                    continue
+            # This bit of code is kinda bad. It is meant to handle CTCs, which are LEAs but not SDs
+            lea_attr = None
+            if attr in school_attrs and attr != "aun":
+                lea_attr = attr.replace("school_", "lea_")
 
-                is_lea_attr = attr in ["lea_name", "county", "lea_name", "lea_address_street", "lea_address_city", "lea_address_state", "lea_address_zip", "lea_website", "lea_telephone"]
-                is_iu_attr = attr in ["iu_name"]
-                is_school_attr = attr in ["school_name", "aun", "school_address_street", "school_address_city", "school_address_state", "school_address_zip", "school_website", "school_telephone"]
+            column_plan.append((col_idx, attr, target, lea_attr))
 
-                if is_lea_attr:
-                    pass
-                    #add_to_sheet_dict(logger, leas, aun, attr, value)
-                    #logger.warn(f'Cannot add to lea dict. Attr: {attr}, Val: {value}')
-                elif is_iu_attr:
-                    logger.warn(f'Cannot add to iu dict. Attr: {attr}, Val: {value}')
-                elif is_school_attr:
+        for row_idx, row in enumerate(rows):
+            if row_idx == 0:
+                continue
+
+            # What every cell of the row shares is only read once
+            typed_row = typed_rows[row_idx]
+            school_id = typed_row[0]
+            aun = typed_row[3]
+            is_ctc = row[1] == row[2]
+
+            for col_idx, attr, target, lea_attr in column_plan:
+                value = typed_row[col_idx]
+
+                if target == "school":
                     add_to_sheet_dict(logger, schools, school_id, attr, value)
-                else:
+                elif target == "composite":
                     add_to_composite_dict(logger, data_dict, school_id, year, attr, value)
+                else:
+                    logger.warn(f'Cannot add to iu dict. Attr: {attr}, Val: {value}')
 
-                # This bit of code is kinda bad. It is meant to handle CTCs, which are LEAs but not SDs
-                school_name = sheet.cell(row=row_idx+1, column=2).value
-                lea_name = sheet.cell(row=row_idx+1, column=3).value
-                if school_name == lea_name and is_school_attr and attr != "aun":
+                if is_ctc and lea_attr is not None:
                     #logger.write(f'fast fact attr: school_id: {school_id}, year: {year}, attr: {attr}. aun: {aun}')
-                    add_to_sheet_dict(logger, leas, aun, attr.replace("school_", "lea_"), value)
+                    add_to_sheet_dict(logger, leas, aun, lea_attr, value)
 
     logger.unindent()
     return (SheetDict(data_dict, "school_id"), col_types)
@@ -491,7 +809,7 @@ def parse_keystone_wb(wb, logger):
     See <utils.py> for a description of SheetDicts.
 
     <ARGUMENTS>
-        * wb [openpyxl.Workbook]: The workbook to be parsed.
+        * wb [openpyxl.Workbook]: The read-only workbook to be parsed (See <workbook_io.py>).
 
         * logger [util.Logger]: The current Logger instance.
 
@@ -506,58 +824,87 @@ def parse_keystone_wb(wb, logger):
     data_dict = {}
     col_types = {}
 
+    lea_attrs = ["lea_name", "aun", "county", "lea_name", "lea_address_street", "lea_address_city", "lea_address_state", "lea_address_zip", "lea_website", "lea_telephone"]
+    iu_attrs = ["iu_name"]
+    school_attrs = ["school_name", "aun", "school_address_street", "school_address_city", "school_address_state", "school_address_zip", "school_website", "school_telephone"]
+
     logger.indent()
 
     for sheet in wb.worksheets:
         year = detect_type(sheet.title)
+        rows = read_sheet(sheet)
+
+        # Each column is cast, and its type determined, in a single pass
+        typed_cols = []
+        for col_idx, col in enumerate(zip(*rows)):
+            values, db_type = detect_types(col)
+            typed_cols.append(values)
 
-        for col_idx, col in enumerate(sheet.iter_cols()):
-            attr = col[0].value
+            attr = col[0]
             if attr is None:
                 continue
 
-            col_types[attr] = detect_db_type(col)
+            col_types[attr] = db_type
 
         #print(col_types)
 
-        for row_idx, row in enumerate(sheet.iter_rows()):
-            if row_idx == 0:
+        typed_rows = list(zip(*typed_cols))
+        if len(typed_rows) == 0:
+            continue
+
+        # Where each column's values are added, decided once from the header
+        column_plan = []
+        for col_idx, attr in enumerate(typed_rows[0]):
+            if attr is None:
+                continue
+            if attr == "school_id":
                 continue
 
-            for col_idx, cell in enumerate(row):
-                attr = detect_type(sheet.cell(row=1, column=col_idx+1).value)
-                school_id = detect_type(sheet.cell(row=row_idx+1, column=1).value)
-                aun = detect_type(sheet.cell(row=row_idx+1, column=29).value)
-                value = detect_type(cell.value)
+            if attr in lea_attrs:
+                # Not kept, the LEAs are described by their own workbooks
+                continue
+            elif attr in iu_attrs:
+                target = "iu"
+            elif attr in school_attrs:
+                target = "school"
+            else:
+                target = "composite"
 
-                if attr is None:
-                    continue
-                if attr == "school_id":
-                    continue
+            # This bit of code is kinda bad. It is meant to handle CTCs, which are LEAs but not SDs
+            lea_attr = None
+            if attr in school_attrs and attr != "aun":
+                lea_attr = attr.replace("school_", "lea_")
 
-                is_lea_attr = attr in ["lea_name", "aun", "county", "lea_name", "lea_address_street", "lea_address_city", "lea_address_state", "lea_address_zip", "lea_website", "lea_telephone"]
-                is_iu_attr = attr in ["iu_name"]
-                is_school_attr = attr in ["school_name", "aun", "school_address_street", "school_address_city", "school_address_state", "school_address_zip", "school_website", "school_telephone"]
+            column_plan.append((col_idx, attr, target, lea_attr))
 
-                if is_lea_attr:
-                    pass
-                    #add_to_sheet_dict(logger, leas, aun, attr, value)
-                    #logger.warn(f'Cannot add to lea dict. Attr: {attr}, Val: {value}')
-                elif is_iu_attr:
-                    logger.warn(f'Cannot add to iu dict. Attr: {attr}, Val: {value}')
-                elif is_school_attr and (attr != "aun" or aun is not None):
-                    #if aun is None:
-                    #    print(attr)
-                    add_to_sheet_dict(logger, schools, int(school_id.split("_")[0]), attr, value)
-                else:
+        # The school's number (E.g. "1234" of "1234_all_algebra") is only needed for its attributes
+        has_school_attrs = any(target == "school" for col_idx, attr, target, lea_attr in column_plan)
+
+        for row_idx, row in enumerate(rows):
+            if row_idx == 0:
+                continue
+
+            # What every cell of the row shares is only read once
+            typed_row = typed_rows[row_idx]
+            school_id = typed_row[0]
+            if has_school_attrs:
+                school_number = int(school_id.split("_")[0])
+            aun = typed_row[28] if len(row) > 28 else None
+            is_ctc = row[1] == row[2]
+
+            for col_idx, attr, target, lea_attr in column_plan:
+                value = typed_row[col_idx]
+
+                if target == "school":
+                    add_to_sheet_dict(logger, schools, school_number, attr, value)
+                elif target == "composite":
                     add_to_composite_dict(logger, data_dict, school_id, year, attr, value)
+                else:
+                    logger.warn(f'Cannot add to iu dict. Attr: {attr}, Val: {value}')
 
-                # This bit of code is kinda bad. It is meant to handle CTCs, which are LEAs but not SDs
-                school_name = sheet.cell(row=row_idx+1, column=2).value
-                lea_name = sheet.cell(row=row_idx+1, column=3).value
-                if school_name == lea_name and is_school_attr and attr != "aun":
+                if is_ctc and lea_attr is not None:
                     #logger.write(f'fast fact attr: school_id: {school_id}, year: {year}, attr: {attr}. aun: {aun}')
-                    add_to_sheet_dict(logger, leas, aun, attr.replace("school_", "lea_"), value)
+                    add_to_sheet_dict(logger, leas, aun, lea_attr, value)
 
     logger.unindent()
     return (SheetDict(data_dict, "school_id"), col_types)
@@ -572,43 +919,49 @@ def write_composite_dict(composite_dict, col_types, filename):
     <EXTENDED_DESCRIPTION>
     See @add_to_composite_dict(...) for a description of composite dictionaries.
 
+    The columns are laid out before anything is written, so that the rows can
+    be streamed to file one at a time.
+
     <ARGUMENTS>
         * composite_dict [Dictionary]: The composite dictionary to be writted to file.
 
         * col_types [Dictionary]: The SQLite3 data types for each column.
 
-        * filename [String]: The name of the file to be written to.
+        * filename [String]:
+            The name of the file to be written to. Its extension is the format
+            to write it in (See <workbook_io.FILE_FORMATS>).
     '''
 
-    wb = openpyxl.Workbook()
-    sheet = wb.active
-
-    sheet.cell(row=1, column=1).value = composite_dict.identifier + " PK_INTEGER"
-    sheet.cell(row=1, column=2).value = "year PK_INTEGER"
-
-    next_key_index = 3
+    # The column of each attribute, in the order they are first found
     key_indices = {}
+    for year_dict in composite_dict.dict.values():
+        for record in year_dict.values():
+            for record_key in record:
+                if record_key not in key_indices:
+                    key_indices[record_key] = len(key_indices) + 2
 
-    rowIdx = 2
+    header = [composite_dict.identifier + " PK_INTEGER", "year PK_INTEGER"] + [None] * len(key_indices)
+    for record_key, key_index in key_indices.items():
+        if record_key is not None:
+            header[key_index] = record_key + " " + col_types[record_key]
+            #print(f'Record Key: {record_key} + {record_key in col_types}')
 
-    for year, year_dict in composite_dict.dict.items():
-        for id, record in year_dict.items():
-            for record_key, attribute in record.items():
-                sheet.cell(row=rowIdx, column=1).value = id
-                sheet.cell(row=rowIdx, column=2).value = year
+    def get_rows():
+        yield header
 
-                if record_key not in key_indices:
-                    key_indices[record_key] = next_key_index
-                    next_key_index = next_key_index + 1
+        for year, year_dict in composite_dict.dict.items():
+            for id, record in year_dict.items():
+                if len(record) == 0: # Leaves an empty row
+                    yield []
+                    continue
+
+                row = [id, year] + [None] * len(key_indices)
+                for record_key, attribute in record.items():
+                    row[key_indices[record_key]] = attribute
 
-                if record_key is not None:
-                    sheet.cell(row=1, column = key_indices[record_key]).value = record_key + " " + col_types[record_key]
-                    #print(f'Record Key: {record_key} + {record_key in col_types}')
-                sheet.cell(row=rowIdx, column=key_indices[record_key]).value = attribute
-            rowIdx = rowIdx + 1
+                yield row
 
-    wb.save(filename)
-    wb.close()
+    write_workbook(filename, [("Sheet", get_rows())])
 
 def write_sheet_dict(sheet_dict, filename):
     '''
@@ -617,37 +970,44 @@ def write_sheet_dict(sheet_dict, filename):
     <EXTENDED_DESCRIPTION>
     See <utils.py> for a description of SheetDicts.
 
+    The columns are laid out before anything is written, so that the rows can
+    be streamed to file one at a time.
+
     <ARGUMENTS>
         * sheet_dict [utils.SheetDict]: The SheetDict to be writted to file.
-        * filename [String]: The name of the file to be written to.
+        * filename [String]:
+            The name of the file to be written to. Its extension is the format
+            to write it in (See <workbook_io.FILE_FORMATS>).
     '''
 
-    wb = openpyxl.Workbook()
-    sheet = wb.active
-    sheet.cell(row=1, column=1).value = sheet_dict.identifier + " PK_INTEGER"
-
-    next_key_index = 2
+    # The column of each attribute, in the order they are first found
     key_indices = {}
+    for record in sheet_dict.dict.values():
+        for record_key in record:
+            if record_key not in key_indices:
+                key_indices[record_key] = len(key_indices) + 1
 
-    rowIdx = 2
+    header = [sheet_dict.identifier + " PK_INTEGER"] + [None] * len(key_indices)
+    for record_key, key_index in key_indices.items():
+        if "aun" in record_key or "zip" in record_key or "phone" in record_key:
+            key_type = " INTEGER"
+        else:
+            key_type = " TEXT"
 
-    for id, record in sheet_dict.dict.items():
-        for record_key, attribute in record.items():
-            sheet.cell(row=rowIdx, column=1).value = id
+        header[key_index] = record_key + key_type
 
-            if "aun" in record_key or "zip" in record_key or "phone" in record_key:
-                key_type = " INTEGER"
-            else:
-                key_type = " TEXT"
+    def get_rows():
+        yield header
 
-            if record_key not in key_indices:
-                key_indices[record_key] = next_key_index
-                next_key_index = next_key_index + 1
+        for id, record in sheet_dict.dict.items():
+            if len(record) == 0: # Leaves an empty row
+                yield []
+                continue
 
-            sheet.cell(row=1, column = key_indices[record_key]).value = record_key + key_type
-            sheet.cell(row=rowIdx, column=key_indices[record_key]).value = attribute
-        rowIdx = rowIdx + 1
+            row = [id] + [None] * len(key_indices)
+            for record_key, attribute in record.items():
+                row[key_indices[record_key]] = attribute
 
+            yield row
 
-    wb.save(filename)
-    wb.close()
\ No newline at end of file
+    write_workbook(filename, [("Sheet", get_rows())])
\ No newline at end of file
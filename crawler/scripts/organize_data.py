@@ -7,6 +7,11 @@ organize_data.py
 The purpose of this script is to resort the data files into better categories,
 and to rename each file to follow a consistant naming / dating convention.
 
+Files are identified by their content hash (See <raw_store.RawStore>), so a
+workbook which was downloaded from several URLs is only organized once. Should
+different files be given the same new name (E.g. two different workbooks for
+the same year), nothing is organized until all but one of them are ignored.
+
 
 <FUNCTIONS>
 This script can be run by calling organize_data.run(<args>). All other functions
@@ -15,6 +20,14 @@ of each function. For more comprehensive documentation, see each method directly
 
     * run(...): Reorganizes/renames the data files.
 
+    * needs_run(...): Determines if any data file needs to be organized.
+
+    * get_copies(...): Determines where each data file is copied to.
+
+    * is_copied(...): Determines if a data file's copy is up to date.
+
+    * get_new_directories(...): Determines what directories a classification's files may be sorted into.
+
     * get_new_directory(...): Determines what directory a file should be sorted into.
 
     * get_new_name(...): Determines a file's new name.
@@ -25,9 +38,16 @@ of each function. For more comprehensive documentation, see each method directly
 import os
 from pathlib import Path
 import shutil
-from scripts.utils import detect_year
+from scripts.utils import detect_year, LogBuffer
+from scripts.raw_store import RawStore
+
+SPLIT_DIRECTORIES = {
+    "FRPA": ["Fiscal_District", "Fiscal_School", "Fast_Facts_District", "Fast_Facts_School", "FRP"],
+    "Cohorts": ["Cohort_Four_Year", "Cohort_Five_Year", "Cohort_Six_Year"],
+}
+'''[Dictionary]: The directories the files of each split classification are sorted into (See @get_new_directory(...)).'''
 
-def run(DATA_DIRECTORY, ORGANIZED_DATA_DIRECTORY, logger):
+def run(DATA_DIRECTORY, ORGANIZED_DATA_DIRECTORY, logger, ignored_files=(), classification=None):
     '''
     Reorganizes/renames the data files.
 
@@ -37,14 +57,125 @@ def run(DATA_DIRECTORY, ORGANIZED_DATA_DIRECTORY, logger):
         * ORGANIZED_DATA_DIRECTORY [String]: The path to the output directory.
 
         * logger [utils.Logger]: The current Logger instance.
+
+        * ignored_files=() [[String...]]:
+            The data files not to organize, relative to the input directory
+            (E.g. "Keystones/Keystone School 2019 (2).xlsx").
+
+        * classification=None [String | None]:
+            The only classification whose files are organized. If None, every
+            file is organized.
+
+    <RAISE>
+        * ValueError: If different files would be given the same new name.
     '''
 
     logger.indent()
 
-    for subdirectory in os.listdir(DATA_DIRECTORY):
-        for filename in os.listdir(DATA_DIRECTORY + "/" + subdirectory):
+    copies = get_copies(DATA_DIRECTORY, logger, ignored_files, classification)
+
+    for subdirectory, filename, new_dir, new_name in copies:
+        if not is_copied(DATA_DIRECTORY + "/" + subdirectory + "/" + filename, ORGANIZED_DATA_DIRECTORY + "/" + new_dir + "/" + new_name):
+            copy(DATA_DIRECTORY + "/" + subdirectory, filename, ORGANIZED_DATA_DIRECTORY + "/" + new_dir, new_name, logger)
+
+    logger.unindent()
+
+def needs_run(DATA_DIRECTORY, ORGANIZED_DATA_DIRECTORY, ignored_files=(), classification=None):
+    '''
+    Determines if any data file needs to be organized.
+
+    <EXTENDED_DESCRIPTION>
+    Only the files which @run(...) would copy are checked (See
+    @get_copies(...)), so files it leaves out never make it run again.
+
+    <ARGUMENTS>
+        * DATA_DIRECTORY [String]: The path to the input directory.
+
+        * ORGANIZED_DATA_DIRECTORY [String]: The path to the output directory.
+
+        * ignored_files=() [[String...]]:
+            The data files not to organize, relative to the input directory.
+
+        * classification=None [String | None]:
+            The only classification whose files are checked. If None, every
+            file is checked.
+
+    <RETURN>
+        * [Boolean]:
+            If any file's copy is missing or out of date, or different files
+            would be given the same new name.
+    '''
+
+    if not os.path.exists(DATA_DIRECTORY):
+        return False
+
+    try:
+        copies = get_copies(DATA_DIRECTORY, LogBuffer(), ignored_files, classification)
+    except ValueError: # Should be reported by running the script
+        return True
+
+    for subdirectory, filename, new_dir, new_name in copies:
+        if not is_copied(DATA_DIRECTORY + "/" + subdirectory + "/" + filename, ORGANIZED_DATA_DIRECTORY + "/" + new_dir + "/" + new_name):
+            return True
+
+    return False
+
+def get_copies(DATA_DIRECTORY, logger, ignored_files=(), classification=None):
+    '''
+    Determines where each data file is copied to.
+
+    <EXTENDED_DESCRIPTION>
+    Unfinished downloads, files which are not workbooks (which <clean_data.py>
+    would only remove), files whose year cannot be detected, and files
+    identical to one already being copied to the same name are left out.
+
+    <ARGUMENTS>
+        * DATA_DIRECTORY [String]: The path to the input directory.
+
+        * logger [utils.Logger]: The current Logger instance.
+
+        * ignored_files=() [[String...]]:
+            The data files not to organize, relative to the input directory.
+
+        * classification=None [String | None]:
+            The only classification whose files are copied. If None, every
+            file is copied.
+
+    <RETURN>
+        * [[(String, String, String, String)...]]:
+            The original directory name, original name, new directory name,
+            and new name of each file to copy.
+
+    <RAISE>
+        * ValueError: If different files would be given the same new name.
+    '''
+
+    store = RawStore(DATA_DIRECTORY)
+    organized = {} # The content hash written to each new path
+    sources = {} # The data files which would be written to each new path
+    copies = []
+
+    for subdirectory in sorted(os.listdir(DATA_DIRECTORY)):
+        if subdirectory.startswith("."): # The raw data store itself
+            continue
+
+        if classification is not None and subdirectory != classification:
+            continue
+
+        for filename in sorted(os.listdir(DATA_DIRECTORY + "/" + subdirectory)):
+            if filename.endswith((".part", ".part.json", ".link")): # Unfinished download
+                continue
+
+            if subdirectory + "/" + filename in ignored_files:
+                logger.write(f'Ignoring ./{subdirectory}/{filename}')
+                continue
+
             logger.write(f'Checking ./{subdirectory}/{filename}')
 
+            if ".xls" not in filename:
+                logger.write(f'Not a workbook. Ignoring file.')
+                continue
+
             new_dir = get_new_directory(filename, subdirectory, logger)
             new_name = get_new_name(filename, new_dir, logger)
 
@@ -52,13 +183,86 @@ def run(DATA_DIRECTORY, ORGANIZED_DATA_DIRECTORY, logger):
                 logger.warn(f'Could not detect year. Ignoring file.')
                 continue
 
+            new_path = new_dir + "/" + new_name
+            sha256 = store.get_sha256(DATA_DIRECTORY + "/" + subdirectory + "/" + filename)
+
+            if organized.get(new_path) == sha256:
+                logger.write(f'Identical to ./{new_path}. Skipping file.')
+                continue
+
+            if new_path in organized:
+                logger.warn(f'Different files would be organized as ./{new_path}')
+                sources[new_path].append(subdirectory + "/" + filename)
+                continue
+
+            organized[new_path] = sha256
+            sources[new_path] = [subdirectory + "/" + filename]
+
             if subdirectory != new_dir or new_name != filename:
                 logger.write(f'Moving to ./{new_dir}/{new_name}')
 
-            copy(DATA_DIRECTORY + "/" + subdirectory, filename, ORGANIZED_DATA_DIRECTORY + "/" + new_dir, new_name, logger)
+            copies.append((subdirectory, filename, new_dir, new_name))
 
-    logger.unindent()
+    conflicts = {new_path: files for new_path, files in sources.items() if len(files) > 1}
+    if len(conflicts) != 0:
+        for new_path, files in conflicts.items():
+            logger.warn(f'Only one of these files can be organized as ./{new_path}:')
+            logger.indent()
+            for file in files:
+                urls = [entry["url"] for entry in store.entries.values() if entry["path"] == DATA_DIRECTORY + "/" + file]
+                logger.warn(f'./{file} (From: {", ".join(urls) or "unknown"})')
+            logger.unindent()
 
+        raise ValueError(f'{len(conflicts)} organized file(s) would have different content. Add all but one of each to ignored_files.')
+
+    return copies
+
+
+def is_copied(old_path, new_path):
+    '''
+    Determines if a data file's copy is up to date.
+
+    <EXTENDED_DESCRIPTION>
+    Copies keep their original's modification time (See @copy(...)), so a
+    copy is up to date if it has the same size and modification time.
+
+    An .xls copy may have since been converted to .xlsx, and removed, by
+    <clean_data.py>. Its conversion is up to date if it is at least as new as
+    the data file.
+
+    <ARGUMENTS>
+        * old_path [String]: The path to the data file.
+
+        * new_path [String]: The path to its copy.
+
+    <RETURN>
+        * [Boolean]: If the copy exists, and matches the data file.
+    '''
+
+    old_stat = os.stat(old_path)
+
+    if not os.path.exists(new_path):
+        xlsx_path = os.path.splitext(new_path)[0] + ".xlsx"
+        if new_path.endswith(".xls") and os.path.exists(xlsx_path):
+            return os.stat(xlsx_path).st_mtime_ns >= old_stat.st_mtime_ns
+
+        return False
+    new_stat = os.stat(new_path)
+
+    return old_stat.st_size == new_stat.st_size and old_stat.st_mtime_ns == new_stat.st_mtime_ns
+
+def get_new_directories(classification):
+    '''
+    Determines what directories a classification's files may be sorted into.
+
+    <ARGUMENTS>
+        * classification [String]: The classification (I.e. the original directory name).
+
+    <RETURN>
+        * [[String...]]: The new directory names. Files which cannot be sorted ("INVALID") are not included.
+    '''
+
+    return SPLIT_DIRECTORIES.get(classification, [classification])
 
 def get_new_directory(filename, directory, logger):
     '''
@@ -182,6 +386,9 @@ def copy(old_dir, old_name, new_dir, new_name, logger):
     '''
     Copies a data file to its new name/location.
 
+    <EXTENDED_DESCRIPTION>
+    The copy keeps the data file's modification time.
+
     <ARGUMENTS>
         * old_dir [String]: The file's original directory.
 
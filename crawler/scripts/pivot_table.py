@@ -0,0 +1,207 @@
+'''
+<FILE>
+pivot_table.py
+
+
+<DESCRIPTION>
+The purpose of this script is to pivot "long" data files into SheetDicts, with
+less memory than nested dictionaries.
+
+Some data files (E.g. the Fast Facts and APD files) list one attribute per row,
+as (entity, attribute, value), rather than one entity per row. Pivoting these
+into nested dictionaries keeps a dictionary for every entity, each holding its
+own copy of every attribute's name. For the largest files, these dictionaries
+take far more memory than the data itself.
+
+A PivotTable instead gives each attribute a column once, in a registry shared
+by every entity, and stores each entity's values as a plain list, indexed by
+column. Repeated text values (E.g. "N/A") are only stored once.
+
+This only makes each value cheaper to keep. The whole table is still held in
+memory until it is written, so its size grows with the number of entities
+times the number of attributes.
+
+
+<CLASSES>
+This section only lists a brief description of each class. For more
+comprehensive documentation, see each class directly.
+
+    * PivotTable(...):
+        A SheetDict built one value at a time from long data.
+
+    * Missing():
+        The type of MISSING, which marks a value which was never set.
+'''
+
+from collections.abc import Mapping
+from scripts.utils import SheetDict
+
+class Missing:
+    '''
+    The type of MISSING, which marks a value which was never set.
+
+    <EXTENDED_DESCRIPTION>
+    Unlike None, which is a value read from a data file, MISSING means the
+    entity has no such attribute at all. It is pickled by name, so it remains
+    the same object when a PivotTable is returned from a worker process.
+    '''
+
+    def __reduce__(self):
+        return "MISSING"
+
+    def __repr__(self):
+        return "MISSING"
+
+MISSING = Missing()
+'''[Missing]: Marks a value which was never set.'''
+
+class PivotTable(SheetDict):
+    '''
+    A SheetDict built one value at a time from long data.
+
+    <EXTENDED_DESCRIPTION>
+    Its dict is a read-only view of the table, so that it can be written (See
+    @clean_data.write_dicts(...)) like any other SheetDict. Each entity's
+    attributes are listed in the order their columns were registered.
+
+    <ATTRIBUTES>
+        * columns [Dictionary]: The column of each attribute, in the order they were registered.
+
+        * rows [Dictionary]: The values of each entity, by column.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a PivotTable.
+
+        * add_record(...): Adds an entity, unless already present.
+
+        * set_value(...): Sets one of an entity's attributes.
+    '''
+
+    columns = None
+    '''[Dictionary]: The column of each attribute, in the order they were registered.'''
+
+    rows = None
+    '''[Dictionary]: The values of each entity, by column.'''
+
+    def __init__(self, identifier, columns=()):
+        '''
+        The constructor for a PivotTable.
+
+        <ARGUMENTS>
+            * identifier [String]:
+                The name of the identifier for each entity (E.g. "aun" for LEAs).
+
+            * columns=() [[String...]]:
+                The attributes every entity is expected to have. Their columns
+                are registered first, so each entity's row starts large enough
+                to hold them.
+        '''
+
+        self.columns = {}
+        self.rows = {}
+        self._text = {}
+
+        for attribute in columns:
+            self.columns[attribute] = len(self.columns)
+
+        super().__init__(PivotView(self), identifier)
+
+    def __contains__(self, id):
+        return id in self.rows
+
+    def add_record(self, id, record):
+        '''
+        Adds an entity, unless already present.
+
+        <ARGUMENTS>
+            * id [Object]: The entity's identifier.
+
+            * record [Dictionary]: The entity's initial attributes and values.
+        '''
+
+        if id in self.rows:
+            return
+
+        self.rows[id] = [MISSING] * len(self.columns)
+
+        for attribute, value in record.items():
+            self.set_value(id, attribute, value)
+
+    def set_value(self, id, attribute, value):
+        '''
+        Sets one of an entity's attributes.
+
+        <ARGUMENTS>
+            * id [Object]: The entity's identifier. The entity must have been added.
+
+            * attribute [String]: The attribute's name.
+
+            * value [Object]: The attribute's value.
+        '''
+
+        column = self.columns.get(attribute)
+        if column is None:
+            column = len(self.columns)
+            self.columns[attribute] = column
+
+        if isinstance(value, str):
+            value = self._text.setdefault(value, value)
+
+        row = self.rows[id]
+        if column >= len(row):
+            row.extend([MISSING] * (len(self.columns) - len(row)))
+
+        row[column] = value
+
+class PivotView(Mapping):
+    # The read-only dictionary of records of a PivotTable
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getitem__(self, id):
+        return RecordView(self._table.columns, self._table.rows[id])
+
+    def __iter__(self):
+        return iter(self._table.rows)
+
+    def __len__(self):
+        return len(self._table.rows)
+
+    def values(self):
+        for row in self._table.rows.values():
+            yield RecordView(self._table.columns, row)
+
+    def items(self):
+        for id, row in self._table.rows.items():
+            yield id, RecordView(self._table.columns, row)
+
+class RecordView(Mapping):
+    # The read-only dictionary of one entity's attributes in a PivotTable
+
+    def __init__(self, columns, row):
+        self._columns = columns
+        self._row = row
+
+    def __getitem__(self, attribute):
+        column = self._columns[attribute]
+        if column >= len(self._row) or self._row[column] is MISSING:
+            raise KeyError(attribute)
+
+        return self._row[column]
+
+    def __iter__(self):
+        for attribute, value in self.items():
+            yield attribute
+
+    def __len__(self):
+        return sum(1 for value in self._row if value is not MISSING)
+
+    def items(self):
+        row = self._row
+        for attribute, column in self._columns.items():
+            if column >= len(row):
+                break
+
+            if row[column] is not MISSING:
+                yield attribute, row[column]
@@ -0,0 +1,299 @@
+'''
+<FILE>
+raw_store.py
+
+
+<DESCRIPTION>
+The purpose of this script is to store the downloaded data files by their
+content, so that a workbook published under several URLs is only stored once.
+
+The state's websites often link the same workbook from several pages, or under
+several names. Each downloaded file is stored once, as a blob named by its
+SHA-256 hash, in "<RAW_DATA_DIRECTORY>/.store/blobs/". A small index records
+which blob each (classification, URL, file name) refers to.
+
+The classification directories (E.g. "<RAW_DATA_DIRECTORY>/Keystones/") are
+kept as a view of the store: each file in them is a hard link to its blob.
+Should two different files share a name, the later one is given a numbered
+name (E.g. "Keystone School 2019 (2).xlsx") rather than overwriting the first.
+
+
+<CLASSES>
+This section only lists a brief description of each class. For more
+comprehensive documentation, see each class directly.
+
+    * RawStore(...):
+        A content-addressed store of the raw data files.
+
+
+<FUNCTIONS>
+This section only lists a brief description of each function. For more
+comprehensive documentation, see each method directly.
+
+    * link(...): Links a blob into a classification directory.
+'''
+
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+from scripts.utils import hash_file
+
+STORE_DIRECTORY_NAME = ".store"
+'''[String]: The name of the store's directory, within the raw data directory.'''
+
+class RawStore:
+    '''
+    A content-addressed store of the raw data files.
+
+    <EXTENDED_DESCRIPTION>
+    The index is a JSON file mapping each "<classification>; <URL>" (the same
+    format as the data URLs text file) to an entry containing:
+
+        * "classification": The data file's classification.
+
+        * "url": The URL of the data file.
+
+        * "filename": The file name given by the server.
+
+        * "sha256": The SHA-256 hash of the file's content, naming its blob.
+
+        * "path": The file's path in its classification directory.
+
+    The store is safe to use from multiple threads.
+
+    <ATTRIBUTES>
+        * directory [String]: The path to the raw data directory.
+
+        * entries [Dictionary]: The index entry for each classification and URL.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a RawStore.
+
+        * add(...): Moves a downloaded file into the store.
+
+        * get_sha256(...): Determines the content hash of a file in a classification directory.
+
+        * get_blob_path(...): Determines where content with a given hash is stored.
+
+        * save(): Writes the index to its file, and removes unused files.
+    '''
+
+    directory = None
+    '''[String]: The path to the raw data directory.'''
+
+    entries = None
+    '''[Dictionary]: The index entry for each classification and URL.'''
+
+    def __init__(self, directory):
+        '''
+        The constructor for a RawStore.
+
+        <EXTENDED_DESCRIPTION>
+        Loads the index, should it exist. Nothing is created until a file is
+        added, or the index is saved.
+
+        <ARGUMENTS>
+            * directory [String]: The path to the raw data directory.
+        '''
+
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(directory, STORE_DIRECTORY_NAME, "index.json")
+
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r") as index_file:
+                self.entries = json.load(index_file)
+        else:
+            self.entries = {}
+
+        # The content of each file in the classification directories
+        self._views = {entry["path"]: entry["sha256"] for entry in self.entries.values() if os.path.exists(entry["path"])}
+
+        # The files in the classification directories which were linked by the store
+        self._linked = set(self._views)
+
+    def add(self, partpath, sha256, file_class, url, filename, logger):
+        '''
+        Moves a downloaded file into the store.
+
+        <EXTENDED_DESCRIPTION>
+        Should the content already be stored, the downloaded file is discarded.
+        The file is then linked into its classification directory, under the
+        first name which is either free, already holds the same content, or
+        was previously given to the same URL (and to no other URL). A file
+        which other URLs still refer to is never replaced, so their content
+        stays in the classification directory.
+
+        <ARGUMENTS>
+            * partpath [String]: The path to the completely downloaded file.
+
+            * sha256 [String]: The SHA-256 hash of the file's content.
+
+            * file_class [String]: The data file's classification.
+
+            * url [String]: The URL of the data file.
+
+            * filename [String]: The file name given by the server.
+
+            * logger [utils.Logger | utils.LogBuffer]: The current Logger instance.
+
+        <RETURN>
+            * [String]: The file's path in its classification directory.
+        '''
+
+        key = file_class + "; " + url
+        blob_path = self.get_blob_path(sha256)
+
+        with self._lock:
+            if os.path.exists(blob_path):
+                logger.write("Content already stored")
+                os.remove(partpath)
+            else:
+                Path(blob_path).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(partpath, blob_path)
+
+            path = self._claim_path(key, file_class, filename, sha256)
+
+            if self._views.get(path) == sha256 and os.path.exists(path):
+                logger.write("Content unchanged")
+            else:
+                if path != self._get_directory(file_class) + filename:
+                    logger.warn(f'A different file is already named "{filename}". Storing as "{os.path.basename(path)}"')
+
+                link(blob_path, path)
+                self._views[path] = sha256
+                self._linked.add(path)
+
+            self.entries[key] = {
+                "classification": file_class,
+                "url": url,
+                "filename": filename,
+                "sha256": sha256,
+                "path": path,
+            }
+
+        return path
+
+    def get_sha256(self, path):
+        '''
+        Determines the content hash of a file in a classification directory.
+
+        <EXTENDED_DESCRIPTION>
+        The hash is looked up in the index. Files which were not added through
+        the store are hashed directly.
+
+        <ARGUMENTS>
+            * path [String]: The path to the file.
+
+        <RETURN>
+            * [String]: The SHA-256 hash of the file's content.
+        '''
+
+        with self._lock:
+            if path not in self._views:
+                self._views[path] = hash_file(path)
+
+            return self._views[path]
+
+    def get_blob_path(self, sha256):
+        '''
+        Determines where content with a given hash is stored.
+
+        <ARGUMENTS>
+            * sha256 [String]: The SHA-256 hash of the content.
+
+        <RETURN>
+            * [String]: The path to the blob.
+        '''
+
+        return os.path.join(self.directory, STORE_DIRECTORY_NAME, "blobs", sha256[0:2], sha256)
+
+    def save(self):
+        '''
+        Writes the index to its file.
+
+        <EXTENDED_DESCRIPTION>
+        Files linked by the store which no URL refers to anymore are removed
+        from the classification directories.
+
+        The index is written to a temporary file first, and then renamed, so
+        that an interrupted save cannot corrupt it.
+        '''
+
+        with self._lock:
+            referenced = {entry["path"] for entry in self.entries.values()}
+            for path in self._linked - referenced:
+                if os.path.exists(path):
+                    os.remove(path)
+
+                self._views.pop(path, None)
+
+            self._linked = self._linked & referenced
+
+            Path(self._index_path).parent.mkdir(parents=True, exist_ok=True)
+
+            temp_path = self._index_path + ".tmp"
+            with open(temp_path, "w") as index_file:
+                json.dump(self.entries, index_file, indent=1, sort_keys=True)
+
+            os.replace(temp_path, self._index_path)
+
+    def _get_directory(self, file_class):
+        return self.directory + "/" + file_class + "/"
+
+    def _claim_path(self, key, file_class, filename, sha256):
+        # Must be called while holding the lock
+        stem, extension = os.path.splitext(filename)
+        previous_path = self.entries.get(key, {}).get("path")
+        number = 1
+
+        while True:
+            name = filename if number == 1 else f'{stem} ({number}){extension}'
+            path = self._get_directory(file_class) + name
+
+            if not os.path.exists(path):
+                return path
+
+            if path not in self._views:
+                self._views[path] = hash_file(path)
+
+            if self._views[path] == sha256:
+                return path
+
+            # Only a file no other URL refers to may be replaced with a newer
+            # copy. Otherwise, the newer copy is given a new name.
+            holders = [other for other, entry in self.entries.items() if entry["path"] == path]
+            if path == previous_path and holders == [key]:
+                return path
+
+            number = number + 1
+
+def link(blob_path, path):
+    '''
+    Links a blob into a classification directory.
+
+    <EXTENDED_DESCRIPTION>
+    A hard link is used where possible, so the content is not duplicated on
+    disk. Otherwise (E.g. on file systems without hard links), the blob is
+    copied. Any existing file at the path is atomically replaced.
+
+    <ARGUMENTS>
+        * blob_path [String]: The path to the blob.
+
+        * path [String]: The path in the classification directory.
+    '''
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path + ".link"
+
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    try:
+        os.link(blob_path, temp_path)
+    except OSError:
+        shutil.copy2(blob_path, temp_path)
+
+    os.replace(temp_path, path)
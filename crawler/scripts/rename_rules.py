@@ -0,0 +1,589 @@
+'''
+<FILE>
+rename_rules.py
+
+
+<DESCRIPTION>
+The purpose of this script is to define how the attributes in the data files
+are renamed, and to rename them quickly.
+
+Each kind of data file names its attributes differently (E.g. "Market Value"
+in the Aid Ratio files, or "2018-19 Average Daily Membership" in the AFR
+Expenditure files). The rules to rename them are written as ordered tables,
+one per kind of sheet. A table may build on another (its base), in which case
+the base's rules are applied first.
+
+Each table is compiled once, when this script is loaded, and remembers the
+result for every attribute it has renamed. As the same few headers are
+repeated across every row and every year, nearly every attribute is only
+renamed once.
+
+The tables can also be checked against real headers, to find rules which no
+longer match anything (See @RenameTable.find_unused_rules(...)).
+
+
+<RULES>
+Each rule is a tuple, starting with its kind. The rules are applied in order,
+until one returns a name:
+
+    * ("lower",):
+        Converts the name to lowercase.
+
+    * ("words",):
+        Joins the words of the name with underlines.
+
+    * ("replace", old, new):
+        Replaces every occurrence of old with new.
+
+    * ("replace_pattern", pattern, new):
+        Replaces the first match of a regular expression with new.
+
+    * ("exact", names, result):
+        Returns result, if the name is one of names.
+
+    * ("contains", parts, result):
+        Returns result, if the name contains any of parts.
+
+    * ("match", pattern, result):
+        Returns result, if the name matches a regular expression.
+
+    * ("substitute", old, new):
+        Returns the name with every old replaced by new, if it contains old.
+
+    * ("rewrite", parts, replacements):
+        Returns the name with each (old, new) in replacements made in order, if
+        the name contains any of parts.
+
+    * ("slice", part, start):
+        Returns the name from index start onward, if it contains part.
+
+    * ("code", pattern, codes):
+        Returns the name given to the number matched by a regular expression,
+        in the dictionary codes.
+
+A result of None drops the attribute. A result of INVALID stops the program,
+as the attribute is one the rules do not know how to rename.
+
+
+<CLASSES>
+This section only lists a brief description of each class. For more
+comprehensive documentation, see each class directly.
+
+    * RenameTable(...):
+        An ordered table of rename rules, compiled once.
+
+
+<FUNCTIONS>
+This section only lists a brief description of each function. For more
+comprehensive documentation, see each method directly.
+
+    * compile_rule(...): Compiles a rename rule into a function.
+'''
+
+import re
+
+INVALID = object()
+'''[Object]: The result of a rule matching an attribute which cannot be renamed.'''
+
+class RenameTable:
+    '''
+    An ordered table of rename rules, compiled once.
+
+    <ATTRIBUTES>
+        * name [String]: The name of the table.
+
+        * rules [[Tuple...]]: The rules, in the order they are applied.
+
+        * base [RenameTable | None]: The table applied before this one.
+
+        * keep_unmatched [Boolean]:
+            If a name no rule returned is kept. If False, it is dropped.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a RenameTable.
+
+        * rename(...): Renames an attribute.
+
+        * find_unused_rules(...): Finds the rules which do not match any of some attributes.
+    '''
+
+    name = None
+    '''[String]: The name of the table.'''
+
+    rules = None
+    '''[[Tuple...]]: The rules, in the order they are applied.'''
+
+    base = None
+    '''[RenameTable | None]: The table applied before this one.'''
+
+    keep_unmatched = True
+    '''[Boolean]: If a name no rule returned is kept.'''
+
+    def __init__(self, name, rules, base=None, keep_unmatched=True):
+        '''
+        The constructor for a RenameTable.
+
+        <ARGUMENTS>
+            * name [String]: The name of the table.
+
+            * rules [[Tuple...]]: The rules, in the order they are applied.
+
+            * base=None [RenameTable | None]: The table applied before this one.
+
+            * keep_unmatched=True [Boolean]:
+                If a name no rule returned is kept. If False, it is dropped.
+        '''
+
+        self.name = name
+        self.rules = rules
+        self.base = base
+        self.keep_unmatched = keep_unmatched
+
+        self._steps = [compile_rule(rule) for rule in rules]
+        self._renamed = {}
+
+    def rename(self, attribute):
+        '''
+        Renames an attribute.
+
+        <ARGUMENTS>
+            * attribute [String | None]: The name of the attribute to be renamed.
+
+        <RETURN>
+            * [String | None]:
+                The renamed attribute, should it be one worth keeping.
+                None, otherwise.
+        '''
+
+        if attribute in self._renamed:
+            return self._renamed[attribute]
+
+        new_name = self._apply(attribute)
+        self._renamed[attribute] = new_name
+
+        return new_name
+
+    def find_unused_rules(self, attributes):
+        '''
+        Finds the rules which do not match any of some attributes.
+
+        <EXTENDED_DESCRIPTION>
+        Given every header found in the real data files, any rule listed is
+        either out of date, or never reached because of an earlier rule.
+
+        <ARGUMENTS>
+            * attributes [[String...]]: The names of the attributes to be renamed.
+
+        <RETURN>
+            * [[[String, Tuple]...]]:
+                The name of the table and the rule, for each rule in this table
+                (or its bases) which did not match.
+        '''
+
+        matched = set()
+        for attribute in attributes:
+            self._apply(attribute, matched)
+
+        unused = []
+        table = self
+        while table is not None:
+            for rule_idx, rule in enumerate(table.rules):
+                if (table.name, rule_idx) not in matched:
+                    unused.append([table.name, rule])
+
+            table = table.base
+
+        return unused
+
+    def _apply(self, attribute, matched=None):
+        if self.base is None:
+            new_name = attribute
+        else:
+            new_name = self.base._apply(attribute, matched)
+
+        if new_name is None:
+            return None
+
+        for rule_idx, step in enumerate(self._steps):
+            is_match, new_name, is_result = step(new_name)
+
+            if is_match and matched is not None:
+                matched.add((self.name, rule_idx))
+
+            if is_result:
+                if new_name is INVALID:
+                    print(f'Invalid {self.name} attribute:')
+                    print(attribute)
+                    exit()
+
+                return new_name
+
+        if not self.keep_unmatched:
+            return None
+
+        return new_name
+
+def compile_rule(rule):
+    '''
+    Compiles a rename rule into a function.
+
+    <ARGUMENTS>
+        * rule [Tuple]: The rule (See <rename_rules.py>).
+
+    <RETURN>
+        * [Function]:
+            The compiled rule.
+
+            <ARGUMENTS>:
+                * [String]: The name, as renamed by the previous rules.
+
+            <RETURN>:
+                * [Boolean]: If the rule matched the name.
+                * [String | None]: The new name.
+                * [Boolean]: If the new name is the result.
+
+    <RAISE>
+        * ValueError: If the rule is of an unknown kind.
+    '''
+
+    kind = rule[0]
+
+    if kind == "lower":
+        return lambda name: (True, name.lower(), False)
+
+    if kind == "words":
+        return lambda name: (True, "_".join(name.split()), False)
+
+    if kind == "replace":
+        old, new = rule[1], rule[2]
+        return lambda name: (old in name, name.replace(old, new), False)
+
+    if kind == "replace_pattern":
+        pattern, new = re.compile(rule[1]), rule[2]
+
+        def replace_pattern(name):
+            new_name, count = pattern.subn(new, name, count=1)
+            return (count != 0, new_name, False)
+
+        return replace_pattern
+
+    if kind == "exact":
+        names, result = as_tuple(rule[1]), rule[2]
+
+        def exact(name):
+            if name in names:
+                return (True, result, True)
+            return (False, name, False)
+
+        return exact
+
+    if kind == "contains":
+        parts, result = as_tuple(rule[1]), rule[2]
+
+        def contains(name):
+            for part in parts:
+                if part in name:
+                    return (True, result, True)
+            return (False, name, False)
+
+        return contains
+
+    if kind == "match":
+        pattern, result = re.compile(rule[1]), rule[2]
+
+        def match(name):
+            if pattern.search(name) is not None:
+                return (True, result, True)
+            return (False, name, False)
+
+        return match
+
+    if kind == "substitute":
+        old, new = rule[1], rule[2]
+
+        def substitute(name):
+            if old in name:
+                return (True, name.replace(old, new), True)
+            return (False, name, False)
+
+        return substitute
+
+    if kind == "rewrite":
+        parts, replacements = as_tuple(rule[1]), rule[2]
+
+        def rewrite(name):
+            for part in parts:
+                if part in name:
+                    for old, new in replacements:
+                        name = name.replace(old, new)
+                    return (True, name, True)
+            return (False, name, False)
+
+        return rewrite
+
+    if kind == "slice":
+        part, start = rule[1], rule[2]
+
+        def slice_name(name):
+            if part in name:
+                return (True, name[start:], True)
+            return (False, name, False)
+
+        return slice_name
+
+    if kind == "code":
+        pattern, codes = re.compile(rule[1]), rule[2]
+
+        def code(name):
+            search = pattern.search(name)
+            if search is None:
+                return (False, name, False)
+            return (True, codes.get(int(search.group(0)), INVALID), True)
+
+        return code
+
+    raise ValueError(f'Unknown rename rule: {rule}')
+
+def as_tuple(value):
+    if isinstance(value, tuple):
+        return value
+    return (value,)
+
+ATTRIBUTE = RenameTable("attribute", [
+    # Removes punctuation, replaces spaces with underlines, and converts all
+    # text to lowercase
+    ("lower",),
+    ("words",),
+    ("replace", ",", ""),
+    ("replace", "§", ""),
+    ("replace", "&", "and"),
+    ("replace", "district_name", "lea_name"),
+
+    ("exact", ("school_district", "district"), "lea_name"),
+    ("exact", ("schl", "school_number"), "school_id"),
+    ("exact", "school", "school_name"),
+])
+'''[RenameTable]: The rules common to every sheet, which the other tables build on.'''
+
+FAST_FACT = RenameTable("fast_fact", [
+    ("replace", "_-_percent_enrollment_by_student_groups", ""),
+    ("replace", "district_", "lea_"),
+    ("replace", "_-_percent_enrollment_by_race/ethnicity", ""),
+    ("replace", "district_", "lea"),
+    ("replace", "(", ""),
+    ("replace", ")", ""),
+
+    ("substitute", "2_or_more_races", "multiracial"),
+    ("contains", "gifted", "gifted"),
+    ("contains", "american_indian/alaskan_native", "ai_an"),
+    ("contains", "black/african_american", "african_american"),
+    ("contains", "english_learner", "english_learner"),
+    ("substitute", "career_and_technical_center", "ctc"),
+    ("contains", "native_hawaiian_or_other_pacific_islander", "nh_pi"),
+    ("contains", "enrollment_in", "ctc_enrollment"),
+    ("contains", "charter_school", "cs_enrollment"),
+    ("substitute", "intermediate_unit", "iu"),
+    ("contains", "geographic_size", "district_size"),
+    ("contains", "female_(school)", "female"),
+    ("contains", "male_(school)", "male"),
+    ("substitute", "(street)", "street"),
+    ("substitute", "(city)", "city"),
+    ("substitute", "(state)", "state"),
+    ("rewrite", "zip", [("zip_code", "address_zip")]),
+    ("substitute", "telephone_number", "telephone"),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules common to the School and District Fast Fact sheets.'''
+
+DISTRICT_FAST_FACT = RenameTable("district_fast_fact", [
+    ("exact", "website", "lea_website"),
+    ("exact", "telephone", "lea_telephone"),
+], base=FAST_FACT)
+'''[RenameTable]: The rules for District Fast Fact sheets.'''
+
+SCHOOL_FAST_FACT = RenameTable("school_fast_fact", [
+    ("exact", "website", "school_website"),
+    ("exact", "telephone", "school_telephone"),
+    ("exact", ("iu_website", "iu_name"), None),
+], base=FAST_FACT)
+'''[RenameTable]: The rules for School Fast Fact sheets.'''
+
+AFR_EXPENDITURE = RenameTable("afr_expenditure", [
+    ("contains", "actual_instruction_expense", None),
+
+    # Expenditures are named by their function code
+    ("code", r'\d{4}$', {
+        1000: "instruction",
+        1100: "regular_programs",
+        1200: "gifted_programs",
+        1300: "vocational_programs",
+        1400: "other_instructional",
+        1500: "nonpublic_programs",
+        1600: "adult_programs",
+        1700: "secondary_programs",
+        1800: "pre_k",
+        2000: "support_services",
+        2100: "personnel",
+        2200: "staff",
+        2300: "administration",
+        2400: "health",
+        2500: "business",
+        2600: "plant_ops",
+        2700: "transportation",
+        2800: "central",
+        2900: "other_support",
+        3000: "noninstructional_services",
+        4000: "facai",
+        5000: "oefu",
+    }),
+
+    ("exact", "aun", None),
+    ("contains", ("cuurent", "current"), None),
+    ("exact", ("ctgy", "cat"), None),
+    ("contains", "actual_instruction", None),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules for AFR Expenditure sheets.'''
+
+AFR_EXPENDITURE_ADM = RenameTable("afr_expenditure_adm", [
+    ("exact", ("aun", "ctgy", "cat"), None),
+
+    # Removes the school year (E.g. "2018-19_")
+    ("replace_pattern", r'^\d{4}\-\d{2}\_', ""),
+    ("replace", "memebership", "membership"),
+    ("replace", "average_daily_membership", "adm"),
+
+    ("exact", "adm", "adm"),
+    ("exact", "weighted_adm", "weighted_adm"),
+], base=ATTRIBUTE, keep_unmatched=False)
+'''[RenameTable]: The rules for AFR Expenditure per ADM sheets. Only the ADMs are kept.'''
+
+AFR_REVENUE = RenameTable("afr_revenue", [
+    ("contains", ("total_local", "%"), None),
+
+    # Revenues are named by their source code
+    ("code", r'\d{4}', {
+        6111: "local_taxes",
+        6500: "local_other",
+        7000: "state_revenue",
+        8000: "federal_revenue",
+        9000: "other_revenue",
+    }),
+
+    ("exact", "aun", None),
+    ("contains", ("cuurent", "current"), None),
+    ("exact", ("ctgy", "cat"), None),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules for AFR Revenue sheets.'''
+
+AFR_REVENUE_PER_ADM = RenameTable("afr_revenue_per_adm", [
+    ("exact", ("aun", "cat"), None),
+    ("contains", ("rank", "total"), None),
+    ("contains", "average_daily", "adm"),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules for AFR Revenue per ADM sheets.'''
+
+AFR_REVENUE_TCEM = RenameTable("afr_revenue_tcem", [
+    ("exact", "aun", None),
+    ("contains", ("total", "rank"), None),
+    ("slice", "steb", 5),
+    ("slice", "equalized", 8),
+    ("slice", "679", 4),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules for AFR Revenue Tax Collected & Equalized Millage sheets.'''
+
+AID_RATIO = RenameTable("aid_ratio", [
+    ("replace", "market_value", "mv"),
+    ("replace", "personal_income", "pi"),
+
+    ("exact", ("h", "aun", "fiscal_year"), None),
+    ("exact", "career_and_technology_center_(and_participating_sd)", "lea_name"),
+    ("contains", ("filter", "sort", "ctc_aun", "iu_aun", "cyber", "cs_aun"), None),
+    ("contains", ("july_2020", "percent"), None), # These only apply to 2020-2021
+    ("contains", "mv_/_pi", "mv_pi_aid_ratio"),
+    ("contains", "charter_school", "lea_name"),
+
+    ("replace", "wadm", "weighted_adm"),
+    ("match", r'^(?=.*weighted_adm)(?=.*(mv|pi))', None),
+    ("contains", "weighted_adm", "weighted_adm"),
+
+    ("match", r'^(?=.*ratio)(?=.*mv)', "mv_aid_ratio"),
+    ("match", r'^(?=.*ratio)(?=.*pi)', "pi_aid_ratio"),
+    ("contains", "ratio", INVALID),
+
+    ("contains", "mv", "mv"),
+    ("contains", "pi", "pi"),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules for Aid Ratio sheets.'''
+
+AID_RATIO_IU = RenameTable("aid_ratio_iu", [
+    ("exact", ("intermediate_unit_(and_participating_sd)", "lea_name"), "iu_name"),
+], base=AID_RATIO)
+'''[RenameTable]: The rules for Aid Ratio IU sheets.'''
+
+KEYSTONE = RenameTable("keystone", [
+    ("exact", ("year", "growth"), None),
+    ("contains", "2019", None),
+    ("contains", "below", "below_basic"),
+    ("contains", "basic", "basic"),
+    ("contains", "proficient", "proficient"),
+    ("contains", "advanced", "advanced"),
+
+    # Student groups
+    ("exact", "all_students", "all"),
+    ("exact", "economically_disadvantaged", "ed"),
+    ("exact", "historically_underperforming", "hu"),
+    ("exact", "student_group_name", "group"),
+    ("exact", ("n_scored", "number_scored"), "scored"),
+
+    # Subjects
+    ("exact", ("m", "algebra_i", "algebra_1"), "algebra"),
+    ("exact", "e", "literature"),
+    ("exact", "s", "biology"),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules for Keystone Exam sheets, along with their subjects and student groups.'''
+
+APD = RenameTable("apd", [
+    ("replace", "_-_", "_"),
+    ("replace", "/", "_"),
+    ("replace", ":", "_"),
+    ("replace", "-", "_"),
+    ("replace", "(", ""),
+    ("replace", ")", ""),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules for APD sheets.'''
+
+COHORT = RenameTable("cohort", [
+    ("substitute", "black", "african_american"),
+    ("substitute", "american_indian/alaskan_native", "ai_an"),
+    ("substitute", "american_indian/_alaskan_native", "ai_an"),
+    ("substitute", "aian", "ai_an"),
+    ("substitute", "native_hawaiian_or_pacific_islander", "nh_pi"),
+    ("substitute", "multi-racial", "multiracial"),
+    ("substitute", "sp_ed_", "special_ed_"),
+    ("rewrite", ("ell_", "el_"), [("ell_", "english_learner_"), ("el_", "english_learner_")]),
+    ("substitute", "econ_disadv_", "economically_disadvantaged_"),
+
+    ("exact", ("grades", "grads"), "total_grads"),
+    ("exact", ("cohort_grad_rate", "grad_rate", "total_grad_rate"), None), # unecessary because it can be calculated
+    ("exact", "lea", "lea_name"),
+    ("exact", "cohort", "total_cohort"),
+    ("exact", "school_number", "school_id"),
+    ("exact", "school", "school_name"),
+], base=ATTRIBUTE)
+'''[RenameTable]: The rules common to the Cohort LEA and School sheets.'''
+
+COHORT_LEA = RenameTable("cohort_lea", [
+    ("exact", "aun", None),
+], base=COHORT)
+'''[RenameTable]: The rules for Cohort LEA sheets.'''
+
+COHORT_LEA_FIX = RenameTable("cohort_lea_fix", [
+    ("exact", "lea_type", "aun"),
+    ("exact", "aun", "lea_name"),
+    ("exact", "lea", "lea_type"),
+], base=COHORT_LEA)
+'''[RenameTable]: The rules for the Cohort LEA sheet of Cohort_Four_Year_2012-2013, which misslabled the attributes.'''
+
+COHORT_SCHOOL = RenameTable("cohort_school", [
+    ("exact", "school_id", None),
+], base=COHORT)
+'''[RenameTable]: The rules for Cohort School sheets.'''
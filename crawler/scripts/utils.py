@@ -20,6 +20,21 @@ comprehensive documentation, see each class directly.
         A helper class to write statements both to the terminal and to
         a log file.
 
+    * LogBuffer(...):
+        A stand-in for a Logger that holds its statements until they are
+        flushed, so that worker threads do not interleave their output.
+
+    * HostLimiter(...):
+        Limits how many requests may be in flight to each host at once.
+
+    * CrawlManifest(...):
+        A persistent record of what was last fetched from each URL, used to
+        make conditional requests.
+
+    * TldResolver(...):
+        Resolves the fully qualified domain name of URLs without using the
+        network.
+
 
 <FUNCTIONS>
 This section only lists a brief description of each function. For more
@@ -30,16 +45,42 @@ comprehensive documentation, see each method directly.
 
     * detect_db_type(...):
         Determines the best SQLite3 data type (TEXT, REAL, INTEGER) to assign
-        to an column of openpyxl worksheet values.
+        to an column of sheet values.
 
     * detect_type(...):
         Casts a data value to the best Python3 data type detected.
 
+    * detect_types(...):
+        Casts a column of sheet values, and determines its best SQLite3 data
+        type, in a single pass.
+
     * detect_iuid(...):
         Detects an Intermediate Unit's (IU) ID number from its name.
+
+    * hash_file(...):
+        Hashes a file's content.
 '''
 
 import re
+import os
+import json
+import hashlib
+import threading
+import tldextract
+from pathlib import Path
+from urllib.parse import urlsplit
+
+HASH_CHUNK_SIZE = 1024 * 1024
+'''[Integer]: The number of bytes read at once when hashing a file.'''
+
+EMPTY_VALUES = frozenset(["", "na", "notavailable", "notapplicable", "insufficientsample", "is", "null", "--"])
+'''[Set]: The values (lowercase, without spaces) which mean a data value is empty.'''
+
+FLOAT_PATTERN = re.compile(r'^[+-]?(\d+(\.\d*)?|\.\d+)$')
+'''[re.Pattern]: Matches floating point values.'''
+
+PHONE_PATTERN = re.compile(r'\d{3}\-\d{3}\-\d{4}')
+'''[re.Pattern]: Matches phone numbers.'''
 
 class SheetDict:
     '''
@@ -113,6 +154,8 @@ class Logger:
 
         * warn(...): Writes a warning to both the terminal and log file.
 
+        * flush(...): Writes the contents of a LogBuffer.
+
         * close(): Closes the log file being written to.
     '''
 
@@ -123,6 +166,9 @@ class Logger:
     indentation = 0
     '''The current level of text indentation.'''
 
+    lock = None
+    '''Guards the terminal and log file against concurrent writes.'''
+
     def __init__(self, log_file_path):
         '''
         The constructor for a Logger.
@@ -132,6 +178,7 @@ class Logger:
                 The path to the log file to be written to.
         '''
         self.log_file = open(log_file_path, "a+")
+        self.lock = threading.RLock()
 
     def indent(self):
         '''
@@ -152,8 +199,9 @@ class Logger:
         Moves the terminal and log file to the next line.
         '''
 
-        print("")
-        self.log_file.write("\n")
+        with self.lock:
+            print("")
+            self.log_file.write("\n")
 
     def write(self, message):
         '''
@@ -168,8 +216,9 @@ class Logger:
 
         indented_message = ("  " * self.indentation) +  message
 
-        print(indented_message)
-        self.log_file.write(indented_message + "\n")
+        with self.lock:
+            print(indented_message)
+            self.log_file.write(indented_message + "\n")
 
     def warn(self, message):
         '''
@@ -181,8 +230,37 @@ class Logger:
         <ARGUMENTS>
             * message [Any]: The message to write.
         '''
-        print(f' =============== {message} ===============')
-        self.log_file.write(f' =============== {message} ===============')
+        with self.lock:
+            print(f' =============== {message} ===============')
+            self.log_file.write(f' =============== {message} ===============')
+
+    def flush(self, buffer):
+        '''
+        Writes the contents of a LogBuffer.
+
+        <EXTENDED_DESCRIPTION>
+        The buffered statements are written all at once, relative to the current
+        indentation level, so that they appear as one uninterrupted block.
+
+        <ARGUMENTS>
+            * buffer [LogBuffer]: The buffer to be written.
+        '''
+
+        with self.lock:
+            base_indentation = self.indentation
+
+            for kind, indentation, message in buffer.lines:
+                self.indentation = base_indentation + indentation
+
+                if kind == "write":
+                    self.write(message)
+                elif kind == "warn":
+                    self.warn(message)
+                else:
+                    self.newline()
+
+            self.indentation = base_indentation
+            buffer.lines = []
 
     def close(self):
         '''
@@ -190,6 +268,417 @@ class Logger:
         '''
         self.log_file.close()
 
+class LogBuffer:
+    '''
+    A stand-in for a Logger that holds its statements until they are flushed,
+    so that worker threads do not interleave their output.
+
+    <EXTENDED_DESCRIPTION>
+    A LogBuffer provides the same writing functions as a Logger. Once the work
+    is done, the buffer should be passed to @Logger.flush(...).
+
+    <ATTRIBUTES>
+        * lines [[(String, Integer, String)...]]:
+            The buffered statements, as (kind, indentation, message).
+
+        * indentation [Integer]:
+            The current level of text indentation, relative to the Logger.
+
+    <FUNCTIONS>
+        * __init__(): The constructor for a LogBuffer.
+
+        * indent(): Increments the indentation level.
+
+        * unindent(): Decrements the indentation level.
+
+        * newline(): Buffers a blank line.
+
+        * write(...): Buffers a message.
+
+        * warn(...): Buffers a warning.
+
+        * flush(...): Buffers the contents of another LogBuffer.
+    '''
+
+    lines = None
+    '''The buffered statements, as (kind, indentation, message).'''
+
+    indentation = 0
+    '''The current level of text indentation, relative to the Logger.'''
+
+    def __init__(self):
+        '''
+        The constructor for a LogBuffer.
+        '''
+
+        self.lines = []
+
+    def indent(self):
+        '''
+        Increments the indentation level.
+        '''
+
+        self.indentation += 1
+
+    def unindent(self):
+        '''
+        Decrements the indentation level.
+        '''
+
+        self.indentation -= 1
+
+    def newline(self):
+        '''
+        Buffers a blank line.
+        '''
+
+        self.lines.append(("newline", self.indentation, ""))
+
+    def write(self, message):
+        '''
+        Buffers a message.
+
+        <ARGUMENTS>
+            * message [Any]: The message to write.
+        '''
+
+        self.lines.append(("write", self.indentation, message))
+
+    def warn(self, message):
+        '''
+        Buffers a warning.
+
+        <ARGUMENTS>
+            * message [Any]: The message to write.
+        '''
+
+        self.lines.append(("warn", self.indentation, message))
+
+    def flush(self, buffer):
+        '''
+        Buffers the contents of another LogBuffer.
+
+        <EXTENDED_DESCRIPTION>
+        The statements are buffered relative to the current indentation level,
+        as @Logger.flush(...) would write them.
+
+        <ARGUMENTS>
+            * buffer [LogBuffer]: The buffer to be added.
+        '''
+
+        for kind, indentation, message in buffer.lines:
+            self.lines.append((kind, self.indentation + indentation, message))
+
+        buffer.lines = []
+
+class HostLimiter:
+    '''
+    Limits how many requests may be in flight to each host at once.
+
+    <EXTENDED_DESCRIPTION>
+    Hosts are grouped by the first key of the limits which is found in their
+    name. E.g., with the limits {"pa.gov": 4}, both "www.education.pa.gov" and
+    "www.pa.gov" will share the same 4 slots. Hosts matching no key are each
+    given the default limit.
+
+    <ATTRIBUTES>
+        * limits [Dictionary]:
+            The maximum number of concurrent requests for each host key.
+
+        * default_limit [Integer]:
+            The maximum number of concurrent requests to any other host.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a HostLimiter.
+
+        * get_host_key(...): Determines which group of slots a URL belongs to.
+
+        * slot(...): Reserves a slot for a URL's host.
+    '''
+
+    limits = None
+    '''The maximum number of concurrent requests for each host key.'''
+
+    default_limit = 1
+    '''The maximum number of concurrent requests to any other host.'''
+
+    def __init__(self, limits, default_limit=1):
+        '''
+        The constructor for a HostLimiter.
+
+        <ARGUMENTS>
+            * limits [Dictionary]:
+                The maximum number of concurrent requests for each host key.
+
+            * default_limit=1 [Integer]:
+                The maximum number of concurrent requests to any other host.
+        '''
+
+        self.limits = limits
+        self.default_limit = default_limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def get_host_key(self, url):
+        '''
+        Determines which group of slots a URL belongs to.
+
+        <ARGUMENTS>
+            * url [String]: The URL being requested.
+
+        <RETURN>
+            * [String]: The host key.
+        '''
+
+        host = urlsplit(url).hostname or ""
+
+        for key in self.limits:
+            if key in host:
+                return key
+
+        return host
+
+    def slot(self, url):
+        '''
+        Reserves a slot for a URL's host.
+
+        <EXTENDED_DESCRIPTION>
+        Intended to be used as a context manager, e.g. "with limiter.slot(url):".
+        Blocks until a slot is available.
+
+        <ARGUMENTS>
+            * url [String]: The URL being requested.
+
+        <RETURN>
+            * [threading.Semaphore]: The host's semaphore.
+        '''
+
+        key = self.get_host_key(url)
+
+        with self._lock:
+            if key not in self._semaphores:
+                limit = self.limits.get(key, self.default_limit)
+                self._semaphores[key] = threading.BoundedSemaphore(limit)
+
+            return self._semaphores[key]
+
+class CrawlManifest:
+    '''
+    A persistent record of what was last fetched from each URL, used to make
+    conditional requests.
+
+    <EXTENDED_DESCRIPTION>
+    The manifest is a JSON file mapping each URL to an entry describing its
+    last successful response. Each entry may contain:
+
+        * "etag": The response's ETag header.
+
+        * "last_modified": The response's Last-Modified header.
+
+        * "content_length": The number of bytes in the response's content.
+
+        * "sha256": The SHA-256 hash of the response's content.
+
+    Each script may store additional fields in an entry (e.g. the path the
+    file was written to). Entries are safe to read and update from multiple
+    threads.
+
+    <ATTRIBUTES>
+        * path [String | None]:
+            The path to the manifest file. If None, nothing is persisted.
+
+        * entries [Dictionary]:
+            The entry for each URL.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a CrawlManifest.
+
+        * get(...): Returns a copy of a URL's entry.
+
+        * update(...): Records a new response for a URL.
+
+        * conditional_headers(...): Builds the headers for a conditional request.
+
+        * save(): Writes the manifest to its file.
+    '''
+
+    path = None
+    '''[String | None]: The path to the manifest file.'''
+
+    entries = None
+    '''[Dictionary]: The entry for each URL.'''
+
+    def __init__(self, path):
+        '''
+        The constructor for a CrawlManifest.
+
+        <EXTENDED_DESCRIPTION>
+        Loads the manifest file, should it exist.
+
+        <ARGUMENTS>
+            * path [String | None]:
+                The path to the manifest file. If None, nothing is persisted.
+        '''
+
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as manifest_file:
+                self.entries = json.load(manifest_file)
+
+    def get(self, url):
+        '''
+        Returns a copy of a URL's entry.
+
+        <ARGUMENTS>
+            * url [String]: The URL that was requested.
+
+        <RETURN>
+            * [Dictionary | None]:
+                The URL's entry, if one exists.
+                None, otherwise.
+        '''
+
+        with self._lock:
+            entry = self.entries.get(url)
+            return None if entry is None else dict(entry)
+
+    def update(self, url, request, **fields):
+        '''
+        Records a new response for a URL.
+
+        <ARGUMENTS>
+            * url [String]: The URL that was requested.
+
+            * request [Request]: The response received.
+
+            * **fields [Any]:
+                Any additional fields to store, including "content_length"
+                and "sha256".
+        '''
+
+        entry = {
+            "etag": request.headers.get("etag"),
+            "last_modified": request.headers.get("last-modified"),
+        }
+        entry.update(fields)
+
+        with self._lock:
+            self.entries[url] = entry
+
+    def conditional_headers(self, url):
+        '''
+        Builds the headers for a conditional request.
+
+        <ARGUMENTS>
+            * url [String]: The URL to be requested.
+
+        <RETURN>
+            * [Dictionary]:
+                The If-None-Match / If-Modified-Since headers, based on the
+                URL's entry. Empty, if there is no entry.
+        '''
+
+        entry = self.get(url)
+        headers = {}
+
+        if entry is None:
+            return headers
+
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def save(self):
+        '''
+        Writes the manifest to its file.
+
+        <EXTENDED_DESCRIPTION>
+        The manifest is written to a temporary file first, and then renamed,
+        so that an interrupted save cannot corrupt it.
+        '''
+
+        if self.path is None:
+            return
+
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as manifest_file:
+                json.dump(self.entries, manifest_file, indent=1, sort_keys=True)
+
+            os.replace(temp_path, self.path)
+
+class TldResolver:
+    '''
+    Resolves the fully qualified domain name of URLs without using the network.
+
+    <EXTENDED_DESCRIPTION>
+    By default, tldextract downloads the latest Public Suffix List the first
+    time it is used. Instead, the snapshot bundled with tldextract is used, or
+    a local copy of the list should one be given. Results are memoized by
+    host, so each host is only resolved once.
+
+    <ATTRIBUTES>
+        * suffix_list_file [String | None]:
+            The path to a local copy of the Public Suffix List. If None, the
+            snapshot bundled with tldextract is used.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a TldResolver.
+
+        * get_fqdn(...): Determines the fully qualified domain name of a URL.
+    '''
+
+    suffix_list_file = None
+    '''[String | None]: The path to a local copy of the Public Suffix List.'''
+
+    def __init__(self, suffix_list_file=None):
+        '''
+        The constructor for a TldResolver.
+
+        <ARGUMENTS>
+            * suffix_list_file=None [String | None]:
+                The path to a local copy of the Public Suffix List. If None,
+                the snapshot bundled with tldextract is used.
+        '''
+
+        self.suffix_list_file = suffix_list_file
+
+        if suffix_list_file is None:
+            suffix_list_urls = ()
+        else:
+            suffix_list_urls = (Path(suffix_list_file).resolve().as_uri(),)
+
+        # No cache directory, so nothing is read from or written to the disk
+        self._extract = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=suffix_list_urls, fallback_to_snapshot=True)
+        self._fqdns = {}
+        self._lock = threading.Lock()
+
+    def get_fqdn(self, url):
+        '''
+        Determines the fully qualified domain name of a URL.
+
+        <ARGUMENTS>
+            * url [String]: The URL to resolve.
+
+        <RETURN>
+            * [String]: The fully qualified domain name, e.g.
+                "www.education.pa.gov". Empty if the host has no known suffix.
+        '''
+
+        host = urlsplit(url).hostname or ""
+
+        with self._lock:
+            if host not in self._fqdns:
+                self._fqdns[host] = self._extract(host).fqdn
+
+            return self._fqdns[host]
+
 def detect_year(filename):
     '''
     Determines the academic year for which a file describes.
@@ -220,13 +709,13 @@ def detect_year(filename):
 def detect_db_type(col):
     '''
     Determines the best SQLite3 data type (TEXT, REAL, INTEGER) to assign
-    to an column of openpyxl sheet values.
+    to an column of sheet values.
 
     <ENTENDED_DESCRIPTION>
     The data type assigment prioritizes [INTEGER > REAL > TEXT].
 
     <ARGUMENTS>
-        * col [Generator]: An openpyxl sheet column.
+        * col [Iterable]: A sheet column's values, starting with its header.
 
     <RETURN>
         * [String]: The best SQLite3 data type to describe the column.
@@ -234,14 +723,12 @@ def detect_db_type(col):
 
     possible_type = "INTEGER"
 
+    values = iter(col)
+    next(values, None) # Skips the header
 
-    for cellIdx, cell in enumerate(col):
-        if cellIdx == 0:
-            continue
-
-        val = cell.value
-
-        if val is None:
+    for val in values:
+        # Integers, the most common values, can never change the type
+        if val is None or type(val) is int:
             continue
         if isinstance(val, str):
             return "TEXT"
@@ -270,7 +757,7 @@ def detect_type(value):
     new_value = value.strip()
     lower_value = new_value.lower().replace(" ", "")
 
-    if lower_value in ["", "na", "notavailable", "notapplicable", "insufficientsample", "is", "null", "--"]:
+    if lower_value in EMPTY_VALUES:
         return None
     if "duetocohortsize" in lower_value:
         return None
@@ -279,15 +766,57 @@ def detect_type(value):
         return int(new_value)
 
     # Matches floating point value
-    if bool(re.match(r'^[+-]?(\d+(\.\d*)?|\.\d+)$', new_value)):
+    if FLOAT_PATTERN.match(new_value):
         return float(new_value)
 
     # Matches phone number
-    if bool(re.match(r'\d{3}\-\d{3}\-\d{4}', new_value)):
+    if PHONE_PATTERN.match(new_value):
         return int(new_value[0:3] + new_value[4:7] + new_value[8:12])
 
     return new_value
 
+def detect_types(col):
+    '''
+    Casts a column of sheet values, and determines its best SQLite3 data type,
+    in a single pass.
+
+    <EXTENDED_DESCRIPTION>
+    Equivalent to casting each value with @detect_type(...), and determining
+    the column's type with @detect_db_type(...), but faster. Values which are
+    not text are passed through untouched, and each distinct text value in the
+    column is only cast once.
+
+    <ARGUMENTS>
+        * col [Iterable]: A sheet column's values, starting with its header.
+
+    <RETURN>
+        * [List]: The column's cast values, including its header.
+
+        * [String]: The best SQLite3 data type to describe the column.
+    '''
+
+    values = []
+    possible_type = "INTEGER"
+    cast_text = {}
+
+    for cellIdx, val in enumerate(col):
+        if not isinstance(val, str):
+            if cellIdx != 0 and val is not None and possible_type != "TEXT" and not int(val) == val:
+                possible_type = "REAL"
+
+            values.append(val)
+            continue
+
+        if cellIdx != 0:
+            possible_type = "TEXT"
+
+        if val not in cast_text:
+            cast_text[val] = detect_type(val)
+
+        values.append(cast_text[val])
+
+    return values, possible_type
+
 def detect_iuid(iu_name):
     '''
     Detects an Intermediate Unit's (IU) ID number from its name.
@@ -306,4 +835,23 @@ def detect_iuid(iu_name):
     if len(digits) != 1:
         raise ValueError("COULD NOT DETERMINE YEAR!!")
 
-    return int(digits[0])
\ No newline at end of file
+    return int(digits[0])
+
+def hash_file(path):
+    '''
+    Hashes a file's content.
+
+    <ARGUMENTS>
+        * path [String]: The path to the file.
+
+    <RETURN>
+        * [String]: The SHA-256 hash of the file's content.
+    '''
+
+    sha256 = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
@@ -0,0 +1,577 @@
+'''
+<FILE>
+workbook_io.py
+
+
+<DESCRIPTION>
+The purpose of this script is to read and write workbooks quickly, and with
+little memory.
+
+By default, openpyxl loads every cell of a workbook into memory as an object
+before any of it can be read. The data files are only ever read from top to
+bottom, so they are instead opened in openpyxl's read-only mode, which streams
+each sheet's rows from the file as plain tuples of values.
+
+Unlike a fully loaded sheet, the rows of a streamed sheet are not all the same
+width: each only extends to its last stored value. The functions below pad the
+rows, so that they can be indexed by column the same way cells could be.
+
+Legacy .xls workbooks may also be read directly, through xlrd, rather than
+first being converted to .xlsx (See <XlsWorkbook>). They are read through the
+same interface as a read-only openpyxl workbook, and give the same values as
+their conversion would.
+
+The workbooks passed between the data processing scripts may be written in
+one of several formats (See FILE_FORMATS), chosen by their extension:
+
+    * "xlsx":
+        An Excel workbook. Slow to write and read, as every sheet is zipped
+        XML, but can be opened by any spreadsheet program.
+
+    * "sqlite":
+        A SQLite3 database, with a table for each sheet. Each table's columns
+        are named by position (c1, c2, ...), and its first row is the header,
+        so that a sheet is stored exactly as it would be laid out in Excel.
+
+Whatever their format, workbooks are read through @open_workbook(...).
+
+
+<CLASSES>
+This section only lists a brief description of each class. For more
+comprehensive documentation, see each class directly.
+
+    * XlsWorkbook(...):
+        A legacy .xls workbook, read like a read-only openpyxl Workbook.
+
+    * XlsSheet(...):
+        A sheet of a legacy .xls workbook, read like a read-only openpyxl Sheet.
+
+    * SqliteWorkbook(...):
+        A workbook stored as a SQLite3 database, read like a read-only openpyxl Workbook.
+
+    * SqliteSheet(...):
+        A sheet stored as a SQLite3 table, read like a read-only openpyxl Sheet.
+
+
+<FUNCTIONS>
+This section only lists a brief description of each function. For more
+comprehensive documentation, see each method directly.
+
+    * open_workbook(...): Opens a workbook for reading.
+
+    * read_rows(...): Streams the rows of a sheet.
+
+    * read_sheet(...): Reads an entire sheet into memory.
+
+    * write_workbook(...): Writes a workbook to file, in the format given by its extension.
+
+    * write_xlsx(...): Streams a workbook to an Excel file.
+
+    * write_sqlite(...): Writes a workbook to a SQLite3 database.
+
+    * is_xls(...): Determines if a file is an .xls workbook which can be read directly.
+
+    * convert_xls_value(...): Converts an xlrd cell's value to what openpyxl would read once converted.
+'''
+
+import os
+import datetime
+import sqlite3
+import openpyxl
+import xlrd
+
+FILE_FORMATS = ["xlsx", "sqlite"]
+'''[[String...]]: The formats a workbook may be written in, by their extension.'''
+
+DEFAULT_FILE_FORMAT = "xlsx"
+'''[String]: The format workbooks are written in, unless another is chosen.'''
+
+def open_workbook(path):
+    '''
+    Opens a workbook for reading.
+
+    <EXTENDED_DESCRIPTION>
+    The workbook is opened in read-only mode, so it must be closed once it has
+    been read. Its sheets may only be read through @read_rows(...) and
+    @read_sheet(...) (or openpyxl's iter_rows(...)).
+
+    Legacy .xls workbooks are opened as an <XlsWorkbook>, and SQLite3
+    databases as a <SqliteWorkbook>.
+
+    <ARGUMENTS>
+        * path [String]: The path to the workbook.
+
+    <RETURN>
+        * [openpyxl Workbook | XlsWorkbook | SqliteWorkbook]: The read-only workbook.
+    '''
+
+    if path.lower().endswith(".xls"):
+        return XlsWorkbook(path)
+
+    if path.endswith(".sqlite"):
+        return SqliteWorkbook(path)
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+
+    # Some programs record the wrong size for a sheet, which would cut rows
+    # short when streaming. The size is instead found while reading.
+    for sheet in wb.worksheets:
+        sheet.reset_dimensions()
+
+    return wb
+
+def read_rows(sheet, skip_rows=0, skip_cols=0, width=0):
+    '''
+    Streams the rows of a sheet.
+
+    <EXTENDED_DESCRIPTION>
+    The first row read is taken to be the header. Every row is padded with None
+    to at least the width of the header, so each of the header's columns can be
+    looked up in every row.
+
+    <ARGUMENTS>
+        * sheet [openpyxl Sheet]: The sheet to be read.
+
+        * skip_rows=0 [Integer]: The number of leading rows to skip.
+
+        * skip_cols=0 [Integer]: The number of leading columns to skip.
+
+        * width=0 [Integer]:
+            The minimum width of each row. Used by sheets whose columns are
+            looked up by position rather than by header.
+
+    <RETURN>
+        * [Generator]: The rows of the sheet, as tuples of values.
+    '''
+
+    header = True
+    for row_idx, row in enumerate(sheet.iter_rows(values_only=True)):
+        if row_idx < skip_rows:
+            continue
+
+        row = tuple(row[skip_cols:])
+
+        if header:
+            header = False
+            width = max(width, len(row))
+
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+
+        yield row
+
+def read_sheet(sheet):
+    '''
+    Reads an entire sheet into memory.
+
+    <EXTENDED_DESCRIPTION>
+    Only the values are kept, which take a fraction of the memory of openpyxl's
+    cells. Every row is padded with None to the width of the widest row, so the
+    sheet's columns can be read with zip(*rows).
+
+    <ARGUMENTS>
+        * sheet [openpyxl Sheet]: The sheet to be read.
+
+    <RETURN>
+        * [[Tuple...]]: The rows of the sheet, as tuples of values.
+    '''
+
+    rows = [tuple(row) for row in sheet.iter_rows(values_only=True)]
+    width = max((len(row) for row in rows), default=0)
+
+    return [row + (None,) * (width - len(row)) for row in rows]
+
+def write_workbook(path, sheets):
+    '''
+    Writes a workbook to file, in the format given by its extension.
+
+    <EXTENDED_DESCRIPTION>
+    Any workbook of the same name in another format is removed, so that an
+    earlier run in a different format is not read in place of this one.
+
+    <ARGUMENTS>
+        * path [String]: The path to the workbook. Its extension is one of FILE_FORMATS.
+
+        * sheets [[(String, Iterable)...]]:
+            The title and rows of each sheet, in order. Each row is a sequence
+            of values, starting from the first column. The rows are only
+            iterated once, as they are written, so they may be generated.
+
+    <RAISE>
+        * ValueError: If the path's extension is not one of FILE_FORMATS.
+    '''
+
+    stem, extension = os.path.splitext(path)
+    file_format = extension[1:]
+
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f'Invalid file format: {file_format}. Must be <{", ".join(FILE_FORMATS)}>')
+
+    for other_format in FILE_FORMATS:
+        if other_format != file_format and os.path.exists(stem + "." + other_format):
+            os.remove(stem + "." + other_format)
+
+    if file_format == "sqlite":
+        write_sqlite(path, sheets)
+    else:
+        write_xlsx(path, sheets)
+
+def write_xlsx(path, sheets):
+    '''
+    Streams a workbook to an Excel file.
+
+    <EXTENDED_DESCRIPTION>
+    The workbook is written in openpyxl's write-only mode, so each row is
+    written out as it is appended, rather than every cell being kept in memory
+    until the workbook is saved. Empty cells are not written.
+
+    <ARGUMENTS>
+        * path [String]: The path to the workbook.
+
+        * sheets [[(String, Iterable)...]]: The title and rows of each sheet, in order.
+    '''
+
+    wb = openpyxl.Workbook(write_only=True)
+
+    for title, rows in sheets:
+        sheet = wb.create_sheet(title=title)
+
+        for row in rows:
+            sheet.append(row)
+
+    wb.save(path)
+    wb.close()
+
+def write_sqlite(path, sheets):
+    '''
+    Writes a workbook to a SQLite3 database.
+
+    <EXTENDED_DESCRIPTION>
+    Each sheet is written to a table named by its title, with as many columns
+    as the sheet's widest row (not counting empty cells at the end of a row).
+    Values other than numbers and text (E.g. dates) are stored as text.
+
+    The database is only a copy of data which can be rebuilt, so it is written
+    without a journal.
+
+    <ARGUMENTS>
+        * path [String]: The path to the database.
+
+        * sheets [[(String, Iterable)...]]: The title and rows of each sheet, in order.
+    '''
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode = OFF;")
+    con.execute("PRAGMA synchronous = OFF;")
+
+    for title, rows in sheets:
+        table = quote_identifier(title)
+        con.execute(f'CREATE TABLE {table} (c1);')
+
+        width = 1
+        batch = []
+
+        for row in rows:
+            values = [value if value is None or isinstance(value, (int, float, str)) else str(value) for value in row]
+            while len(values) > 0 and values[-1] is None:
+                values.pop()
+
+            if len(values) > width:
+                insert_sqlite_rows(con, table, width, batch)
+                batch = []
+
+                for column in range(width + 1, len(values) + 1):
+                    con.execute(f'ALTER TABLE {table} ADD COLUMN c{column};')
+                width = len(values)
+
+            batch.append(values + [None] * (width - len(values)))
+
+        insert_sqlite_rows(con, table, width, batch)
+
+    con.commit()
+    con.close()
+
+def insert_sqlite_rows(con, table, width, rows):
+    # Rows are inserted in order, so the rowid keeps the order of the sheet
+    con.executemany(f'INSERT INTO {table} VALUES ({", ".join("?" * width)});', rows)
+
+def quote_identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+class XlsWorkbook:
+    '''
+    A legacy .xls workbook, read like a read-only openpyxl Workbook.
+
+    <EXTENDED_DESCRIPTION>
+    The workbook is opened on demand, so each sheet is only loaded by xlrd once
+    it is read, and is released again afterwards.
+
+    <ATTRIBUTES>
+        * worksheets [[XlsSheet...]]: The sheets of the workbook, in order.
+
+        * active [XlsSheet]:
+            The first sheet, which is the active sheet of a converted workbook.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for an XlsWorkbook.
+
+        * close(): Closes the workbook.
+    '''
+
+    worksheets = None
+    '''[[XlsSheet...]]: The sheets of the workbook, in order.'''
+
+    active = None
+    '''[XlsSheet]: The first sheet.'''
+
+    def __init__(self, path):
+        '''
+        The constructor for an XlsWorkbook.
+
+        <ARGUMENTS>
+            * path [String]: The path to the workbook.
+        '''
+
+        # Formatting is read, so that styled blank cells count towards the size
+        # of each sheet, just as they do once converted
+        self._book = xlrd.open_workbook(path, on_demand=True, formatting_info=True)
+        self.worksheets = [XlsSheet(self._book, idx) for idx in range(self._book.nsheets)]
+        self.active = self.worksheets[0] if len(self.worksheets) > 0 else None
+
+    def close(self):
+        '''
+        Closes the workbook.
+        '''
+
+        self._book.release_resources()
+
+class XlsSheet:
+    '''
+    A sheet of a legacy .xls workbook, read like a read-only openpyxl Sheet.
+
+    <EXTENDED_DESCRIPTION>
+    Each value is given as it would be read from the workbook once converted by
+    xls2xlsx: whole numbers as integers, dates as datetimes, booleans and
+    errors as text, and empty cells as None. Every row is as wide as the sheet.
+
+    <ATTRIBUTES>
+        * title [String]: The name of the sheet.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for an XlsSheet.
+
+        * iter_rows(...): Reads the rows of the sheet.
+
+        * reset_dimensions(): Does nothing, as xlrd finds the size of the sheet itself.
+    '''
+
+    title = None
+    '''[String]: The name of the sheet.'''
+
+    def __init__(self, book, idx):
+        '''
+        The constructor for an XlsSheet.
+
+        <ARGUMENTS>
+            * book [xlrd Book]: The workbook, opened on demand.
+
+            * idx [Integer]: The index of the sheet in the workbook.
+        '''
+
+        self._book = book
+        self._idx = idx
+        self.title = book.sheet_names()[idx]
+
+    def iter_rows(self, values_only=True):
+        '''
+        Reads the rows of the sheet.
+
+        <ARGUMENTS>
+            * values_only=True [Boolean]:
+                Must be True, as only the values of the cells can be read.
+
+        <RETURN>
+            * [Generator]: The rows of the sheet, as tuples of values.
+        '''
+
+        if not values_only:
+            raise ValueError("Only the values of an .xls sheet can be read")
+
+        sheet = self._book.sheet_by_index(self._idx)
+
+        try:
+            for row_idx in range(sheet.nrows):
+                yield tuple(
+                    convert_xls_value(cell_type, value, self._book.datemode)
+                    for cell_type, value in zip(sheet.row_types(row_idx), sheet.row_values(row_idx))
+                )
+        finally:
+            self._book.unload_sheet(self._idx)
+
+    def reset_dimensions(self):
+        '''
+        Does nothing, as xlrd finds the size of the sheet itself.
+        '''
+
+def is_xls(path):
+    '''
+    Determines if a file is an .xls workbook which can be read directly.
+
+    <EXTENDED_DESCRIPTION>
+    Some files published as .xls are really HTML tables, which xlrd cannot
+    read. These must still be converted (See xls2xlsx).
+
+    <ARGUMENTS>
+        * path [String]: The path to the file.
+
+    <RETURN>
+        * [Boolean]: If the file is a legacy Excel workbook.
+    '''
+
+    with open(path, "rb") as file:
+        return file.read(len(xlrd.compdoc.SIGNATURE)) == xlrd.compdoc.SIGNATURE
+
+def convert_xls_value(cell_type, value, datemode):
+    '''
+    Converts an xlrd cell's value to what openpyxl would read once converted.
+
+    <ARGUMENTS>
+        * cell_type [Integer]: The xlrd type of the cell.
+
+        * value [Object]: The xlrd value of the cell.
+
+        * datemode [Integer]: The date system of the workbook.
+
+    <RETURN>
+        * [Object]: The value of the cell.
+    '''
+
+    if cell_type == xlrd.XL_CELL_NUMBER:
+        if value == int(value):
+            return int(value)
+        return value
+
+    if cell_type in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK) or value == "":
+        return None
+
+    if cell_type == xlrd.XL_CELL_DATE:
+        try:
+            date_tuple = xlrd.xldate_as_tuple(value, datemode)
+        except Exception: # Bad dates are kept as numbers
+            return value
+
+        if date_tuple == (0, 0, 0, 0, 0, 0):
+            return datetime.datetime(1900, 1, 1)
+        if date_tuple[0:3] == (0, 0, 0):
+            return datetime.time(*date_tuple[3:6])
+        return datetime.datetime(*date_tuple)
+
+    if cell_type == xlrd.XL_CELL_ERROR:
+        return xlrd.biffh.error_text_from_code.get(value, "#N/A")
+
+    if cell_type == xlrd.XL_CELL_BOOLEAN:
+        return ("false", "true")[value]
+
+    return value
+
+class SqliteWorkbook:
+    '''
+    A workbook stored as a SQLite3 database, read like a read-only openpyxl Workbook.
+
+    <EXTENDED_DESCRIPTION>
+    See @write_sqlite(...) for how a workbook is stored.
+
+    <ATTRIBUTES>
+        * worksheets [[SqliteSheet...]]: The sheets of the workbook, in order.
+
+        * active [SqliteSheet]: The first sheet.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a SqliteWorkbook.
+
+        * close(): Closes the workbook.
+    '''
+
+    worksheets = None
+    '''[[SqliteSheet...]]: The sheets of the workbook, in order.'''
+
+    active = None
+    '''[SqliteSheet]: The first sheet.'''
+
+    def __init__(self, path):
+        '''
+        The constructor for a SqliteWorkbook.
+
+        <ARGUMENTS>
+            * path [String]: The path to the database.
+        '''
+
+        self._con = sqlite3.connect(path)
+
+        # Tables are listed in the order they were created
+        titles = [name for (name,) in self._con.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY rowid;")]
+        self.worksheets = [SqliteSheet(self._con, title) for title in titles]
+        self.active = self.worksheets[0] if len(self.worksheets) > 0 else None
+
+    def close(self):
+        '''
+        Closes the workbook.
+        '''
+
+        self._con.close()
+
+class SqliteSheet:
+    '''
+    A sheet stored as a SQLite3 table, read like a read-only openpyxl Sheet.
+
+    <ATTRIBUTES>
+        * title [String]: The name of the sheet.
+
+    <FUNCTIONS>
+        * __init__(...): The constructor for a SqliteSheet.
+
+        * iter_rows(...): Reads the rows of the sheet.
+
+        * reset_dimensions(): Does nothing, as every row of a table is the same width.
+    '''
+
+    title = None
+    '''[String]: The name of the sheet.'''
+
+    def __init__(self, con, title):
+        '''
+        The constructor for a SqliteSheet.
+
+        <ARGUMENTS>
+            * con [sqlite3 Connection]: The connection to the database.
+
+            * title [String]: The name of the sheet's table.
+        '''
+
+        self._con = con
+        self.title = title
+
+    def iter_rows(self, values_only=True):
+        '''
+        Reads the rows of the sheet.
+
+        <ARGUMENTS>
+            * values_only=True [Boolean]:
+                Must be True, as only the values of the cells are stored.
+
+        <RETURN>
+            * [Generator]: The rows of the sheet, as tuples of values.
+        '''
+
+        if not values_only:
+            raise ValueError("Only the values of a SQLite3 sheet can be read")
+
+        yield from self._con.execute(f'SELECT * FROM {quote_identifier(self.title)} ORDER BY rowid;')
+
+    def reset_dimensions(self):
+        '''
+        Does nothing, as every row of a table is the same width.
+        '''
@@ -0,0 +1,137 @@
+'''
+<FILE>
+test_build_cache.py
+
+
+<DESCRIPTION>
+Tests for <build_cache.py>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from pathlib import Path
+from scripts import build_cache
+from scripts.build_cache import BuildCache, get_code_version, list_inputs
+from scripts.utils import hash_file
+
+class BuildCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.directory = self._temp.name
+        self.cache_file = self.directory + "/build-cache/clean_data.json"
+
+        self.input = self.directory + "/Aid_Ratios_2015.xlsx"
+        self.output = self.directory + "/Aid_Ratios.xlsx"
+        Path(self.input).write_bytes(b"aid ratios")
+        Path(self.output).write_bytes(b"clean aid ratios")
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    # Builds the output, as recorded by a cache of the given code version
+    def build(self, version):
+        cache = BuildCache(self.cache_file, version)
+        cache.update("Aid_Ratios", cache.hash_inputs([self.input]), [self.output])
+        cache.save()
+
+    def is_fresh(self, version):
+        cache = BuildCache(self.cache_file, version)
+        return cache.is_fresh("Aid_Ratios", cache.hash_inputs([self.input]))
+
+    def test_unknown_output_is_not_fresh(self):
+        self.assertFalse(self.is_fresh("1"))
+
+    def test_built_output_is_fresh(self):
+        self.build("1")
+
+        self.assertTrue(self.is_fresh("1"))
+
+    def test_changed_input_is_not_fresh(self):
+        self.build("1")
+        Path(self.input).write_bytes(b"new aid ratios")
+
+        self.assertFalse(self.is_fresh("1"))
+
+    def test_missing_file_is_not_fresh(self):
+        self.build("1")
+        os.remove(self.output)
+
+        self.assertFalse(self.is_fresh("1"))
+
+    def test_new_code_version_is_not_fresh(self):
+        self.build("1")
+
+        self.assertFalse(self.is_fresh("2"))
+
+    def test_touched_input_with_same_content_is_fresh(self):
+        self.build("1")
+        stat = os.stat(self.input)
+        os.utime(self.input, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertTrue(self.is_fresh("1"))
+
+    def test_unchanged_input_is_not_hashed_again(self):
+        self.build("1")
+
+        with mock.patch("scripts.build_cache.hash_file", wraps=hash_file) as hash_mock:
+            cache = BuildCache(self.cache_file, "1")
+            inputs = cache.hash_inputs([self.input])
+
+        hash_mock.assert_not_called()
+        self.assertEqual(inputs[self.input]["sha256"], hash_file(self.input))
+
+    def test_changed_input_is_hashed_once(self):
+        self.build("1")
+        Path(self.input).write_bytes(b"new aid ratios")
+
+        with mock.patch("scripts.build_cache.hash_file", wraps=hash_file) as hash_mock:
+            cache = BuildCache(self.cache_file, "1")
+            cache.hash_inputs([self.input])
+            cache.hash_inputs([self.input])
+
+        hash_mock.assert_called_once_with(self.input)
+
+    def test_cache_without_path_is_not_saved(self):
+        cache = BuildCache(None, "1")
+        cache.update("Aid_Ratios", cache.hash_inputs([self.input]), [self.output])
+        cache.save()
+
+        self.assertFalse(os.path.exists(self.directory + "/build-cache"))
+        self.assertTrue(cache.is_fresh("Aid_Ratios", cache.hash_inputs([self.input])))
+
+class CodeVersionTest(unittest.TestCase):
+
+    def test_version_follows_the_source(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = SimpleNamespace(__file__=directory + "/first.py")
+            second = SimpleNamespace(__file__=directory + "/second.py")
+            Path(first.__file__).write_text("A = 1\n")
+            Path(second.__file__).write_text("B = 2\n")
+
+            version = get_code_version(first, second)
+            self.assertEqual(get_code_version(first, second), version)
+            self.assertNotEqual(get_code_version(first), version)
+
+            Path(second.__file__).write_text("B = 3\n")
+            self.assertNotEqual(get_code_version(first, second), version)
+
+    def test_scripts_have_a_version(self):
+        self.assertEqual(len(get_code_version(build_cache)), 64)
+
+class ListInputsTest(unittest.TestCase):
+
+    def test_lock_files_are_not_inputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for filename in ["b.xlsx", "a.xlsx", ".~lock.a.xlsx#"]:
+                Path(directory + "/" + filename).write_bytes(b"")
+
+            self.assertEqual(list_inputs(directory), [directory + "/a.xlsx", directory + "/b.xlsx"])
+
+if __name__ == "__main__":
+    unittest.main()
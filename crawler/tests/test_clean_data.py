@@ -0,0 +1,202 @@
+'''
+<FILE>
+test_clean_data.py
+
+
+<DESCRIPTION>
+Tests for <clean_data.py>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+import openpyxl
+from unittest import mock
+from pathlib import Path
+from xls2xlsx import XLS2XLSX
+from scripts import clean_data
+from scripts.utils import LogBuffer, SheetDict, hash_file
+from scripts.workbook_io import open_workbook, read_sheet
+
+XLS_FILE = os.path.dirname(os.path.abspath(__file__)) + "/fixtures/Aid_Ratios_2015-2016.xls"
+'''[String]: A small legacy .xls workbook.'''
+
+class SubdirectoriesTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.organized = self._temp.name + "/data-organized"
+        self.clean = self._temp.name + "/data-clean"
+
+        for subdirectory in ["Graduates", "PSSAs"]:
+            Path(self.organized + "/" + subdirectory).mkdir(parents=True)
+            Path(self.organized + "/" + subdirectory + "/notes.pdf").write_bytes(b"notes")
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def test_missing_directory_has_no_subdirectories(self):
+        self.assertEqual(clean_data.list_subdirectories(self._temp.name + "/missing"), [])
+
+    def test_subdirectories_are_filtered(self):
+        self.assertEqual(clean_data.list_subdirectories(self.organized), ["Graduates", "PSSAs"])
+        self.assertEqual(clean_data.list_subdirectories(self.organized, ["PSSAs", "Cohort_Four_Year"]), ["PSSAs"])
+
+    def test_only_the_subdirectories_are_cleaned(self):
+        self.assertTrue(clean_data.needs_run(self.organized, self.clean, subdirectories=["PSSAs"]))
+
+        clean_data.run(self.organized, self.clean, LogBuffer(), subdirectories=["PSSAs"])
+
+        self.assertEqual(os.listdir(self.organized + "/PSSAs"), [])
+        self.assertEqual(os.listdir(self.organized + "/Graduates"), ["notes.pdf"])
+        self.assertFalse(clean_data.needs_run(self.organized, self.clean, subdirectories=["PSSAs"]))
+        self.assertTrue(clean_data.needs_run(self.organized, self.clean, subdirectories=["Graduates"]))
+
+class ConversionTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.organized = self._temp.name + "/data-organized"
+        self.conversions = self._temp.name + "/build-cache/xlsx"
+
+        Path(self.organized + "/Aid_Ratios").mkdir(parents=True)
+        shutil.copy(XLS_FILE, self.organized + "/Aid_Ratios/Aid_Ratios_2015-2016.xls")
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def convert(self, read_xls=False):
+        with mock.patch("scripts.clean_data.XLS2XLSX", wraps=XLS2XLSX) as converter:
+            clean_data.do_conversions(self.organized, LogBuffer(), self.conversions, read_xls)
+
+        return converter.call_count
+
+    def test_xls_is_converted_once(self):
+        self.assertEqual(self.convert(), 1)
+        self.assertEqual(os.listdir(self.organized + "/Aid_Ratios"), ["Aid_Ratios_2015-2016.xlsx"])
+        self.assertEqual(os.listdir(self.conversions), [hash_file(XLS_FILE) + ".xlsx"])
+
+        # As organize_data copies the original again
+        shutil.copy(XLS_FILE, self.organized + "/Aid_Ratios/Aid_Ratios_2015-2016.xls")
+
+        self.assertEqual(self.convert(), 0)
+        self.assertEqual(os.listdir(self.organized + "/Aid_Ratios"), ["Aid_Ratios_2015-2016.xlsx"])
+
+    def test_xls_can_be_read_directly(self):
+        self.convert()
+        shutil.copy(XLS_FILE, self.organized + "/Aid_Ratios/Aid_Ratios_2015-2016.xls")
+
+        self.assertEqual(self.convert(read_xls=True), 0)
+
+        # The earlier conversion is removed, so the file is not read twice
+        self.assertEqual(os.listdir(self.organized + "/Aid_Ratios"), ["Aid_Ratios_2015-2016.xls"])
+
+class WriteDictsTest(unittest.TestCase):
+
+    def sheet_dicts(self):
+        return {"Aid_Ratios_IU": {
+            2016: SheetDict({110: {"iu_name": "IU 1", "mv": 83.77}, 111: {"mv": "N/A", "pi": 21.3}}, "aun"),
+            2015: SheetDict({110: {"pi": 34.4, "iu_name": "IU 1"}, 112: {}}, "aun"),
+        }}
+
+    def test_years_share_their_columns(self):
+        # Each header only names its own year's attributes, in the columns every year shares
+        expected = [
+            ("2015", [("aun", "pi", "iu_name"), (110, 34.4, "IU 1"), (112, None, None)]),
+            ("2016", [("aun", "pi", "iu_name", "mv"), (110, None, "IU 1", 83.77), (111, 21.3, None, "N/A")]),
+        ]
+
+        for file_format in ["xlsx", "sqlite"]:
+            with self.subTest(file_format=file_format), tempfile.TemporaryDirectory() as directory:
+                files = clean_data.write_dicts(self.sheet_dicts(), "Aid_Ratios", directory, file_format)
+                self.assertEqual(files, [directory + "/Aid_Ratios/Aid_Ratios_IU." + file_format])
+
+                wb = open_workbook(files[0])
+                self.assertEqual([(ws.title, read_sheet(ws)) for ws in wb.worksheets], expected)
+                wb.close()
+
+    def test_composite_keys_are_joined(self):
+        with tempfile.TemporaryDirectory() as directory:
+            files = clean_data.write_dicts({"Keystones": {2019: SheetDict({(1000, "all", "algebra"): {"scored": 25}}, "school_id")}}, "Keystones", directory, "xlsx")
+
+            wb = open_workbook(files[0])
+            self.assertEqual(read_sheet(wb.active), [("school_id", "scored"), ("1000_all_algebra", 25)])
+            wb.close()
+
+class ParseStandardSheetTest(unittest.TestCase):
+
+    # An Aid Ratios sheet, with a title above the header in row 3 and notes in the first column
+    ROWS = [
+        ["Aid Ratios 2015-2016"],
+        [],
+        ["Notes", "AUN", "IU Name", "Market Value Aid Ratio", "Footnote", "Personal Income Aid Ratio"],
+        [None, 110000000, "IU 1", "0.8377", "a", 0.344],
+        [None, None, "Total", 1, "b", 1],
+        [None, "111000000", "IU 2", "N/A", None, "0.213", "extra"],
+        [None, 110000000, "IU 1 (corrected)", 0.8, None, None],
+    ]
+
+    RENAMES = {"AUN": "aun", "IU Name": "iu_name", "Market Value Aid Ratio": "mv", "Personal Income Aid Ratio": "pi"}
+
+    def test_matches_cell_by_cell_parse(self):
+        # The output of the cell by cell parse this replaced
+        expected = {
+            110000000: {"aun": 110000000, "iu_name": "IU 1 (corrected)", "mv": 0.8, "pi": None},
+            111000000: {"aun": 111000000, "iu_name": "IU 2", "mv": "N/A", "pi": 0.213},
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            wb = openpyxl.Workbook()
+            for row in self.ROWS:
+                wb.active.append(row)
+            wb.save(directory + "/Aid_Ratios.xlsx")
+
+            wb = open_workbook(directory + "/Aid_Ratios.xlsx")
+            parsed_sheet = clean_data.parse_standard_sheet(wb.active, 2016, self.RENAMES.get, lambda row, year: row[0], header_row=3, first_col=2)
+            wb.close()
+
+        self.assertEqual(parsed_sheet, expected)
+        self.assertEqual([list(record) for record in parsed_sheet.values()], [list(record) for record in expected.values()])
+
+class ParseKeystoneTest(unittest.TestCase):
+
+    # A school level Keystone sheet, as published for 2019: a title above the header in row 5
+    ROWS = [
+        ["Keystone Exams 2019"], [], ["School Level"], [],
+        ["AUN", "District Name", "School Number", "School Name", "Subject", "Grade", "Student Group Name", "Number Scored", "Percent Advanced", "Percent Proficient", "Percent Basic", "Percent Below Basic"],
+        [101, "District 1", "1000", "School 1", "Algebra I", "11", "All Students", 25, "10.5", "40", "30", "19.5"],
+        [101, "District 1", "1000", "School 1", "Algebra I", 8, "All Students", 3, 0, 0, 0, 100],
+        [101, "District 1", "1000", "School 1", "Literature", 11, "Economically Disadvantaged", 12, "IS", "IS", "IS", "IS"],
+        [101, "District 1", 1001, "School 2", "Biology", 11, "Historically Underperforming", 9, 1, 2, 3, 4, None, "extra"],
+        [101, "District 1", 1001, "School 2", "Biology", 11, "Historically Underperforming", 10, 5, 6, 7, 8],
+        [101, "District 1", None, "School 3", "Biology", 11, "All Students", 1, 1, 1, 1, 1],
+    ]
+
+    def test_matches_cell_by_cell_parse(self):
+        # The output of the cell by cell parse this replaced, with its "<id>_<group>_<subject>" keys split
+        expected = {
+            (1000, "all", "algebra"): {"aun": 101, "lea_name": "District 1", "school_name": "School 1", "scored": 25, "advanced": 10.5, "proficient": 40, "basic": 30, "below_basic": 19.5},
+            (1000, "ed", "literature"): {"aun": 101, "lea_name": "District 1", "school_name": "School 1", "scored": 12, "advanced": None, "proficient": None, "basic": None, "below_basic": None},
+            (1001, "hu", "biology"): {"aun": 101, "lea_name": "District 1", "school_name": "School 2", "scored": 10, "advanced": 5, "proficient": 6, "basic": 7, "below_basic": 8},
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            wb = openpyxl.Workbook()
+            for row in self.ROWS:
+                wb.active.append(row)
+            wb.save(directory + "/Keystone.xlsx")
+
+            wb = open_workbook(directory + "/Keystone.xlsx")
+            with mock.patch("builtins.print"):
+                sheet_dict = clean_data.parse_keystone(wb, 2019)
+            wb.close()
+
+        self.assertEqual(sheet_dict.identifier, "school_id")
+        self.assertEqual(sheet_dict.dict, expected)
+        self.assertEqual([list(attributes) for attributes in sheet_dict.dict.values()], [list(attributes) for attributes in expected.values()])
+
+if __name__ == "__main__":
+    unittest.main()
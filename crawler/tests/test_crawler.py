@@ -0,0 +1,243 @@
+'''
+<FILE>
+test_crawler.py
+
+
+<DESCRIPTION>
+Tests for @crawler.needs_run(...), @crawler.run_pipeline(...), the stages of
+the pipeline, and @crawler.parse_args(...). Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import io
+import re
+import inspect
+import tempfile
+import threading
+import unittest
+import contextlib
+from unittest import mock
+from pathlib import Path
+from crawler import needs_run, run_pipeline, select_stages, parse_args, STAGES
+from scripts import find_data_urls, organize_data, normalize_data
+from scripts.utils import LogBuffer
+
+class NeedsRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.directory = self._temp.name
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def write(self, path):
+        path = self.directory + "/" + path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_bytes(b"data")
+
+    def stage(self, check_type, input, output):
+        return {
+            "check_type": check_type,
+            "input": self.directory + "/" + input,
+            "output": self.directory + "/" + output
+        }
+
+    def test_refresh_runs_whenever_input_exists(self):
+        stage = self.stage("REFRESH", "urls.txt", "data-raw")
+        self.assertFalse(needs_run(stage))
+
+        self.write("urls.txt")
+        self.write("data-raw/AFR/AFR_2019.xlsx")
+        self.assertTrue(needs_run(stage))
+
+    def test_dir_dir_ignores_hidden_entries(self):
+        self.write("data-raw/AFR/x.xlsx")
+        self.write("data-raw/.store/index.json")
+        self.write("data-organized/AFR/AFR_2019.xlsx")
+
+        self.assertFalse(needs_run(self.stage("DIR_DIR", "data-raw", "data-organized")))
+
+    def test_dir_dir_runs_when_a_directory_is_added(self):
+        self.write("data-raw/AFR/x.xlsx")
+        self.write("data-raw/PSSAs/y.xlsx")
+        self.write("data-organized/AFR/AFR_2019.xlsx")
+
+        self.assertTrue(needs_run(self.stage("DIR_DIR", "data-raw", "data-organized")))
+
+    def test_script_ignores_files_it_does_not_organize(self):
+        stage = self.stage("SCRIPT", "data-raw", "data-organized")
+        stage["script"] = organize_data
+        stage["options"] = {"ignored_files": []}
+
+        self.write("data-raw/AFR/AFR_2019.xlsx")
+        self.assertTrue(needs_run(stage))
+
+        organize_data.run(stage["input"], stage["output"], LogBuffer())
+        self.write("data-raw/AFR/0123456789abcdef.part")
+        self.write("data-raw/AFR/notes.xlsx")
+        self.assertFalse(needs_run(stage))
+
+    def test_cached_creates_its_output_directory(self):
+        self.write("data-clean/AFR/AFR.sqlite")
+        stage = self.stage("CACHED", "data-clean", "data-norm")
+        stage["script"] = normalize_data
+        stage["options"] = {"cache_file": None, "file_format": "sqlite"}
+
+        self.assertTrue(needs_run(stage))
+        self.assertTrue(Path(stage["output"]).is_dir())
+
+class Script:
+    # A stage's script, which records when it runs
+
+    def __init__(self, name, ran, fail=False, barrier=None):
+        self.name = name
+        self.ran = ran
+        self.fail = fail
+        self.barrier = barrier
+
+    def run(self, input, output, logger):
+        if self.barrier is not None: # Waits for the other stages sharing it to run at the same time
+            self.barrier.wait()
+
+        self.ran.append(self.name)
+        if self.fail:
+            raise RuntimeError(self.name)
+
+class RunPipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ran = []
+
+    def stage(self, name, dependencies, fail=False, barrier=None):
+        return {
+            "name": name,
+            "step": name.split("/")[0],
+            "classification": None,
+            "script": Script(name, self.ran, fail, barrier),
+            "input": None,
+            "output": None,
+            "description": name,
+            "check_msg": None,
+            "check_type": "REQUIRE",
+            "options": {},
+            "dependencies": dependencies
+        }
+
+    def test_stages_run_in_dependency_order(self):
+        stages = [self.stage("b", ["a"]), self.stage("a", []), self.stage("c", ["b"])]
+
+        self.assertTrue(run_pipeline(stages, {"a", "b", "c"}, LogBuffer(), assume_yes=True))
+        self.assertEqual(self.ran, ["a", "b", "c"])
+
+    def test_failure_skips_dependent_stages_only(self):
+        stages = [self.stage("a", [], fail=True), self.stage("b", ["a"]), self.stage("c", [])]
+
+        self.assertFalse(run_pipeline(stages, {"a", "b", "c"}, LogBuffer(), assume_yes=True, max_workers=1))
+        self.assertEqual(self.ran, ["a", "c"])
+
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        stages = [self.stage("download/a", [], barrier=barrier), self.stage("clean/b", [], barrier=barrier), self.stage("normalize", ["download/a", "clean/b"])]
+
+        self.assertTrue(run_pipeline(stages, {"download/a", "clean/b", "normalize"}, LogBuffer(), assume_yes=True, max_workers=2))
+        self.assertEqual(self.ran[-1], "normalize")
+
+    def test_stage_logs_are_not_interleaved(self):
+        barrier = threading.Barrier(2, timeout=5)
+        stages = [self.stage("a", [], barrier=barrier), self.stage("b", [], barrier=barrier)]
+        log = LogBuffer()
+
+        self.assertTrue(run_pipeline(stages, {"a", "b"}, log, assume_yes=True, max_workers=2))
+
+        messages = [message for kind, indentation, message in log.lines if kind == "write"]
+        stages = [message.split(" ")[1] for message in messages]
+
+        self.assertEqual(len(messages), 4)
+        self.assertEqual(stages[0], stages[1])
+        self.assertEqual(stages[2], stages[3])
+        self.assertEqual(sorted([stages[0], stages[2]]), ["a", "b"])
+
+    def test_user_is_asked_once_per_step(self):
+        stages = [self.stage("clean/a", []), self.stage("clean/b", []), self.stage("normalize", ["clean/a", "clean/b"])]
+
+        with mock.patch("crawler.prompt_bool", return_value=True) as prompt:
+            self.assertTrue(run_pipeline(stages, {"clean/a", "clean/b", "normalize"}, LogBuffer()))
+
+        self.assertEqual(prompt.call_count, 2)
+        self.assertEqual(sorted(self.ran), ["clean/a", "clean/b", "normalize"])
+
+    def test_declined_step_skips_its_stages(self):
+        stages = [self.stage("clean/a", []), self.stage("clean/b", []), self.stage("normalize", ["clean/a"])]
+
+        with mock.patch("crawler.prompt_bool", return_value=False) as prompt:
+            self.assertTrue(run_pipeline(stages, {"clean/a", "clean/b", "normalize"}, LogBuffer()))
+
+        self.assertEqual(prompt.call_count, 1)
+        self.assertEqual(self.ran, [])
+
+    def test_unselected_stages_count_as_done(self):
+        stages = [self.stage("a", []), self.stage("b", ["a"])]
+
+        self.assertTrue(run_pipeline(stages, {"b"}, LogBuffer(), assume_yes=True))
+        self.assertEqual(self.ran, ["b"])
+
+    def test_unknown_dependency_raises(self):
+        stages = [self.stage("a", ["missing"])]
+
+        with self.assertRaises(ValueError):
+            run_pipeline(stages, {"a"}, LogBuffer(), assume_yes=True)
+
+class StagesTest(unittest.TestCase):
+
+    def test_each_classification_has_its_own_branch(self):
+        names = [stage["name"] for stage in STAGES]
+        stages = {stage["name"]: stage for stage in STAGES}
+
+        self.assertEqual(len(names), len(set(names)))
+        for classification in find_data_urls.FILE_CLASSIFICATIONS:
+            self.assertEqual(stages["organize_data/" + classification]["dependencies"], ["download_urls/" + classification])
+            self.assertEqual(stages["clean_data/" + classification]["dependencies"], ["organize_data/" + classification])
+            self.assertIn("clean_data/" + classification, stages["normalize_data"]["dependencies"])
+
+    def test_every_classification_has_stages(self):
+        # Each classification the data url finder can give a file
+        source = inspect.getsource(find_data_urls.get_file_classification)
+        classifications = set(re.findall(r'accept\(file_url, "(\w+)"\)', source))
+
+        self.assertEqual(classifications, set(find_data_urls.FILE_CLASSIFICATIONS))
+
+    def test_classifications_are_cleaned_with_separate_caches(self):
+        cache_files = [stage["options"]["cache_file"] for stage in STAGES if stage["step"] == "clean_data"]
+
+        self.assertEqual(len(cache_files), len(find_data_urls.FILE_CLASSIFICATIONS))
+        self.assertEqual(len(cache_files), len(set(cache_files)))
+
+    def test_steps_select_each_of_their_stages(self):
+        selected = select_stages(STAGES, ["clean_data"])
+
+        self.assertEqual(len(selected), len(find_data_urls.FILE_CLASSIFICATIONS))
+        self.assertIn("clean_data/Keystones", selected)
+
+        selected = select_stages(STAGES, start="normalize_data")
+        self.assertEqual(selected, {"normalize_data", "insert_data"})
+
+    def test_unknown_step_raises(self):
+        with self.assertRaises(ValueError):
+            select_stages(STAGES, ["clean_data/Keystones"])
+
+class ParseArgsTest(unittest.TestCase):
+
+    def test_format_defaults_to_sqlite(self):
+        self.assertEqual(parse_args([]).file_format, "sqlite")
+
+    def test_format_can_be_xlsx(self):
+        self.assertEqual(parse_args(["--format", "xlsx"]).file_format, "xlsx")
+
+    def test_format_must_be_known(self):
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            parse_args(["--format", "csv"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+'''
+<FILE>
+test_download_urls.py
+
+
+<DESCRIPTION>
+Tests for @download_urls.run(...) and @download_urls.download_url(...). Run
+from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import io
+import json
+import tempfile
+import unittest
+import contextlib
+import requests
+from scripts import download_urls
+from scripts.raw_store import RawStore
+from scripts.utils import CrawlManifest, LogBuffer
+
+class RefusingClient:
+    # A client which answers every request with a 416, and records the requests
+
+    def __init__(self):
+        self.requests = []
+        self.urls = []
+
+    @contextlib.contextmanager
+    def slot(self, url):
+        yield
+
+    def fetch(self, url, logger, headers={}, stream=False, accept_statuses=()):
+        self.requests.append(dict(headers))
+        self.urls.append(url)
+
+        request = requests.Response()
+        request.status_code = 416
+        request.url = url
+        request.raw = io.BytesIO(b"")
+        return request
+
+    def save(self):
+        pass
+
+class DownloadUrlTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.directory = self._temp.name + "/data-raw"
+        self.store = RawStore(self.directory)
+        self.manifest = CrawlManifest(self._temp.name + "/manifest.json")
+        self.client = RefusingClient()
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def download(self, url):
+        return download_urls.download_url("AFR", url, self.directory, self.client, self.store, 1024, self.manifest, 3)
+
+    def write_part(self, url):
+        partpath = download_urls.get_part_path(self.directory + "/AFR/", url)
+        with open(partpath, "wb") as part_file:
+            part_file.write(b"partial")
+        with open(partpath + ".json", "w") as meta_file:
+            json.dump({"etag": '"v1"'}, meta_file)
+
+    def test_refused_full_request_is_given_up(self):
+        log = self.download("http://a/x.xlsx")
+
+        self.assertEqual(self.client.requests, [{"Accept-Encoding": "identity"}])
+        self.assertIn("warn", [kind for kind, indentation, message in log.lines])
+
+    def test_refused_range_request_restarts_once(self):
+        self.download("http://a/x.xlsx") # Creates the classification directory
+        self.client.requests = []
+        self.write_part("http://a/x.xlsx")
+
+        self.download("http://a/x.xlsx")
+
+        self.assertEqual(len(self.client.requests), 2)
+        self.assertIn("Range", self.client.requests[0])
+        self.assertNotIn("Range", self.client.requests[1])
+
+class RunTest(unittest.TestCase):
+
+    def test_only_the_classification_is_downloaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(directory + "/data_urls.txt", "w") as data_urls_file:
+                data_urls_file.write("AFR; http://a/x.xlsx\n")
+                data_urls_file.write("PSSAs; http://b/y.xlsx\n")
+                data_urls_file.write("AFR; http://a/z.xlsx\n")
+
+            client = RefusingClient()
+            manifest = CrawlManifest(None)
+            store = RawStore(directory + "/data-raw")
+
+            download_urls.run(directory + "/data_urls.txt", directory + "/data-raw", LogBuffer(), client=client, classification="AFR", manifest=manifest, store=store)
+
+        self.assertEqual(sorted(client.urls), ["http://a/x.xlsx", "http://a/z.xlsx"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+'''
+<FILE>
+test_http_client.py
+
+
+<DESCRIPTION>
+Tests for <http_client.ResponseStore>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import io
+import os
+import tempfile
+import unittest
+import requests
+from scripts.http_client import ResponseStore
+
+class ResponseStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.directory = self._temp.name
+        self.store = ResponseStore(self.directory)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def record(self, url, content):
+        request = requests.Response()
+        request.status_code = 200
+        request.url = url
+        request.headers = {"ETag": '"' + url + '"'}
+        request.raw = io.BytesIO(content)
+
+        self.store.record(url, request)
+
+    def test_index_is_written_on_save(self):
+        self.record("http://a", b"a")
+        self.record("http://b", b"b")
+        self.assertFalse(os.path.exists(self.directory + "/index.json"))
+
+        self.store.save()
+
+        store = ResponseStore(self.directory)
+        self.assertEqual(store.replay("http://a").content, b"a")
+        self.assertEqual(store.replay("http://b").content, b"b")
+
+    def test_unchanged_index_is_not_rewritten(self):
+        self.record("http://a", b"a")
+        self.store.save()
+        os.remove(self.directory + "/index.json")
+
+        self.store.save()
+        self.assertFalse(os.path.exists(self.directory + "/index.json"))
+
+    def test_matching_validator_replays_not_modified(self):
+        self.record("http://a", b"a")
+
+        self.assertEqual(self.store.replay("http://a", {"If-None-Match": '"http://a"'}).status_code, 304)
+        self.assertEqual(self.store.replay("http://a", {"If-None-Match": '"other"'}).status_code, 200)
+
+if __name__ == "__main__":
+    unittest.main()
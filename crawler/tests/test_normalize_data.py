@@ -0,0 +1,271 @@
+'''
+<FILE>
+test_normalize_data.py
+
+
+<DESCRIPTION>
+Tests for <normalize_data.py>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from scripts import normalize_data
+from scripts.utils import LogBuffer, SheetDict
+from scripts.workbook_io import write_workbook, open_workbook, read_sheet
+
+AID_RATIOS_IU = [
+    ("2015", [
+        ("aun", "iu_name", "mv", "pi"),
+        (110000000, "IU 110000000", 83.77, 34.385),
+        (111000000, "IU 111000000", "N/A", 21.297),
+    ]),
+]
+'''[[(String, [Tuple...])...]]: A small clean Aid Ratios IU workbook.'''
+
+APD = [
+    ("2015", [
+        ("aun", "school_number", "participation"),
+        (110000000, 1000, 95.0),
+    ]),
+]
+'''[[(String, [Tuple...])...]]: A small clean APD workbook.'''
+
+AFR = [
+    ("2015", [
+        ("aun", "lea_name", "county", "iu_name", "expenditure", "ratio", "status"),
+        (101000013, "Lea A", "Adams", None, 1000, 1.5, 3),
+        (110000000, "IU 1", None, "Intermediate Unit 1", 2000, 2, 4),
+        (102000026, None, "Berks", "ignored", None, None, None),
+    ]),
+    ("2016", [
+        ("aun", "lea_name", "ratio", "expenditure", "status"),
+        (102000026, "Lea B", 0.25, 3000, "closed"),
+        (101000013, "Lea A (renamed)", 1, None, 5),
+        (110000000, "IU 1", None, 2500.0, None),
+    ]),
+]
+'''[[(String, [Tuple...])...]]: A small clean standard workbook, with empty cells and a clobbered LEA name.'''
+
+FAST_FACTS_SCHOOL = [
+    ("2015", [
+        ("school_id", "lea_name", "school_name", "aun", "county", "iu_name", "school_telephone", "enrollment", "low_income"),
+        (1000, "District 1", "School 1", 101000013, "Adams", "IU 1", "717-555-0100", "350", "42.5"),
+        (1001, "Career Tech", "Career Tech", 102000026, "Berks", "IU 1", "717-555-0101", "N/A", 10),
+    ]),
+    ("2016", [
+        ("school_id", "lea_name", "school_name", "aun", "enrollment", "school_telephone"),
+        (1001, "Career Tech", "Career Tech", 102000026, 120, "717-555-0199"),
+        (1000, "District 1", "School 1 (renamed)", 101000013, None, None),
+    ]),
+]
+'''[[(String, [Tuple...])...]]: A small clean Fast Facts School workbook, including a CTC.'''
+
+KEYSTONES = [
+    ("2019", [
+        ("school_id", "lea_name", "school_name", "aun", "scored", "advanced", "proficient"),
+        ("1000_all_algebra", "District 1", "School 1", 101000013, 25, "10.5", 40),
+        ("1001_all_biology", "Career Tech", "Career Tech", 102000026, 9, "IS", 3),
+        ("1000_ed_literature", "District 1", "School 1", 101000013, "12", 1, None),
+    ]),
+    ("2021", [
+        ("school_id", "scored", "advanced"),
+        ("1000_all_algebra", 30, 1.25),
+    ]),
+]
+'''[[(String, [Tuple...])...]]: A small clean Keystones workbook.'''
+
+class RunTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.clean = self._temp.name + "/data-clean"
+        self.norm = self._temp.name + "/data-norm"
+        self.cache_file = self._temp.name + "/build-cache/normalize_data.json"
+
+        os.makedirs(self.clean + "/Aid_Ratios")
+        os.makedirs(self.clean + "/APD")
+        os.makedirs(self.norm)
+        write_workbook(self.clean + "/Aid_Ratios/Aid_Ratios_IU.sqlite", AID_RATIOS_IU)
+        write_workbook(self.clean + "/APD/APD.sqlite", APD)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def run_normalize(self):
+        normalize_data.run(self.clean, self.norm, LogBuffer(), cache_file=self.cache_file, file_format="sqlite")
+
+    def test_apd_is_not_normalized(self):
+        self.run_normalize()
+
+        self.assertEqual(sorted(os.listdir(self.norm)), ["Aid_Ratios.sqlite", "IUs.sqlite", "LEAs.sqlite", "Schools.sqlite"])
+        for root, directories, files in os.walk(os.path.dirname(self.cache_file)):
+            self.assertFalse(any("APD" in name for name in directories + files))
+
+    def test_apd_does_not_need_a_run(self):
+        self.run_normalize()
+
+        self.assertFalse(normalize_data.needs_run(self.clean, self.norm, self.cache_file, "sqlite"))
+
+class WriteTest(unittest.TestCase):
+
+    def read(self, filename):
+        wb = open_workbook(filename)
+        rows = read_sheet(wb.active)
+        wb.close()
+        return rows
+
+    def test_composite_dict_is_written(self):
+        composite_dict = SheetDict({2015: {110: {"mv": 83.77, "iu_name": "IU 1"}, 111: {}}, 2016: {110: {"pi": 34.4}}}, "aun")
+
+        for file_format in ["xlsx", "sqlite"]:
+            with self.subTest(file_format=file_format), tempfile.TemporaryDirectory() as directory:
+                normalize_data.write_composite_dict(composite_dict, {"mv": "REAL", "iu_name": "TEXT", "pi": "REAL"}, directory + "/Aid_Ratios." + file_format)
+
+                self.assertEqual(self.read(directory + "/Aid_Ratios." + file_format), [
+                    ("aun PK_INTEGER", "year PK_INTEGER", "mv REAL", "iu_name TEXT", "pi REAL"),
+                    (110, 2015, 83.77, "IU 1", None),
+                    (None, None, None, None, None),
+                    (110, 2016, None, None, 34.4),
+                ])
+
+    def test_sheet_dict_is_written(self):
+        sheet_dict = SheetDict({110: {"iu_name": "IU 1", "aun": 110}, 111: {}, 112: {"lea_telephone": 7175551234, "lea_name": "A"}}, "aun")
+
+        for file_format in ["xlsx", "sqlite"]:
+            with self.subTest(file_format=file_format), tempfile.TemporaryDirectory() as directory:
+                normalize_data.write_sheet_dict(sheet_dict, directory + "/LEAs." + file_format)
+
+                self.assertEqual(self.read(directory + "/LEAs." + file_format), [
+                    ("aun PK_INTEGER", "iu_name TEXT", "aun INTEGER", "lea_telephone INTEGER", "lea_name TEXT"),
+                    (110, "IU 1", 110, None, None),
+                    (None, None, None, None, None),
+                    (112, None, None, 7175551234, "A"),
+                ])
+
+class FileFormatTest(unittest.TestCase):
+
+    def normalize(self, directory, clean_format, file_format):
+        os.makedirs(directory + "/data-clean/Aid_Ratios")
+        os.makedirs(directory + "/data-norm")
+        write_workbook(directory + "/data-clean/Aid_Ratios/Aid_Ratios_IU." + clean_format, AID_RATIOS_IU)
+
+        normalize_data.run(directory + "/data-clean", directory + "/data-norm", LogBuffer(), file_format=file_format)
+
+        normalized = {}
+        for filename in sorted(os.listdir(directory + "/data-norm")):
+            wb = open_workbook(directory + "/data-norm/" + filename)
+            normalized[os.path.splitext(filename)[0]] = [(ws.title, read_sheet(ws)) for ws in wb.worksheets]
+            wb.close()
+
+        return normalized
+
+    def test_clean_data_is_read_the_same_in_any_format(self):
+        with tempfile.TemporaryDirectory() as xlsx_directory, tempfile.TemporaryDirectory() as sqlite_directory:
+            from_xlsx = self.normalize(xlsx_directory, "xlsx", "sqlite")
+            from_sqlite = self.normalize(sqlite_directory, "sqlite", "sqlite")
+
+        self.assertEqual(sorted(from_xlsx), ["Aid_Ratios", "IUs", "LEAs", "Schools"])
+        self.assertEqual(from_xlsx, from_sqlite)
+
+    def test_normalized_data_is_the_same_in_any_format(self):
+        with tempfile.TemporaryDirectory() as xlsx_directory, tempfile.TemporaryDirectory() as sqlite_directory:
+            as_xlsx = self.normalize(xlsx_directory, "sqlite", "xlsx")
+            as_sqlite = self.normalize(sqlite_directory, "sqlite", "sqlite")
+
+        self.assertEqual(as_xlsx, as_sqlite)
+
+class ParseStandardWbTest(unittest.TestCase):
+
+    # Lists each dictionary's items, so that comparisons also check their order
+    def ordered(self, value):
+        if isinstance(value, dict):
+            return [(key, self.ordered(item)) for key, item in value.items()]
+        return value
+
+    def test_matches_cell_by_cell_parse(self):
+        # The output of the cell by cell parse this replaced
+        expected_data = {
+            2015: {101000013: {"expenditure": 1000, "ratio": 1.5, "status": 3}, 110000000: {"expenditure": 2000, "ratio": 2, "status": 4}},
+            2016: {102000026: {"ratio": 0.25, "expenditure": 3000, "status": "closed"}, 101000013: {"ratio": 1, "status": 5}, 110000000: {"expenditure": 2500}},
+        }
+        expected_types = {"aun": "INTEGER", "lea_name": "TEXT", "county": "TEXT", "iu_name": "TEXT", "expenditure": "INTEGER", "ratio": "REAL", "status": "TEXT"}
+        expected_leas = {101000013: {"lea_name": "Lea A (renamed)", "county": "Adams"}, 110000000: {"lea_name": "IU 1"}, 102000026: {"county": "Berks", "lea_name": "Lea B"}}
+        expected_ius = {110000000: {"iu_name": "Intermediate Unit 1"}}
+
+        logger = LogBuffer()
+        with tempfile.TemporaryDirectory() as directory:
+            write_workbook(directory + "/AFR.xlsx", AFR)
+
+            wb = open_workbook(directory + "/AFR.xlsx")
+            with mock.patch.object(normalize_data, "leas", SheetDict({}, "aun")), mock.patch.object(normalize_data, "ius", SheetDict({}, "aun")):
+                data_dict, col_types = normalize_data.parse_standard_wb(wb, logger)
+                leas, ius = normalize_data.leas, normalize_data.ius
+            wb.close()
+
+        self.assertEqual(data_dict.identifier, "aun")
+        self.assertEqual(self.ordered(data_dict.dict), self.ordered(expected_data))
+        self.assertEqual(self.ordered(col_types), self.ordered(expected_types))
+        self.assertEqual(self.ordered(leas.dict), self.ordered(expected_leas))
+        self.assertEqual(self.ordered(ius.dict), self.ordered(expected_ius))
+        self.assertEqual(logger.lines, [("write", 1, "Clobbering lea_name in dict[101000013]. Replacing Lea A with Lea A (renamed)")])
+
+class ParseSchoolWbTest(unittest.TestCase):
+
+    # Lists each dictionary's items, so that comparisons also check their order
+    def ordered(self, value):
+        if isinstance(value, dict):
+            return [(key, self.ordered(item)) for key, item in value.items()]
+        return value
+
+    # Parses a workbook, returning everything the parse adds to
+    def parse(self, parse_wb, sheets):
+        logger = LogBuffer()
+        with tempfile.TemporaryDirectory() as directory:
+            write_workbook(directory + "/wb.xlsx", sheets)
+
+            wb = open_workbook(directory + "/wb.xlsx")
+            with mock.patch.object(normalize_data, "schools", SheetDict({}, "school_id")), mock.patch.object(normalize_data, "leas", SheetDict({}, "aun")), mock.patch.object(normalize_data, "ius", SheetDict({}, "aun")):
+                data_dict, col_types = parse_wb(wb, logger)
+                schools, leas, ius = normalize_data.schools, normalize_data.leas, normalize_data.ius
+            wb.close()
+
+        self.assertEqual(data_dict.identifier, "school_id")
+        return [self.ordered(found) for found in [data_dict.dict, col_types, schools.dict, leas.dict, ius.dict]] + [logger.lines]
+
+    def test_fast_facts_school_matches_cell_by_cell_parse(self):
+        # The output of the cell by cell parse this replaced
+        expected = [
+            {2015: {1000: {"enrollment": 350, "low_income": 42.5}, 1001: {"enrollment": "N/A", "low_income": 10}}, 2016: {1001: {"enrollment": 120}}},
+            {"school_id": "INTEGER", "lea_name": "TEXT", "school_name": "TEXT", "aun": "INTEGER", "county": "TEXT", "iu_name": "TEXT", "school_telephone": "TEXT", "enrollment": "INTEGER", "low_income": "TEXT"},
+            {1000: {"school_name": "School 1 (renamed)", "aun": 101000013, "school_telephone": 7175550100}, 1001: {"school_name": "Career Tech", "aun": 102000026, "school_telephone": 7175550199}},
+            {102000026: {"lea_name": "Career Tech", "lea_telephone": 7175550199}},
+            {},
+        ]
+        expected_lines = [
+            ("warn", 1, "Cannot add to iu dict. Attr: iu_name, Val: IU 1"),
+            ("warn", 1, "Cannot add to iu dict. Attr: iu_name, Val: IU 1"),
+            ("write", 1, "Clobbering school_telephone in dict[1001]. Replacing 7175550101 with 7175550199"),
+            ("write", 1, "Clobbering lea_telephone in dict[102000026]. Replacing 7175550101 with 7175550199"),
+            ("write", 1, "Clobbering school_name in dict[1000]. Replacing School 1 with School 1 (renamed)"),
+        ]
+
+        self.assertEqual(self.parse(normalize_data.parse_ffs_wb, FAST_FACTS_SCHOOL), [self.ordered(found) for found in expected] + [expected_lines])
+
+    def test_keystones_match_cell_by_cell_parse(self):
+        # The output of the cell by cell parse this replaced
+        expected = [
+            {2019: {"1000_all_algebra": {"scored": 25, "advanced": 10.5, "proficient": 40}, "1001_all_biology": {"scored": 9, "proficient": 3}, "1000_ed_literature": {"scored": 12, "advanced": 1}}, 2021: {"1000_all_algebra": {"scored": 30, "advanced": 1.25}}},
+            {"school_id": "TEXT", "lea_name": "TEXT", "school_name": "TEXT", "aun": "INTEGER", "scored": "INTEGER", "advanced": "REAL", "proficient": "INTEGER"},
+            {1000: {"school_name": "School 1"}, 1001: {"school_name": "Career Tech"}},
+            {},
+            {},
+        ]
+
+        self.assertEqual(self.parse(normalize_data.parse_keystone_wb, KEYSTONES), [self.ordered(found) for found in expected] + [[]])
+
+if __name__ == "__main__":
+    unittest.main()
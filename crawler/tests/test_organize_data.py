@@ -0,0 +1,182 @@
+'''
+<FILE>
+test_organize_data.py
+
+
+<DESCRIPTION>
+Tests for <organize_data.py>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import os
+import re
+import inspect
+import hashlib
+import tempfile
+import unittest
+from scripts import organize_data
+from scripts.raw_store import RawStore
+from scripts.utils import LogBuffer
+
+class OrganizeTestCase(unittest.TestCase):
+    # Builds a raw data directory through the raw data store
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.raw = self._temp.name + "/data-raw"
+        self.organized = self._temp.name + "/data-organized"
+        self.store = RawStore(self.raw)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def add(self, url, content, filename="AFR_2019.xlsx", file_class="AFR"):
+        partpath = self._temp.name + "/download.part"
+        with open(partpath, "wb") as part_file:
+            part_file.write(content)
+
+        path = self.store.add(partpath, hashlib.sha256(content).hexdigest(), file_class, url, filename, LogBuffer())
+        self.store.save()
+        return path
+
+    def organize(self, ignored_files=(), classification=None):
+        organize_data.run(self.raw, self.organized, LogBuffer(), ignored_files, classification)
+
+    def read(self, path):
+        with open(self.organized + "/" + path, "rb") as file:
+            return file.read()
+
+class RunTest(OrganizeTestCase):
+
+    def test_identical_files_are_organized_once(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"old", filename="AFR 2019.xlsx")
+
+        self.organize()
+
+        self.assertEqual(os.listdir(self.organized + "/AFR"), ["AFR_2019-2020.xlsx"])
+        self.assertEqual(self.read("AFR/AFR_2019-2020.xlsx"), b"old")
+
+    def test_different_files_with_the_same_name_fail(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"new")
+        self.assertEqual(sorted(os.listdir(self.raw + "/AFR")), ["AFR_2019 (2).xlsx", "AFR_2019.xlsx"])
+
+        log = LogBuffer()
+        with self.assertRaises(ValueError):
+            organize_data.run(self.raw, self.organized, log)
+
+        self.assertFalse(os.path.exists(self.organized + "/AFR"))
+        warnings = "\n".join(message for kind, indentation, message in log.lines if kind == "warn")
+        self.assertIn("http://a", warnings)
+        self.assertIn("http://b", warnings)
+
+    def test_ignored_file_resolves_a_conflict(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"new")
+
+        self.organize(["AFR/AFR_2019.xlsx"])
+
+        self.assertEqual(self.read("AFR/AFR_2019-2020.xlsx"), b"new")
+
+    def test_unfinished_and_undated_files_are_skipped(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"notes", filename="notes.xlsx")
+        with open(self.raw + "/AFR/0123456789abcdef.part", "wb") as part_file:
+            part_file.write(b"partial")
+
+        self.organize()
+
+        self.assertEqual(os.listdir(self.organized + "/AFR"), ["AFR_2019-2020.xlsx"])
+
+    def test_only_the_classification_is_organized(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"scores", filename="Keystone 2019.xlsx", file_class="Keystones")
+
+        self.organize(classification="Keystones")
+
+        self.assertEqual(os.listdir(self.organized), ["Keystones"])
+
+class NeedsRunTest(OrganizeTestCase):
+
+    def needs_run(self, ignored_files=()):
+        return organize_data.needs_run(self.raw, self.organized, ignored_files)
+
+    def test_new_file_needs_a_run(self):
+        self.add("http://a", b"old")
+
+        self.assertTrue(self.needs_run())
+        self.organize()
+        self.assertFalse(self.needs_run())
+
+    def test_skipped_files_do_not_need_a_run(self):
+        self.add("http://a", b"old")
+        self.organize()
+
+        self.add("http://b", b"notes", filename="notes.xlsx")
+        with open(self.raw + "/AFR/0123456789abcdef.part", "wb") as part_file:
+            part_file.write(b"partial")
+        self.add("http://c", b"old", filename="AFR 2019.xlsx")
+
+        self.assertFalse(self.needs_run())
+
+    def test_converted_and_removed_files_do_not_need_a_run(self):
+        self.add("http://a", b"old", filename="AFR_2019.xls")
+        self.add("http://b", b"notes", filename="AFR_2019.pdf")
+        self.organize()
+
+        self.assertEqual(os.listdir(self.organized + "/AFR"), ["AFR_2019-2020.xls"])
+
+        # As clean_data converts it
+        os.rename(self.organized + "/AFR/AFR_2019-2020.xls", self.organized + "/AFR/AFR_2019-2020.xlsx")
+        os.utime(self.organized + "/AFR/AFR_2019-2020.xlsx")
+
+        self.assertFalse(self.needs_run())
+
+        self.add("http://a", b"newer", filename="AFR_2019.xls")
+        os.utime(self.raw + "/AFR/AFR_2019.xls", ns=(2 ** 62, 2 ** 62))
+
+        self.assertTrue(self.needs_run())
+
+    def test_updated_file_needs_a_run(self):
+        self.add("http://a", b"old")
+        self.organize()
+
+        self.add("http://a", b"newer")
+        os.utime(self.raw + "/AFR/AFR_2019.xlsx", ns=(1, 1))
+
+        self.assertTrue(self.needs_run())
+        self.organize()
+        self.assertFalse(self.needs_run())
+        self.assertEqual(self.read("AFR/AFR_2019-2020.xlsx"), b"newer")
+
+    def test_conflict_needs_a_run_until_resolved(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"new")
+
+        self.assertTrue(self.needs_run())
+        self.organize(["AFR/AFR_2019.xlsx"])
+        self.assertFalse(self.needs_run(["AFR/AFR_2019.xlsx"]))
+
+    def test_other_classifications_are_not_checked(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"scores", filename="Keystone 2019.xlsx", file_class="Keystones")
+        self.organize(classification="Keystones")
+
+        self.assertFalse(organize_data.needs_run(self.raw, self.organized, classification="Keystones"))
+        self.assertTrue(organize_data.needs_run(self.raw, self.organized, classification="AFR"))
+
+class GetNewDirectoriesTest(unittest.TestCase):
+
+    def test_split_directories_match_get_new_directory(self):
+        source = inspect.getsource(organize_data.get_new_directory)
+        directories = set(re.findall(r'return "(\w+)"', source)) - {"INVALID"}
+
+        self.assertEqual(directories, {directory for classification in ["FRPA", "Cohorts"] for directory in organize_data.get_new_directories(classification)})
+
+    def test_other_classifications_are_not_split(self):
+        self.assertEqual(organize_data.get_new_directories("Keystones"), ["Keystones"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+'''
+<FILE>
+test_pivot_table.py
+
+
+<DESCRIPTION>
+Tests for <pivot_table.PivotTable> and @clean_data.parse_apd(...). Run from the
+crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import pickle
+import tempfile
+import unittest
+import openpyxl
+from concurrent.futures import ProcessPoolExecutor
+from scripts import clean_data
+from scripts.pivot_table import PivotTable, MISSING
+from scripts.workbook_io import open_workbook
+
+def build_table():
+    # Builds a table with a missing value, in a worker process
+    table = PivotTable("aun", ["lea_name"])
+    table.add_record(1, {"lea_name": "A"})
+    table.add_record(2, {})
+    table.set_value(2, "enrollment", 10)
+    return table
+
+class PivotTableTest(unittest.TestCase):
+
+    def test_records_read_as_dictionaries(self):
+        table = build_table()
+
+        self.assertEqual(table.identifier, "aun")
+        self.assertEqual(dict(table.dict[1]), {"lea_name": "A"})
+        self.assertEqual(dict(table.dict[2]), {"enrollment": 10})
+        self.assertEqual({id: dict(record) for id, record in table.dict.items()}, {1: {"lea_name": "A"}, 2: {"enrollment": 10}})
+        self.assertEqual(len(table.dict), 2)
+        self.assertIn(1, table)
+        self.assertNotIn(3, table)
+
+    def test_missing_values_are_absent(self):
+        table = build_table()
+        record = table.dict[1]
+
+        self.assertEqual(len(record), 1)
+        self.assertNotIn("enrollment", record)
+        self.assertNotIn("lea_name", table.dict[2])
+        with self.assertRaises(KeyError):
+            record["enrollment"]
+
+    def test_attributes_keep_their_registration_order(self):
+        table = PivotTable("school_id", ["school_name", "aun"])
+        table.add_record(7, {"aun": 1, "school_name": "S"})
+        table.set_value(7, "b", 2)
+        table.set_value(7, "a", 3)
+
+        self.assertEqual(list(table.dict[7]), ["school_name", "aun", "b", "a"])
+        self.assertEqual(list(table.columns), ["school_name", "aun", "b", "a"])
+
+    def test_adding_a_record_twice_keeps_the_first(self):
+        table = build_table()
+        table.add_record(1, {"lea_name": "B"})
+
+        self.assertEqual(table.dict[1]["lea_name"], "A")
+
+    def test_repeated_text_is_stored_once(self):
+        table = PivotTable("aun")
+        table.add_record(1, {"value": "".join(["N", "/A"])})
+        table.add_record(2, {"value": "".join(["N/", "A"])})
+
+        self.assertIs(table.rows[1][0], table.rows[2][0])
+
+    def test_missing_survives_pickling(self):
+        self.assertIs(pickle.loads(pickle.dumps(MISSING)), MISSING)
+
+        table = pickle.loads(pickle.dumps(build_table()))
+        self.assertIs(table.rows[2][0], MISSING)
+        self.assertEqual(dict(table.dict[2]), {"enrollment": 10})
+
+    def test_table_returns_from_a_worker_process(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            table = executor.submit(build_table).result()
+
+        self.assertIs(table.rows[2][0], MISSING)
+        self.assertEqual(dict(table.dict[1]), {"lea_name": "A"})
+        self.assertEqual(dict(table.dict[2]), {"enrollment": 10})
+
+class ParseApdTest(unittest.TestCase):
+
+    def test_long_rows_are_pivoted_by_school(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = directory + "/APD.xlsx"
+
+            wb = openpyxl.Workbook()
+            ws = wb.active
+            ws.append(["LEA Name", "School Name", "AUN", "School Number", "Data Element", "Value"])
+            ws.append(["LEA 1", "School 1", "101", "1000", "Number Tested", "25"])
+            ws.append(["LEA 1", "School 1", "101", "1000", "Participation - Group 1 (Subject: Math)", "N/A"])
+            ws.append(["LEA 1", "School 2", "101", "1001", "Number Tested", "30"])
+            wb.save(path)
+
+            wb = open_workbook(path)
+            schools = clean_data.parse_apd(wb)
+            wb.close()
+
+        self.assertEqual(schools.identifier, "school_id")
+        self.assertEqual({id: dict(record) for id, record in schools.dict.items()}, {
+            1000: {"school_name": "School 1", "lea_name": "LEA 1", "aun": 101, "number_tested": 25, "participation_group_1_subject__math": "N/A"},
+            1001: {"school_name": "School 2", "lea_name": "LEA 1", "aun": 101, "number_tested": 30},
+        })
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+'''
+<FILE>
+test_raw_store.py
+
+
+<DESCRIPTION>
+Tests for <raw_store.RawStore>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import os
+import hashlib
+import tempfile
+import unittest
+from scripts.raw_store import RawStore
+from scripts.utils import LogBuffer
+
+class RawStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.directory = self._temp.name + "/data-raw"
+        self.store = RawStore(self.directory)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def add(self, url, content, filename="x.xlsx", file_class="AFR"):
+        partpath = self._temp.name + "/download.part"
+        with open(partpath, "wb") as part_file:
+            part_file.write(content)
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        return self.store.add(partpath, sha256, file_class, url, filename, LogBuffer())
+
+    def read_entry(self, url, file_class="AFR"):
+        with open(self.store.entries[file_class + "; " + url]["path"], "rb") as file:
+            return file.read()
+
+    def test_identical_content_shares_a_file(self):
+        path_a = self.add("http://a", b"old")
+        path_b = self.add("http://b", b"old")
+
+        self.assertEqual(path_a, path_b)
+        self.assertEqual(path_a, self.directory + "/AFR/x.xlsx")
+
+    def test_different_content_is_kept_side_by_side(self):
+        path_a = self.add("http://a", b"old")
+        path_b = self.add("http://b", b"other")
+
+        self.assertNotEqual(path_a, path_b)
+        self.assertEqual(self.read_entry("http://a"), b"old")
+        self.assertEqual(self.read_entry("http://b"), b"other")
+
+    def test_sole_holder_replaces_its_file(self):
+        path = self.add("http://a", b"old")
+        new_path = self.add("http://a", b"NEW")
+
+        self.assertEqual(path, new_path)
+        self.assertEqual(self.read_entry("http://a"), b"NEW")
+
+    def check_shared_file_is_kept(self, changed, other):
+        self.add("http://a", b"old")
+        self.add("http://b", b"old")
+
+        new_path = self.add(changed, b"NEW")
+        self.store.save()
+
+        self.assertNotEqual(new_path, self.directory + "/AFR/x.xlsx")
+        self.assertEqual(self.read_entry(changed), b"NEW")
+        self.assertEqual(self.read_entry(other), b"old")
+
+        with open(self.directory + "/AFR/x.xlsx", "rb") as file:
+            self.assertEqual(file.read(), b"old")
+
+    def test_shared_file_is_kept_when_first_url_changes(self):
+        self.check_shared_file_is_kept("http://a", "http://b")
+
+    def test_shared_file_is_kept_when_second_url_changes(self):
+        self.check_shared_file_is_kept("http://b", "http://a")
+
+    def test_entries_survive_reopening(self):
+        self.add("http://a", b"old")
+        self.add("http://b", b"old")
+        self.add("http://a", b"NEW")
+        self.store.save()
+
+        self.store = RawStore(self.directory)
+        self.assertEqual(self.read_entry("http://a"), b"NEW")
+        self.assertEqual(self.read_entry("http://b"), b"old")
+
+if __name__ == "__main__":
+    unittest.main()
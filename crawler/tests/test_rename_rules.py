@@ -0,0 +1,237 @@
+'''
+<FILE>
+test_rename_rules.py
+
+
+<DESCRIPTION>
+Tests for <rename_rules.py>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import io
+import unittest
+import contextlib
+from scripts import rename_rules
+from scripts.rename_rules import RenameTable, compile_rule, INVALID
+
+RENAMES = {
+    "DISTRICT_FAST_FACT": [
+        ("District Name", "lea_name"),
+        ("Website", "lea_website"),
+        ("Telephone Number", "lea_telephone"),
+        ("Address (Street)", "address_street"),
+        ("Address (City)", "address_city"),
+        ("Zip Code", "address_zip"),
+        ("2 or More Races", "multiracial"),
+        ("Gifted Students", "gifted"),
+        ("Intermediate Unit Name", "iu_name"),
+        ("Geographic Size (Square Miles)", "district_size"),
+        ("English Learner", "english_learner"),
+    ],
+    "SCHOOL_FAST_FACT": [
+        ("School Name", "school_name"),
+        ("Website", "school_website"),
+        ("Telephone Number", "school_telephone"),
+        ("Intermediate Unit Name", None),
+        ("Intermediate Unit Website", None),
+        ("Female (School)", "female_school"),
+        ("Black/African American", "african_american"),
+        ("Native Hawaiian or other Pacific Islander", "nh_pi"),
+        ("Charter School Enrollment", "cs_enrollment"),
+    ],
+    "AFR_EXPENDITURE": [
+        ("AUN", None),
+        ("LEA Name", "lea_name"),
+        ("Instruction 1000", "instruction"),
+        ("Support Services 2000", "support_services"),
+        ("Facilities Acquisition 4000", "facai"),
+        ("Current Expenditures", None),
+        ("CTGY", None),
+        ("Actual Instruction Expense", None),
+    ],
+    "AFR_EXPENDITURE_ADM": [
+        ("AUN", None),
+        ("District Name", None),
+        ("2018-19 Average Daily Memebership", "adm"),
+        ("2018-19 Weighted Average Daily Membership", "weighted_adm"),
+        ("CAT", None),
+    ],
+    "AFR_REVENUE": [
+        ("AUN", None),
+        ("LEA Name", "lea_name"),
+        ("Local Taxes 6111", "local_taxes"),
+        ("State Revenue 7000", "state_revenue"),
+        ("Total Local", None),
+        ("% of Total", None),
+        ("Federal Revenue 8000", "federal_revenue"),
+    ],
+    "AFR_REVENUE_PER_ADM": [
+        ("AUN", None),
+        ("CAT", None),
+        ("District", "lea_name"),
+        ("Average Daily Membership", "adm"),
+        ("Rank", None),
+        ("Total Revenue", None),
+    ],
+    "AFR_REVENUE_TCEM": [
+        ("AUN", None),
+        ("LEA Name", "lea_name"),
+        ("STEB Market Value", "market_value"),
+        ("Equalized Millage", "d_millage"),
+        ("679 Tax", "tax"),
+        ("Total", None),
+        ("Rank", None),
+    ],
+    "AID_RATIO": [
+        ("AUN", None),
+        ("School District", "lea_name"),
+        ("Market Value", "mv"),
+        ("Personal Income", "pi"),
+        ("MV Aid Ratio", "mv_aid_ratio"),
+        ("PI Aid Ratio", "pi_aid_ratio"),
+        ("MV / PI Aid Ratio", "mv_pi_aid_ratio"),
+        ("WADM", "weighted_adm"),
+        ("WADM MV", None),
+        ("Career and Technology Center (and participating SD)", "lea_name"),
+        ("Filter", None),
+        ("Fiscal Year", None),
+    ],
+    "AID_RATIO_IU": [
+        ("Intermediate Unit (and participating SD)", "iu_name"),
+        ("Market Value", "mv"),
+        ("MV / PI Aid Ratio", "mv_pi_aid_ratio"),
+    ],
+    "KEYSTONE": [
+        ("Year", None),
+        ("District Name", "lea_name"),
+        ("School Name", "school_name"),
+        ("Schl", "school_id"),
+        ("Student Group Name", "group"),
+        ("All Students", "all"),
+        ("N Scored", "scored"),
+        ("Percent Below Basic", "below_basic"),
+        ("Percent Basic", "basic"),
+        ("Percent Proficient", "proficient"),
+        ("Percent Advanced", "advanced"),
+        ("Algebra I", "algebra"),
+        ("E", "literature"),
+        ("S", "biology"),
+        ("Growth", None),
+    ],
+    "APD": [
+        ("Participation - Group 1 (Subject: Math)", "participation_group_1_subject__math"),
+        ("LEA Name", "lea_name"),
+        ("School Number", "school_id"),
+        ("Data Element", "data_element"),
+    ],
+    "COHORT_LEA": [
+        ("AUN", None),
+        ("LEA", "lea_name"),
+        ("Cohort", "total_cohort"),
+        ("Grads", "total_grads"),
+        ("Cohort Grad Rate", None),
+        ("Black Grads", "african_american_grads"),
+        ("AIAN Cohort", "ai_an_cohort"),
+        ("Multi-Racial Grads", "multiracial_grads"),
+        ("ELL Cohort", "english_learner_cohort"),
+        ("EL Grads", "english_learner_grads"),
+        ("Econ Disadv Cohort", "economically_disadvantaged_cohort"),
+        ("Sp Ed Grads", "special_ed_grads"),
+    ],
+    "COHORT_LEA_FIX": [
+        ("LEA Type", "aun"),
+        ("AUN", None),
+        ("LEA", "lea_name"),
+        ("Cohort", "total_cohort"),
+    ],
+    "COHORT_SCHOOL": [
+        ("School Number", None),
+        ("School", "school_name"),
+        ("School ID", None),
+        ("Grad Rate", None),
+        ("Native Hawaiian or Pacific Islander Cohort", "nh_pi_cohort"),
+    ],
+}
+'''[Dictionary]: Real headers, and what the rename functions which the tables replaced named them.'''
+
+class RenameTableTest(unittest.TestCase):
+
+    def test_tables_rename_as_before(self):
+        for table_name, renames in RENAMES.items():
+            table = getattr(rename_rules, table_name)
+            for attribute, new_name in renames:
+                with self.subTest(table=table_name, attribute=attribute):
+                    self.assertEqual(table.rename(attribute), new_name)
+
+    def test_base_rules_are_applied_first(self):
+        base = RenameTable("base", [("lower",), ("words",)])
+        table = RenameTable("table", [("exact", "total_cohort", "cohort")], base=base)
+
+        self.assertEqual(table.rename("Total Cohort"), "cohort")
+        self.assertEqual(table.rename("Other Name"), "other_name")
+
+    def test_dropped_by_base_is_dropped(self):
+        base = RenameTable("base", [("exact", "aun", None)])
+        table = RenameTable("table", [("replace", "aun", "lea")], base=base)
+
+        self.assertIsNone(table.rename("aun"))
+
+    def test_unmatched_names_can_be_dropped(self):
+        table = RenameTable("table", [("exact", "adm", "adm")], keep_unmatched=False)
+
+        self.assertEqual(table.rename("adm"), "adm")
+        self.assertIsNone(table.rename("rank"))
+
+    def test_renames_are_remembered(self):
+        calls = []
+        table = RenameTable("table", [("lower",)])
+        table._steps.append(lambda name: (calls.append(name), name, False))
+
+        self.assertEqual(table.rename("AUN"), "aun")
+        self.assertEqual(table.rename("AUN"), "aun")
+        self.assertEqual(calls, ["aun"])
+
+    def test_invalid_attribute_stops(self):
+        table = RenameTable("table", [("contains", "ratio", INVALID)])
+
+        with self.assertRaises(SystemExit), contextlib.redirect_stdout(io.StringIO()) as output:
+            table.rename("odd ratio")
+
+        self.assertIn("odd ratio", output.getvalue())
+
+    def test_unused_rules_are_found(self):
+        base = RenameTable("base", [("lower",), ("replace", "§", "")])
+        table = RenameTable("table", [("exact", "aun", None), ("contains", "rank", None)], base=base)
+
+        self.assertEqual(table.find_unused_rules(["AUN", "Name"]), [["table", ("contains", "rank", None)], ["base", ("replace", "§", "")]])
+
+class CompileRuleTest(unittest.TestCase):
+
+    def rename(self, rule, name):
+        return compile_rule(rule)(name)
+
+    def test_rules_return_a_result_only_when_matched(self):
+        self.assertEqual(self.rename(("replace", "-", "_"), "a-b"), (True, "a_b", False))
+        self.assertEqual(self.rename(("replace_pattern", r'^\d{4}\-\d{2}\_', ""), "2018-19_adm"), (True, "adm", False))
+        self.assertEqual(self.rename(("exact", ("h", "aun"), None), "aun"), (True, None, True))
+        self.assertEqual(self.rename(("exact", "aun", None), "aun_2"), (False, "aun_2", False))
+        self.assertEqual(self.rename(("contains", ("rank", "total"), None), "total_revenue"), (True, None, True))
+        self.assertEqual(self.rename(("match", r'^(?=.*ratio)(?=.*mv)', "mv_aid_ratio"), "mv_ratio"), (True, "mv_aid_ratio", True))
+        self.assertEqual(self.rename(("substitute", "black", "african_american"), "black_grads"), (True, "african_american_grads", True))
+        self.assertEqual(self.rename(("rewrite", "zip", [("zip_code", "address_zip")]), "zip_code"), (True, "address_zip", True))
+        self.assertEqual(self.rename(("slice", "steb", 5), "steb_market_value"), (True, "market_value", True))
+
+    def test_codes_are_looked_up(self):
+        rule = ("code", r'\d{4}$', {1000: "instruction"})
+
+        self.assertEqual(self.rename(rule, "instruction_1000"), (True, "instruction", True))
+        self.assertEqual(self.rename(rule, "other_9999"), (True, INVALID, True))
+        self.assertEqual(self.rename(rule, "name"), (False, "name", False))
+
+    def test_unknown_kind_raises(self):
+        with self.assertRaises(ValueError):
+            compile_rule(("unknown",))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+'''
+<FILE>
+test_utils.py
+
+
+<DESCRIPTION>
+Tests for @utils.detect_type(...), @utils.detect_db_type(...), and
+@utils.detect_types(...). Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import random
+import unittest
+from scripts.utils import detect_type, detect_db_type, detect_types
+
+VALUES = [
+    None, 0, 7, -3, 2.5, 3.0, True,
+    "", " ", "N/A", "NA", "Not Available", "IS", "--", "null",
+    "Suppressed due to cohort size", "12", " 12 ", "012", "-12", "1.5", ".5", "+2.",
+    "717-555-1234", "717-555-1234 ext. 5", "1,000", "School 1", "3 4",
+]
+'''[[Any...]]: Values found in the sheets, and values like them.'''
+
+class DetectTypeTest(unittest.TestCase):
+
+    def test_values_are_cast(self):
+        self.assertIsNone(detect_type(" Not Applicable "))
+        self.assertIsNone(detect_type("Suppressed due to cohort size"))
+        self.assertEqual(detect_type(" 012 "), 12)
+        self.assertEqual(detect_type("-1.5"), -1.5)
+        self.assertEqual(detect_type("717-555-1234"), 7175551234)
+        self.assertEqual(detect_type("1,000"), "1,000")
+        self.assertEqual(detect_type(2.5), 2.5)
+
+    def test_column_type_ignores_header_and_missing_values(self):
+        self.assertEqual(detect_db_type(["aun", None, 1, 2]), "INTEGER")
+        self.assertEqual(detect_db_type(["mv", 1, 2.5, None]), "REAL")
+        self.assertEqual(detect_db_type(["mv", 1.0, 2.0]), "INTEGER")
+        self.assertEqual(detect_db_type(["name", 1, "A", 2.5]), "TEXT")
+        self.assertEqual(detect_db_type([1.5]), "INTEGER")
+
+class DetectTypesTest(unittest.TestCase):
+
+    def assert_same_as_one_by_one(self, col):
+        values, db_type = detect_types(col)
+
+        self.assertEqual(values, [detect_type(value) for value in col])
+        self.assertEqual([type(value) for value in values], [type(detect_type(value)) for value in col])
+        self.assertEqual(db_type, detect_db_type(col))
+
+    def test_columns_are_cast_in_one_pass(self):
+        self.assertEqual(detect_types(["2015", "12", None, "N/A", "NA", 2.5]), ([2015, 12, None, "N/A", None, 2.5], "TEXT"))
+        self.assertEqual(detect_types(["mv", 1, 2.5]), (["mv", 1, 2.5], "REAL"))
+        self.assertEqual(detect_types([]), ([], "INTEGER"))
+
+    def test_header_does_not_change_the_type(self):
+        self.assertEqual(detect_types(["mv", 1, None]), (["mv", 1, None], "INTEGER"))
+        self.assertEqual(detect_types([2.5, 1]), ([2.5, 1], "INTEGER"))
+
+    def test_same_as_casting_one_by_one(self):
+        for value in VALUES:
+            with self.subTest(value=value):
+                self.assert_same_as_one_by_one(["header", value])
+                self.assert_same_as_one_by_one([value, 1])
+
+        generator = random.Random(0)
+        for test_idx in range(200):
+            col = [generator.choice(VALUES) for value_idx in range(generator.randint(0, 12))]
+            with self.subTest(col=col):
+                self.assert_same_as_one_by_one(col)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+'''
+<FILE>
+test_workbook_io.py
+
+
+<DESCRIPTION>
+Tests for <workbook_io.py>. Run from the crawler directory:
+
+    $ python -m unittest discover tests
+'''
+
+import os
+import sqlite3
+import datetime
+import tempfile
+import unittest
+from xls2xlsx import XLS2XLSX
+from scripts.workbook_io import open_workbook, read_rows, read_sheet, write_workbook, is_xls, XlsWorkbook, SqliteWorkbook
+
+FIXTURES_DIRECTORY = os.path.dirname(os.path.abspath(__file__)) + "/fixtures"
+'''[String]: The path to the workbooks the tests read.'''
+
+XLS_FILE = FIXTURES_DIRECTORY + "/Aid_Ratios_2015-2016.xls"
+'''[String]: A small legacy .xls workbook, with a date, a time, booleans, an error, and a styled blank cell.'''
+
+SHEETS = [
+    ("2015", [
+        ("aun", "lea_name", "mv", "note"),
+        (101, "District A", 1234567.5, None),
+        (102, None, 7654321, "N/A"),
+    ]),
+    ('Sheet "2"', [
+        ("school_id",),
+        (1000, "wider", None, "widest"),
+        (1001,),
+    ]),
+]
+'''[[(String, [Tuple...])...]]: A small workbook, with missing values and rows of different widths.'''
+
+def read_workbook(path):
+    # Reads every sheet of a workbook, as (title, rows)
+    wb = open_workbook(path)
+    sheets = [(ws.title, list(read_sheet(ws))) for ws in wb.worksheets]
+    wb.close()
+    return sheets
+
+class XlsWorkbookTest(unittest.TestCase):
+
+    def test_xls_is_read_directly(self):
+        wb = open_workbook(XLS_FILE)
+        self.assertIsInstance(wb, XlsWorkbook)
+        wb.close()
+
+        self.assertEqual(read_workbook(XLS_FILE), [
+            ("Aid Ratios", [
+                ("AUN", "School District", "Market Value", "MV Aid Ratio", "Updated", "Final"),
+                (101, "District A", 1234567.5, 0.5, datetime.datetime(2016, 7, 1, 12, 30), "true"),
+                (102, "District B", 7654321, 0.25, datetime.datetime(2016, 7, 2), "false"),
+                (103, "District C", None, None, datetime.time(3, 4, 5), "#DIV/0!"),
+            ]),
+            ("Notes", [("Source",), ("PDE",)]),
+        ])
+
+    def test_xls_reads_as_its_conversion(self):
+        with tempfile.TemporaryDirectory() as directory:
+            XLS2XLSX(XLS_FILE).to_xlsx(directory + "/converted.xlsx")
+
+            self.assertEqual(read_workbook(XLS_FILE), read_workbook(directory + "/converted.xlsx"))
+
+    def test_html_tables_are_not_xls(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(directory + "/table.xls", "w") as file:
+                file.write("<html><table><tr><td>AUN</td></tr></table></html>")
+
+            self.assertTrue(is_xls(XLS_FILE))
+            self.assertFalse(is_xls(directory + "/table.xls"))
+
+    def test_only_values_can_be_read(self):
+        wb = open_workbook(XLS_FILE)
+
+        with self.assertRaises(ValueError):
+            next(wb.active.iter_rows(values_only=False))
+
+        wb.close()
+
+class FileFormatTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.directory = self._temp.name
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def test_formats_read_back_the_same(self):
+        write_workbook(self.directory + "/a.xlsx", SHEETS)
+        write_workbook(self.directory + "/b.sqlite", SHEETS)
+
+        expected = [
+            ("2015", [
+                ("aun", "lea_name", "mv", "note"),
+                (101, "District A", 1234567.5, None),
+                (102, None, 7654321, "N/A"),
+            ]),
+            ('Sheet "2"', [
+                ("school_id", None, None, None),
+                (1000, "wider", None, "widest"),
+                (1001, None, None, None),
+            ]),
+        ]
+
+        self.assertEqual(read_workbook(self.directory + "/a.xlsx"), expected)
+        self.assertEqual(read_workbook(self.directory + "/b.sqlite"), expected)
+
+    def test_sqlite_is_opened_as_sqlite(self):
+        write_workbook(self.directory + "/wb.sqlite", SHEETS)
+
+        wb = open_workbook(self.directory + "/wb.sqlite")
+        self.assertIsInstance(wb, SqliteWorkbook)
+        self.assertEqual(list(read_rows(wb.worksheets[1], skip_rows=1)), [(1000, "wider", None, "widest"), (1001, None, None, None)])
+        wb.close()
+
+    def test_sqlite_table_is_widened_as_rows_grow(self):
+        rows = [("a",), ("a", "b"), ("a", "b", "c", None), ("a",)]
+        write_workbook(self.directory + "/wb.sqlite", [("sheet", iter(rows))])
+
+        con = sqlite3.connect(self.directory + "/wb.sqlite")
+        columns = [name for cid, name, type, notnull, default, pk in con.execute("PRAGMA table_info(sheet);")]
+        stored = list(con.execute("SELECT * FROM sheet ORDER BY rowid;"))
+        con.close()
+
+        self.assertEqual(columns, ["c1", "c2", "c3"])
+        self.assertEqual(stored, [("a", None, None), ("a", "b", None), ("a", "b", "c"), ("a", None, None)])
+
+    def test_other_values_are_stored_as_text_in_sqlite(self):
+        write_workbook(self.directory + "/wb.sqlite", [("sheet", [("updated",), (datetime.date(2016, 7, 2),)])])
+
+        self.assertEqual(read_workbook(self.directory + "/wb.sqlite"), [("sheet", [("updated",), ("2016-07-02",)])])
+
+    def test_other_format_is_removed(self):
+        write_workbook(self.directory + "/wb.xlsx", SHEETS)
+        write_workbook(self.directory + "/wb.sqlite", SHEETS)
+
+        self.assertEqual(os.listdir(self.directory), ["wb.sqlite"])
+
+    def test_generated_rows_are_written_once(self):
+        for file_format in ["xlsx", "sqlite"]:
+            with self.subTest(file_format=file_format):
+                written = []
+
+                def get_rows():
+                    for row in SHEETS[0][1]:
+                        written.append(row)
+                        yield row
+
+                write_workbook(self.directory + "/wb." + file_format, [("2015", get_rows())])
+
+                self.assertEqual(written, SHEETS[0][1])
+                self.assertEqual(read_workbook(self.directory + "/wb." + file_format), [SHEETS[0]])
+
+    def test_unknown_format_raises(self):
+        with self.assertRaises(ValueError):
+            write_workbook(self.directory + "/wb.csv", SHEETS)
+
+if __name__ == "__main__":
+    unittest.main()